@@ -73,7 +73,7 @@ from config_component.controller import controller_read_dict
 config_obj._controllers["con1"] = controller_read_dict("con1", opxp_hardware)
 # config_obj._controllers["con2"] = controller_read_dict("con2", opxp_hardware)
 # Create qubit
-from config_component.construct import create_qubit, create_roChannel, create_zChannel, create_xyChannel
+from config_component.construct import create_qubits, create_roChannel, create_zChannel, create_xyChannel
 
 for x_wire in [("q3",("con1",3),("con1",4)), ("q4",("con1",7),("con1",8))]:
     spec.update_WireInfo_for(x_wire[0],xy_I=x_wire[1],xy_Q=x_wire[2])
@@ -84,9 +84,7 @@ for z_wire in [("q3",("con1",6)), ("q4",("con1",10)), ("q7",("con1",5)), ("q8",(
 # for z_wire in [("q5",("con2",6)), ("q6",("con2",9)), ("q7",("con2",10)), ("q8",("con2",5))]:
 #     spec.update_WireInfo_for(z_wire[0],z=z_wire[1])
 
-for q_idx in range(qubit_num):
-    q_name = f"q{q_idx}"
-    create_qubit( config_obj,q_name,spec.get_spec_forConfig('ro'),spec.get_spec_forConfig('xy'),spec.get_spec_forConfig('wire'),spec.get_spec_forConfig('z'))
+create_qubits( config_obj, spec, [f"q{q_idx}" for q_idx in range(qubit_num)] )
 
 #     create_roChannel( config, f"{q_name}_ro", spec.get_spec_forConfig('ro')[q_name],spec.get_spec_forConfig('wire')[q_name] )
 #     create_xyChannel( config, f"{q_name}_xy", spec.get_spec_forConfig('xy')[q_name],spec.get_spec_forConfig('wire')[q_name] )
@@ -16,13 +16,63 @@ def import_config( link_path ):
 
     return config, spec
 
-def output_config( link_path, config_obj, spec ):
-
+def output_config( link_path, config_obj, spec, message:str="" ):
+    """
+    Save config and spec to the paths in link.\n
+    If the link has `snapshot_root` in [path], the saved state is also recorded in the snapshot store there with message.\n
+    return the config hash.
+    """
     link_config = import_link(link_path)
+    problems = config_obj.validate(raise_error=False)
+    for problem in problems:
+        print(f"Warning: {problem}")
     spec.export_spec(link_config["path"]["specification"])
     config_obj.export_config(link_config["path"]["dynamic_config"])
     
-    import json
-    file_path = link_config["path"]["config"]
-    with open(file_path, 'w') as json_file:
-        json.dump(config_obj.get_config(), json_file, indent=2)
\ No newline at end of file
+    config_hash = config_obj.export_json(link_config["path"]["config"], indent=2)
+
+    if "snapshot_root" in link_config["path"]:
+        snapshot_id = snapshot_store(link_path).save(config_obj, spec, message)
+        print(f"Snapshot {snapshot_id} saved")
+    return config_hash
+
+def snapshot_store( link_path ):
+    """ The `SnapshotStore` at `snapshot_root` in [path] of the link """
+    from config_component.snapshot import SnapshotStore
+    link_config = import_link(link_path)
+    if "snapshot_root" not in link_config["path"]:
+        raise KeyError(f"No snapshot_root in [path] of {link_path}")
+    return SnapshotStore(link_config["path"]["snapshot_root"])
+
+def restore_config( link_path, snapshot_id:str=None ):
+    """
+    Write the config and spec of a snapshot back to the paths in link, snapshot_id None for the latest one.\n
+    return config, spec
+    """
+    store = snapshot_store(link_path)
+    if snapshot_id is None:
+        snapshot_id = store.latest()
+    config_obj, spec = store.restore(snapshot_id)
+    output_config( link_path, config_obj, spec, message=f"restore {snapshot_id}" )
+    return config_obj, spec
+
+def migrate_link( link_path, suffix:str=".qmz" ):
+    """
+    Convert the pickle files of spec and dynamic config in the link to container files,
+    and point the link to the new files. The pickle files are kept.
+    """
+    import tomlkit
+    from pathlib import Path
+    from config_component.persistence import is_container, migrate_pickle
+
+    link_config = import_link(link_path)
+    for key in ["specification", "dynamic_config"]:
+        old_path = Path(link_config["path"][key])
+        if is_container(old_path):
+            continue
+        new_path = old_path.with_suffix(suffix)
+        migrate_pickle(old_path, new_path)
+        link_config["path"][key] = str(new_path)
+        print(f"{old_path} -> {new_path}")
+    with open(link_path, 'w') as file:
+        file.write(tomlkit.dumps(link_config))
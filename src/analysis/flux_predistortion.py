@@ -0,0 +1,192 @@
+"""
+Flux line predistortion from cryoscope data.\n
+cryoscope data -> detuning -> step response -> exponential fit -> feedforward/feedback taps -> offline check -> Z-line filter\n
+ex.\n
+    detuning = cryoscope_detuning( time, rx90, ry90 )\n
+    response = flux_step_response( detuning )\n
+    exponentials = fit_exponentials( time, response )\n
+    feedforward, feedback = predistortion_taps( exponentials )\n
+    result = check_filter( time, response, feedforward, feedback )\n
+    spec.update_ZInfo_for( "q4", filter={"feedforward":feedforward, "feedback":feedback} )\n
+result["corrected_settle_time"] is the wait (ns) the flux needs after a step with the filter,
+ex. give it to the flux settle wait of `freq_sweep_flux_dep` in us.
+"""
+from typing import List, Tuple
+
+import numpy as np
+from scipy import optimize, signal
+
+from config_component.controller import FEEDFORWARD_TAP_LIMIT, _checked_taps
+
+
+def exponential_decay(x, a, t):
+    """Exponential decay defined as 1 + a * np.exp(-x / t).
+
+    :param x: numpy array for the time vector in ns
+    :param a: float for the exponential amplitude
+    :param t: float for the exponential decay time in ns
+    :return: numpy array for the exponential decay
+    """
+    return 1 + a * np.exp(-x / t)
+
+
+def exponential_correction(A, tau, Ts=1e-9):
+    """Derive FIR and IIR filter taps based on the exponential coefficients A and tau from 1 + a * np.exp(-x / t).
+
+    :param A: amplitude of the exponential decay.
+    :param tau: decay time of the exponential decay.
+    :param Ts: sampling period. Default is 1e-9.
+    :return: FIR and IIR taps.
+    """
+    tau = tau * Ts
+    k1 = Ts + 2 * tau * (A + 1)
+    k2 = Ts - 2 * tau * (A + 1)
+    c1 = Ts + 2 * tau
+    c2 = Ts - 2 * tau
+    feedback_tap = k2 / k1
+    feedforward_taps = np.array([c1, c2]) / k1
+    return feedforward_taps, feedback_tap
+
+
+def filter_calc(exponential):
+    """Derive FIR and IIR filter taps based on a list of exponential coefficients.
+
+    :param exponential: exponential coefficients defined as [(A1, tau1), (A2, tau2)]
+    :return: FIR and IIR taps as [fir], [iir]
+    """
+    # Initialization based on the number of exponential coefficients
+    b = np.zeros((2, len(exponential)))
+    feedback_taps = np.zeros(len(exponential))
+    # Derive feedback tap for each set of exponential coefficients
+    for i, (A, tau) in enumerate(exponential):
+        b[:, i], feedback_taps[i] = exponential_correction(A, tau)
+    # Derive feedback tap for each set of exponential coefficients
+    feedforward_taps = b[:, 0]
+    for i in range(len(exponential) - 1):
+        feedforward_taps = np.convolve(feedforward_taps, b[:, i + 1])
+    # feedforward taps are bounded to +/- 2, the open interval
+    limit = np.nextafter(FEEDFORWARD_TAP_LIMIT, 0)
+    largest = np.max(np.abs(feedforward_taps))
+    if largest > limit:
+        feedforward_taps = np.clip(feedforward_taps * limit / largest, -limit, limit)
+
+    return feedforward_taps, feedback_taps
+
+
+# ================= Cryoscope data =========================
+def cryoscope_detuning( time, rx90, ry90, pad_zeros:int=0, virtual_detune:float=0., window:int=13, order:int=3 )->np.ndarray:
+    """
+    Qubit detuning (MHz) during the flux pulse from the Ramsey signals closed by x90 and y90.\n
+    time: flux pulse durations in ns, evenly spaced.\n
+    rx90, ry90: the signals of one readout quadrature closed by "x90" and "y90".\n
+    pad_zeros: number of points before the flux pulse, excluded from the centering.\n
+    virtual_detune: detuning (MHz) added to the signal before unwrapping, removed from the result. Use it when the flux detuning is small.\n
+    window, order: the Savitzky-Golay filter used for the derivative of the phase.
+    """
+    time = np.asarray(time, dtype=float)
+    rx90 = np.asarray(rx90, dtype=float)
+    ry90 = np.asarray(ry90, dtype=float)
+    zdata = (rx90 -np.mean(rx90[pad_zeros:])) +1j*(ry90 -np.mean(ry90[pad_zeros:]))
+    zdata = zdata*np.exp(1j*time*virtual_detune/1000*np.pi*2)
+    phase = np.unwrap(np.angle(zdata))
+    phase = phase -phase[-1]
+    # time step in us gives the derivative in MHz
+    step = (time[1] -time[0])/1000
+    detuning = signal.savgol_filter(phase/2/np.pi, window, order, deriv=1, delta=step)
+    return detuning -virtual_detune
+
+def flux_step_response( detuning, settled_points:int=20, quadratic:bool=True )->np.ndarray:
+    """
+    Step response of the flux line normalized to 1 at the end.\n
+    detuning: from `cryoscope_detuning`.\n
+    settled_points: the last points where the flux is settled, their mean is the final value.\n
+    quadratic: True if the qubit is at the sweet spot where the detuning is proportional to the square of the flux,
+    False if the detuning is proportional to the flux.
+    """
+    detuning = np.asarray(detuning, dtype=float)
+    response = detuning/np.mean(detuning[-settled_points:])
+    if quadratic:
+        response = np.sqrt(np.clip(response, 0, None))
+    return response
+
+def fit_exponentials( time, response, exp_num:int=1, guess:List[Tuple[float,float]]=None )->List[Tuple[float,float]]:
+    """
+    Fit the step response with 1 +sum_i A_i*exp(-t/tau_i).\n
+    time: in ns.\n
+    exp_num: number of exponentials.\n
+    guess: initial [(A1, tau1), ...], None for the amplitudes from the first point and the decay times spread over the time range.\n
+    return [(A1, tau1), (A2, tau2)...], tau in ns.
+    """
+    time = np.asarray(time, dtype=float)
+    response = np.asarray(response, dtype=float)
+    if guess is None:
+        span = time[-1] -time[0]
+        guess = [ ((response[0]-1)/exp_num, span/(4*(idx+1)**2)) for idx in range(exp_num) ]
+    if len(guess) != exp_num:
+        raise ValueError(f"{len(guess)} guesses are given for {exp_num} exponentials!")
+
+    def model( t, *params ):
+        value = np.ones_like(t)
+        for a, tau in zip(params[0::2], params[1::2]):
+            value = value +a*np.exp(-t/tau)
+        return value
+
+    p0 = [ value for pair in guess for value in pair ]
+    lower = [ -np.inf if idx%2 == 0 else 1e-3 for idx in range(2*exp_num) ]
+    popt, _ = optimize.curve_fit( model, time, response, p0=p0, bounds=(lower, np.inf), maxfev=10000 )
+    return [ (float(popt[2*idx]), float(popt[2*idx+1])) for idx in range(exp_num) ]
+
+
+# ================= Filter taps =========================
+def predistortion_taps( exponentials:List[Tuple[float,float]] )->Tuple[list,list]:
+    """
+    Taps for the filter of the Z-line analog output correcting the step response 1 +sum_i A_i*exp(-t/tau_i).\n
+    exponentials: [(A1, tau1), ...] from `fit_exponentials`, tau in ns.\n
+    return (feedforward, feedback) in the sign convention of the OPX, ready for `Analog_output.filter`.\n
+    The feedforward taps of a strong overshoot are scaled under the limit 2, so is the amplitude of the filtered output.\n
+    Raise ValueError if the taps are out of the hardware limits.
+    """
+    feedforward, feedback = filter_calc(exponentials)
+    # filter_calc gives the denominator of lfilter, the OPX adds the feedback terms
+    feedforward = _checked_taps(feedforward, "feedforward")
+    feedback = _checked_taps(-np.asarray(feedback), "feedback")
+    return feedforward, feedback
+
+def apply_filter( feedforward:list, feedback:list, waveform )->np.ndarray:
+    """
+    The waveform (1 ns per sample) after the filter of the OPX, each feedback tap is a single pole section.
+    """
+    output = signal.lfilter( np.asarray(feedforward, dtype=float), [1.], np.asarray(waveform, dtype=float) )
+    for tap in feedback:
+        output = signal.lfilter( [1.], [1., -tap], output )
+    return output
+
+def settle_time( time, response, tolerance:float=0.01 )->float:
+    """ Time (ns) after which the response stays within 1 +/- tolerance """
+    time = np.asarray(time, dtype=float)
+    outside = np.nonzero( np.abs(np.asarray(response) -1) > tolerance )[0]
+    if len(outside) == 0:
+        return float(time[0])
+    if outside[-1] == len(time) -1:
+        return np.inf
+    return float(time[outside[-1] +1])
+
+def check_filter( time, response, feedforward:list, feedback:list, tolerance:float=0.01 )->dict:
+    """
+    Check the taps offline on the measured step response before writing them into the config.\n
+    The response is resampled to 1 ns, the output sample rate, and filtered like the OPX does.\n
+    return {"time", "corrected": the response after the filter, "residual": max |corrected -1| after the first point,
+    "settle_time": settle time (ns) without filter, "corrected_settle_time": with filter}
+    """
+    time = np.asarray(time, dtype=float)
+    dense_time = np.arange( 0, time[-1] +1 )
+    dense_response = np.interp( dense_time, time, response )
+    corrected = apply_filter( feedforward, feedback, dense_response )
+    start = int(np.searchsorted(dense_time, time[0]))
+    return {
+        "time": dense_time,
+        "corrected": corrected,
+        "residual": float(np.max(np.abs(corrected[start:] -1))),
+        "settle_time": settle_time(dense_time[start:], dense_response[start:], tolerance),
+        "corrected_settle_time": settle_time(dense_time[start:], corrected[start:], tolerance),
+    }
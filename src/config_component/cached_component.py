@@ -0,0 +1,150 @@
+from typing import FrozenSet, NamedTuple, Tuple
+
+_MISSING = object()
+_immutable_types = (int, float, str, bool, type(None))
+# component class -> names of its slots
+_slot_names = {}
+
+def _is_same( old, new )->bool:
+    """ Same object, or equal value of an immutable type """
+    if old is new:
+        return True
+    return type(old) is type(new) and type(old) in _immutable_types and old == new
+
+class CachedComponent:
+    """
+    Base class for the config components which remember the dict they produced last time.\n
+    Any attribute assignment (setter or direct) marks the component dirty,\n
+    `to_dict()` only rebuilds the dict fragment when the component or one of its sub-components is dirty.\n
+    Getters returning a mutable container (dict, list) also mark the component dirty,
+    because the caller could modify it in place.
+    """
+    # The components keep their attributes in __slots__, subclasses list their own attributes
+    __slots__ = ("_dirty", "_cached_dict")
+    _cache_attrs = ("_dirty", "_cached_dict")
+    # Attributes renamed since older pickled configs were saved, {old_name: new_name}
+    _legacy_attrs = {}
+    # Values for the attributes missing in older pickled configs, {name: value}
+    _slot_defaults = {}
+
+    def __setattr__( self, name:str, val ):
+        # A property setter assigns the underlying attribute (a slot), only that assignment is checked.
+        # A component already dirty needs no check, ex. during __init__.
+        if not getattr(self, "_dirty", True) and name in type(self)._all_slots():
+            if not _is_same(getattr(self, name, _MISSING), val):
+                object.__setattr__(self, "_dirty", True)
+        object.__setattr__(self, name, val)
+
+    @classmethod
+    def _all_slots( cls )->FrozenSet[str]:
+        """ Attributes of the component without the cache """
+        names = _slot_names.get(cls)
+        if names is not None:
+            return names
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get("__slots__", ()):
+                if name not in CachedComponent._cache_attrs and name not in names:
+                    names.append(name)
+        # frozenset for the lookup in __setattr__
+        _slot_names[cls] = frozenset(names)
+        return _slot_names[cls]
+
+    def mark_dirty( self ):
+        """ Force the next `to_dict()` to rebuild the dict fragment. """
+        object.__setattr__(self, "_dirty", True)
+
+    @property
+    def is_dirty( self )->bool:
+        """ True if this component or any of its sub-components changed after the last `to_dict()` """
+        if getattr(self, "_dirty", True) or getattr(self, "_cached_dict", None) is None:
+            return True
+        for sub_component in self._sub_components():
+            if sub_component.is_dirty:
+                return True
+        return False
+
+    def _sub_components( self )->list:
+        """ Components whose dicts are nested in the dict of this one. """
+        return []
+
+    def _build_dict( self )->dict:
+        raise NotImplementedError
+
+    def to_dict( self )->dict:
+        """
+        Return the dict fragment for the config.\n
+        The returned dict is shared with the cache, don't modify it.
+        """
+        if self.is_dirty:
+            object.__setattr__(self, "_cached_dict", self._build_dict())
+            object.__setattr__(self, "_dirty", False)
+        return self._cached_dict
+
+    def __getstate__( self )->dict:
+        # The cache is rebuilt after loading, no need to save it.
+        # Saved as {name: value} like the components pickled before __slots__
+        return { name: getattr(self, name) for name in self._all_slots() if hasattr(self, name) }
+
+    def __setstate__( self, state:dict ):
+        for old_name, new_name in self._legacy_attrs.items():
+            if old_name in state:
+                state[new_name] = state.pop(old_name)
+        slots = self._all_slots()
+        for name, val in self._slot_defaults.items():
+            if name not in state:
+                object.__setattr__(self, name, val)
+        for name, val in state.items():
+            # Attributes dropped since the pickle was saved are skipped
+            if name in slots:
+                object.__setattr__(self, name, val)
+        object.__setattr__(self, "_cached_dict", None)
+        object.__setattr__(self, "_dirty", True)
+
+class Field( NamedTuple ):
+    """
+    One key of the dict built by `build_serializer`.\n
+    key: key in the config dict\n
+    attr: attribute of the component keeping the value\n
+    rule: "value" always written, "not_none" skipped if None, "not_empty" skipped if empty,
+    "component" the dict of a sub-component, "merge" the dict of a sub-component merged into this one
+    """
+    key: str
+    attr: str
+    rule: str = "value"
+
+_field_rules = ["value", "not_none", "not_empty", "component", "merge"]
+
+def build_serializer( fields:Tuple[Field], key_attr:str=None ):
+    """
+    Generate the `_build_dict` of a component from its fields.\n
+    The generated function reads the attributes directly and builds the dict in one literal,
+    the optional keys are added after it.\n
+    key_attr: attribute used as the key of the output dict ex. "_name" gives {self._name: {...}}, None for the dict itself.
+    """
+    literal = []
+    optional = []
+    for field in fields:
+        if field.rule not in _field_rules:
+            raise ValueError(f"Unknown rule '{field.rule}' of field '{field.key}', should be one of {_field_rules}")
+        value = f"self.{field.attr}"
+        match field.rule:
+            case "value":
+                literal.append(f"{field.key!r}: {value}")
+            case "component":
+                literal.append(f"{field.key!r}: {value}.to_dict()")
+            case "merge":
+                literal.append(f"**{value}.to_dict()")
+            case "not_none":
+                optional.append(f"    if {value} is not None: d[{field.key!r}] = {value}")
+            case "not_empty":
+                optional.append(f"    if len({value}) != 0: d[{field.key!r}] = {value}")
+
+    lines = ["def _build_dict( self ):", f"    d = {{{', '.join(literal)}}}"]
+    lines.extend(optional)
+    lines.append("    return d" if key_attr is None else f"    return {{self.{key_attr}: d}}")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    serializer = namespace["_build_dict"]
+    serializer.__doc__ = "Generated by `build_serializer` from the fields:\n" +"\n".join(lines[1:])
+    return serializer
@@ -1,4 +1,5 @@
 from numpy import array, cos, sin, pi, arange
+import numpy as np
 from qm.octave import QmOctaveConfig
 from qm.QuantumMachinesManager import QuantumMachinesManager
 from QM_driver_AS.ultitly.set_octave import OctaveUnit, octave_declaration
@@ -7,13 +8,54 @@ from QM_driver_AS.ultitly.set_octave import OctaveUnit, octave_declaration
 # AUXILIARY FUNCTIONS #
 #######################
 from qualang_tools.units import unit
+from typing import Any, Callable, List, NamedTuple
+from config_component.parameter_table import QubitParameterTable, InfoView
 u = unit(coerce_to_integer=True)
 
+# Per-qubit infos kept in the parameter table, HardwareInfo stays a dict
+_table_infos = ["RoInfo","XyInfo","ZInfo","DecoInfo","WireInfo"]
+# Fields in Hz kept as int, like `update_aRoInfo_for` and `update_aXyInfo_for` set them
+_hz_fields = {
+    "RoInfo":["resonator_LO","resonator_IF"],
+    "XyInfo":["qubit_LO","qubit_IF","anharmonicity","AC_stark_detuning"],
+}
+
+def _info_property( info:str ):
+    """ `ChannelInfo._RoInfo` and the others are the dict views of the parameter table, assigning a dict loads it into the table """
+    def getter( self )->InfoView:
+        return InfoView(self.parameters, info)
+    def setter( self, content:dict ):
+        if isinstance(content, InfoView):
+            content = content.to_dict()
+        self.parameters.load_info(info, content)
+    return property(getter, setter)
+
+
+class SpecChangeEvent( NamedTuple ):
+    """
+    Emitted by `ChannelInfo.update_*_for` for every changed value.\n
+    info: "RoInfo", "XyInfo", "ZInfo", "DecoInfo" or "WireInfo"\n
+    qubit: "q3", None for the values shared by all the qubits\n
+    field: key in the info of the qubit, "/" separates nested keys ex. "pi_ampScale/90"
+    """
+    info: str
+    qubit: str
+    field: str
+    old: Any
+    new: Any
+
 
 class ChannelInfo:
     """This object contains the information about RO and XY control on the chip"""
+    _RoInfo = _info_property("RoInfo")
+    _XyInfo = _info_property("XyInfo")
+    _ZInfo = _info_property("ZInfo")
+    _DecoInfo = _info_property("DecoInfo")
+    _WireInfo = _info_property("WireInfo")
+
     def __init__(self,q_num=None,**kwargs):
         self.q_num = q_num
+        self.parameters = QubitParameterTable()
         if q_num != None:
             self.init_xyInfo()
             self.init_roInfo()
@@ -29,6 +71,75 @@ class ChannelInfo:
             self._RoInfo = {}
             self.init_hardwareInfo()
 
+    def __setstate__( self, state:dict ):
+        # ChannelInfo pickled before the parameter table kept the infos as dicts
+        infos = { info: state.pop(f"_{info}") for info in _table_infos if f"_{info}" in state }
+        self.__dict__.update(state)
+        if "parameters" not in state:
+            self.parameters = QubitParameterTable()
+        for info, content in infos.items():
+            setattr(self, f"_{info}", content)
+
+    def update_column_for( self, info:str, field:str, values, qubits:List[str]=None ):
+        """
+        Set field of many qubits at once in the parameter table, the subscribers get one event per changed qubit.\n
+        info: "RoInfo", "XyInfo", "ZInfo", "DecoInfo"\n
+        field: key in the info of a qubit ex. "readout_amp", values are in the stored unit (Hz, ns).\n
+        values: a number for all the qubits or one per qubit. The fields in Hz ex. "qubit_IF" are rounded to int,
+        the other fields keep the int or float kind of their cells.\n
+        qubits: None for all the qubits in info.
+        """
+        if qubits is None:
+            qubits = self.parameters.members(info)
+        if field in _hz_fields.get(info, []):
+            values = np.asarray(values)
+            if values.dtype.kind == "f":
+                if not np.isfinite(values).all():
+                    raise ValueError(f"{field} in {info} is in Hz, {values} can't be set")
+                values = np.rint(values).astype(np.int64)
+        subscribers = getattr(self, "_subscribers", [])
+        old = [ self.parameters.get(info, q, field) if field in self.parameters.keys_of(info, q) else None for q in qubits ] if subscribers else []
+        self.parameters.set_column(info, field, values, qubits)
+        for q, old_value in zip(qubits, old):
+            new_value = self.parameters.get(info, q, field)
+            if old_value != new_value:
+                for callback in subscribers:
+                    callback( SpecChangeEvent(info, q, field, old_value, new_value) )
+
+    def frequency_collisions( self, min_spacing:float=20*u.MHz, images:bool=True )->list:
+        """
+        XY and RO frequencies (LO+IF) of all the qubits closer than min_spacing (Hz),
+        the mixer images (LO-IF) are also checked against the drives with images.\n
+        return [(signal, signal, spacing)] ex. ("q1_xy", "q3_xy_image", 4e6)
+        """
+        return self.parameters.frequency_collisions(min_spacing, images=images)
+
+    # change events
+    def subscribe( self, callback:Callable[[SpecChangeEvent], None] ):
+        """ callback is called with a `SpecChangeEvent` after each value changed by `update_*_for` """
+        if not hasattr(self, "_subscribers"):
+            self._subscribers = []
+        self._subscribers.append(callback)
+
+    def unsubscribe( self, callback:Callable[[SpecChangeEvent], None] ):
+        self._subscribers.remove(callback)
+
+    def _set_info( self, info:str, target_q:str, field:str, value ):
+        """
+        Set the value at field of target_q in the info and notify the subscribers.\n
+        target_q: None for the values shared by the qubits.
+        """
+        container = getattr(self, f"_{info}")
+        if target_q is not None:
+            container = container[target_q]
+        keys = field.split("/")
+        for key in keys[:-1]:
+            container = container[key]
+        old = container.get(keys[-1])
+        container[keys[-1]] = value
+        for callback in getattr(self, "_subscribers", []):
+            callback( SpecChangeEvent(info, target_q, field, old, value) )
+
     # for hardware infomation
     def init_hardwareInfo(self):
         self._HardwareInfo = {}
@@ -166,13 +277,17 @@ class ChannelInfo:
 
 
     def optimal_ROweights_generator(self, npz_file_path:str):
-        from qualang_tools.config.integration_weights_tools import convert_integration_weights
+        """
+            Read the optimal weights (one value per 4 ns) from npz file, return the dict for `update_RoInfo_for(optimal=...)`.\n
+            The segments are kept at full resolution, they are compressed when put into config by `create_roChannel` or `update_Readout`.
+        """
+        from config_component.integration_weight import weights_to_segments
         from numpy import load
         weights = load(npz_file_path)
-        real = convert_integration_weights(weights["weights_real"])
-        minus_imag = convert_integration_weights(weights["weights_minus_imag"])
-        imag = convert_integration_weights(weights["weights_imag"])
-        minus_real = convert_integration_weights(weights["weights_minus_real"])
+        real = weights_to_segments(weights["weights_real"])
+        minus_imag = weights_to_segments(weights["weights_minus_imag"])
+        imag = weights_to_segments(weights["weights_imag"])
+        minus_real = weights_to_segments(weights["weights_minus_real"])
 
         cosine_weight = {"cosine":real,"sine":minus_imag}
         sine_weight = {"cosine":imag,"sine":real}
@@ -193,29 +308,29 @@ class ChannelInfo:
             for info in kwargs:
                 match info.lower():
                     case "if":
-                        self._RoInfo[target_q][f'resonator_IF'] = int(kwargs[info]*u.MHz)
+                        self._set_info("RoInfo", target_q, 'resonator_IF', int(kwargs[info]*u.MHz))
                         few_freq[f'resonator_IF_{target_q}'] = int(kwargs[info]*u.MHz)
                     case "amp":
-                        self._RoInfo[target_q][f'readout_amp'] = kwargs[info]
+                        self._set_info("RoInfo", target_q, 'readout_amp', kwargs[info])
                     case "lo":
-                        self._RoInfo[target_q][f'resonator_LO'] = int(kwargs[info]*u.GHz)
+                        self._set_info("RoInfo", target_q, 'resonator_LO', int(kwargs[info]*u.GHz))
                         few_freq[f'resonator_LO_{target_q}'] = int(kwargs[info]*u.GHz)
                     case "len":
-                        self._RoInfo[target_q]['readout_len'] = kwargs[info]
+                        self._set_info("RoInfo", target_q, 'readout_len', kwargs[info])
                     case "time":
-                        self._RoInfo[target_q]['time_of_flight'] = kwargs[info]
+                        self._set_info("RoInfo", target_q, 'time_of_flight', kwargs[info])
                     case "depletion":
-                        self._RoInfo[target_q]["depletion_time"] = int(kwargs[info]*u.ns)
+                        self._set_info("RoInfo", target_q, "depletion_time", int(kwargs[info]*u.ns))
                     case "ge_hold":
-                        self._RoInfo[target_q][f'ge_threshold'] = kwargs[info]
+                        self._set_info("RoInfo", target_q, 'ge_threshold', kwargs[info])
                     case "origin":
-                        self._RoInfo[target_q][f"RO_weights"]["origin"] = kwargs[info]
+                        self._set_info("RoInfo", target_q, "RO_weights/origin", kwargs[info])
                     case "rotated":
-                        self._RoInfo[target_q]["rotated"] = kwargs[info]
+                        self._set_info("RoInfo", target_q, "rotated", kwargs[info])
                     case "optimal":
-                        self._RoInfo[target_q][f"RO_weights"]["optimal"] = kwargs[info]    
+                        self._set_info("RoInfo", target_q, "RO_weights/optimal", kwargs[info])
                     case "offset":
-                        self._RoInfo[target_q]["offset"] = kwargs[info]  
+                        self._set_info("RoInfo", target_q, "offset", kwargs[info])
                     case _:
                         raise KeyError("kwargs key goes wrong!")
         else:
@@ -276,27 +391,27 @@ class ChannelInfo:
         new_freq = {}
         for name in list(kwargs.keys()):
             if name.lower() == 'amp':
-                self._XyInfo[target_q]["pi_amp"] = kwargs[name] 
+                self._set_info("XyInfo", target_q, "pi_amp", kwargs[name])
             elif name.lower() == 'len':
-                self._XyInfo[target_q]["pi_len"] = kwargs[name]
+                self._set_info("XyInfo", target_q, "pi_len", kwargs[name])
             elif name.lower() == 'lo':
-                self._XyInfo[target_q]["qubit_LO"] = int(kwargs[name]*u.GHz)
+                self._set_info("XyInfo", target_q, "qubit_LO", int(kwargs[name]*u.GHz))
                 new_freq["qubit_LO_"+target_q] = int(kwargs[name]*u.GHz)
             elif name.lower() == 'if':
-                self._XyInfo[target_q]["qubit_IF"] = int(kwargs[name]*u.MHz)
+                self._set_info("XyInfo", target_q, "qubit_IF", int(kwargs[name]*u.MHz))
                 new_freq["qubit_IF_"+target_q] = int(kwargs[name]*u.MHz)
             elif name.lower() in ['draga','drag_coef'] :
-                self._XyInfo[target_q]["drag_coef"] = kwargs[name]
+                self._set_info("XyInfo", target_q, "drag_coef", kwargs[name])
             elif name.lower() in ["delta","d","anh","anharmonicity"]:
-                self._XyInfo[target_q]["anharmonicity"] = int(kwargs[name]*u.MHz)
+                self._set_info("XyInfo", target_q, "anharmonicity", int(kwargs[name]*u.MHz))
             elif name.lower() in ['ac',"AC_stark_detuning"]:
-                self._XyInfo[target_q]["AC_stark_detuning"] = int(kwargs[name]*u.MHz)
+                self._set_info("XyInfo", target_q, "AC_stark_detuning", int(kwargs[name]*u.MHz))
             elif name.lower() in ['waveform',"func",'wf']:
-                self._XyInfo[target_q]["waveform_func"] = kwargs[name]
+                self._set_info("XyInfo", target_q, "waveform_func", kwargs[name])
             elif name.lower() in ['half_scale','half']:
-                self._XyInfo[target_q]["pi_ampScale"]["90"] = kwargs[name]
+                self._set_info("XyInfo", target_q, "pi_ampScale/90", kwargs[name])
             elif name.lower() in ['const_amp']:
-                self._XyInfo[target_q]["const_amp"] = kwargs[name]
+                self._set_info("XyInfo", target_q, "const_amp", kwargs[name])
             else:
                 print(name.lower())
                 raise KeyError("I don't know what you are talking about!")
@@ -304,15 +419,12 @@ class ChannelInfo:
         return new_freq
     
     def export_spec( self, path ):
-        import pickle
-        # define dictionary
-        # create a binary pickle file 
-        f = open(path,"wb")
-        # write the python object (dict) to pickle file
-        spec = {"RoInfo":self._RoInfo,"XyInfo":self._XyInfo,"ZInfo":self._ZInfo,"DecoInfo":self._DecoInfo,"WireInfo":self._WireInfo, "HardwareInfo":self._HardwareInfo}
-        pickle.dump(spec,f)
-        # close file
-        f.close()
+        """
+        Save this spec to path as the versioned container in `persistence`.\n
+        The pickle files saved before are still loaded by `import_spec`.
+        """
+        from config_component.persistence import save_channel_info
+        save_channel_info(self, path)
     
 
 
@@ -336,7 +448,7 @@ class ChannelInfo:
         if kwargs != {}:
             for info in kwargs:
                 if info.lower() in ["t1","t2","t2e","t2s"]:
-                   self._DecoInfo[target_q][info.upper()] = kwargs[info] * u.us  
+                   self._set_info("DecoInfo", target_q, info.upper(), kwargs[info] * u.us)
                 else:
                     raise KeyError("Only two types are surpported: T1 and T2!")
         else:
@@ -365,18 +477,21 @@ class ChannelInfo:
             Update the z info for target qubit: ctrler channel, offset, OFFbias and idle encluded.\n
             target_q: "q3"...\n
             kwargs: controller='con2', con_channel=2, offset=0.03, OFFbias=-0.2, idle=-0.1, settle=400(in ns), len(const_flux_len)=500\n
+            filter={"feedforward":[...], "feedback":[...]} the predistortion taps of the z output, see `analysis.flux_predistortion`\n
             return the target_q's z info for config.
         """
         if kwargs != {}:
             for info in kwargs:
                 if info.lower() in ["controller","con_channel","offset","offbias","idle"]:
-                    self._ZInfo[target_q][info] = kwargs[info]
+                    self._set_info("ZInfo", target_q, info, kwargs[info])
                 elif info.lower() in ["crosstalk"]:
-                    self._ZInfo[target_q][info] = kwargs[info]
+                    self._set_info("ZInfo", target_q, info, kwargs[info])
+                elif info.lower() in ["filter"]:
+                    self._set_info("ZInfo", target_q, "filter", { kind: [ float(tap) for tap in kwargs[info].get(kind, []) ] for kind in ["feedforward","feedback"] })
                 elif info.lower() in ["settle"]:
-                    self._ZInfo["settle_time"] = int(kwargs[info]*u.ns)
+                    self._set_info("ZInfo", None, "settle_time", int(kwargs[info]*u.ns))
                 elif info.lower() in ["len","amp"]:
-                    self._ZInfo[f"const_flux_{info.lower()}"] = kwargs[info]
+                    self._set_info("ZInfo", None, f"const_flux_{info.lower()}", kwargs[info])
                 else:
                     raise KeyError("Some variables can't be identified, check the kwargs!")
         else:
@@ -419,7 +534,7 @@ class ChannelInfo:
             for info in kwargs:
                 print(kwargs)
                 if info in ['ro_mixer','xy_mixer','rin_I','rin_Q','rout_I','rout_Q','xy_I','xy_Q', 'z']:
-                    self._WireInfo[target_q][info] = kwargs[info]
+                    self._set_info("WireInfo", target_q, info, kwargs[info])
                 else:
                     raise KeyError("Check the wiring info key plz!")
         else:
@@ -466,18 +581,17 @@ class ChannelInfo:
             'ro' for RoInfo,\n
             'xy' for XyInfo.
         """
-        from copy import deepcopy
         match whichSpec.lower():
             case 'xy':
-                return deepcopy(self._XyInfo)
+                return self._XyInfo.to_dict()
             case 'ro':
-                return deepcopy(self._RoInfo)
+                return self._RoInfo.to_dict()
             case 'z':
-                return deepcopy(self._ZInfo)
+                return self._ZInfo.to_dict()
             case 'deco':
-                return deepcopy(self._DecoInfo)
+                return self._DecoInfo.to_dict()
             case 'wire':
-                return deepcopy(self._WireInfo)
+                return self._WireInfo.to_dict()
             case _:
                 raise KeyError(f"I don't know which info you need with the given info name: {whichSpec}")
 
@@ -515,7 +629,16 @@ class ChannelInfo:
     def get_HardwareInfo(self):
         return self._HardwareInfo
 
-def import_spec( path )->ChannelInfo:
+def import_spec( path, qubits:list=None )->ChannelInfo:
+    """
+    Load the spec saved by `export_spec`, both container and pickle file are accepted.\n
+    qubits: ["q0","q3"] to load only these qubits from container, None for all. Pickle file is always loaded fully.
+    """
+    from config_component.persistence import is_container, load_channel_info
+    if is_container(path):
+        spec = load_channel_info(path, qubits)
+        print("import_spec information loaded successfully!")
+        return spec
     import pickle
     # Read dictionary pkl file
     with open(path, 'rb') as fp:
@@ -0,0 +1,177 @@
+from typing import List, Tuple, Union
+
+class ConfigDiff:
+    def __init__( self ):
+        """
+        The changed paths between two configs.\n
+        runtime: changes the opened QM can take at runtime (IF, DC offset, mixer correction)\n
+        reopen: changes which need a new QM\n
+        each change is (path, old value, new value), path is a tuple like ("elements","q0_xy","intermediate_frequency")
+        """
+        self.runtime = []
+        self.reopen = []
+
+    @property
+    def is_empty( self )->bool:
+        return len(self.runtime) == 0 and len(self.reopen) == 0
+
+    @property
+    def needs_reopen( self )->bool:
+        return len(self.reopen) != 0
+
+    @property
+    def paths( self )->List[tuple]:
+        return [ change[0] for change in self.runtime+self.reopen ]
+
+    def __repr__( self ):
+        lines = [f"ConfigDiff: {len(self.runtime)} runtime, {len(self.reopen)} reopen"]
+        for label, changes in [("runtime", self.runtime), ("reopen", self.reopen)]:
+            for path, old, new in changes:
+                lines.append(f"  [{label}] {'/'.join(str(p) for p in path)}: {_short(old)} -> {_short(new)}")
+        return "\n".join(lines)
+
+def _short( val )->str:
+    text = repr(val)
+    return text if len(text) < 40 else text[:37]+"..."
+
+def _as_dict( config )->dict:
+    if isinstance(config, dict):
+        return config
+    # Configuration object
+    return config.get_config()
+
+def _leaf_equal( old, new )->bool:
+    if old is new:
+        return True
+    if isinstance(old, (list, tuple)) and isinstance(new, (list, tuple)):
+        # Ports are tuple in Configuration but list after json
+        return len(old) == len(new) and all( _leaf_equal(o, n) for o, n in zip(old, new) )
+    return old == new
+
+def _compare( old, new, path:tuple, changes:list ):
+    if old is new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old.keys() | new.keys():
+            if key not in old or key not in new:
+                changes.append( (path+(key,), old.get(key), new.get(key)) )
+            else:
+                _compare( old[key], new[key], path+(key,), changes )
+    elif path[:1] == ("mixers",) and len(path) == 2 and isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        # IF channels in a mixer
+        for idx, (old_ch, new_ch) in enumerate(zip(old, new)):
+            _compare( old_ch, new_ch, path+(idx,), changes )
+    elif not _leaf_equal(old, new):
+        changes.append( (path, old, new) )
+
+def _is_runtime( path:tuple )->bool:
+    match path:
+        case ("elements", _, "intermediate_frequency"):
+            return True
+        case ("controllers", _, "analog_outputs", _, "offset"):
+            return True
+        case ("controllers", _, "analog_inputs", _, "offset"):
+            return True
+        case ("mixers", _, int(), "correction"):
+            # Only for the (IF, LO) pair the QM is opened with, see `_sort_mixer_changes`
+            return True
+        case _:
+            return False
+
+def diff_config( old, new )->ConfigDiff:
+    """
+    Compare two configs, both can be `Configuration` or the dict from `get_config()`.\n
+    Dict fragments shared by both configs (unchanged components of the same Configuration) are skipped without comparing.
+    """
+    old_dict = _as_dict(old)
+    new_dict = _as_dict(new)
+    changes = []
+    _compare( old_dict, new_dict, (), changes )
+
+    diff = ConfigDiff()
+    for change in changes:
+        if _is_runtime(change[0]):
+            diff.runtime.append(change)
+        else:
+            diff.reopen.append(change)
+
+    # The runtime changes on controllers ports need an element to reach the port
+    for change in list(diff.runtime):
+        if change[0][0] == "controllers" and _find_port_user(new_dict, change[0]) is None:
+            diff.runtime.remove(change)
+            diff.reopen.append(change)
+    _sort_mixer_changes( diff, new_dict )
+    return diff
+
+def _sort_mixer_changes( diff:ConfigDiff, new_dict:dict ):
+    """
+    The opened QM only knows the (IF, LO) pairs of the mixers in its config.\n
+    A mixer IF change following the runtime IF change of its element is dropped, the element change covers it,
+    other mixer IF changes need a new QM, so does a correction change on a channel whose IF changed.
+    """
+    element_IFs = {}
+    for path, _, new in diff.runtime:
+        if path[0] == "elements":
+            element_IFs[path[1]] = new
+
+    moved_IF = set()
+    for change in [ c for c in diff.reopen if c[0][0] == "mixers" and c[0][-1] == "intermediate_frequency" ]:
+        path, _, new = change
+        channel = new_dict["mixers"][path[1]][path[2]]
+        for e_name, e_IF in element_IFs.items():
+            mix_inputs = new_dict["elements"][e_name].get("mixInputs", {})
+            if mix_inputs.get("mixer") == path[1] and mix_inputs.get("lo_frequency") == channel["lo_frequency"] and e_IF == new:
+                diff.reopen.remove(change)
+                break
+        moved_IF.add( path[:3] )
+
+    for change in list(diff.runtime):
+        if change[0][0] == "mixers" and change[0][:3] in moved_IF:
+            diff.runtime.remove(change)
+            diff.reopen.append(change)
+
+def _find_port_user( config:dict, path:tuple )->Union[Tuple[str,str], None]:
+    """
+    path: ("controllers", con_name, "analog_outputs" or "analog_inputs", port, "offset")\n
+    return (element name, input or output name in element) for the element connected to the port
+    """
+    _, con_name, port_type, port, _ = path
+    port = (con_name, int(port))
+    for e_name, e_info in config["elements"].items():
+        if port_type == "analog_outputs":
+            if "singleInput" in e_info and _leaf_equal(e_info["singleInput"]["port"], port):
+                return e_name, "single"
+            if "mixInputs" in e_info:
+                for iq in ["I","Q"]:
+                    if _leaf_equal(e_info["mixInputs"][iq], port):
+                        return e_name, iq
+        else:
+            for out_name, out_port in e_info.get("outputs", {}).items():
+                if _leaf_equal(out_port, port):
+                    return e_name, out_name
+    return None
+
+def apply_runtime_changes( qm, diff:ConfigDiff, new_config )->int:
+    """
+    Push the runtime changes in diff to the opened QuantumMachine.\n
+    new_config: the config diff compared to, `Configuration` or dict.\n
+    return the number of applied changes.
+    """
+    if diff.needs_reopen:
+        raise ValueError(f"Can't apply the changes without a new QM:\n{diff}")
+    new_dict = _as_dict(new_config)
+    for path, old, new in diff.runtime:
+        match path:
+            case ("elements", e_name, "intermediate_frequency"):
+                qm.set_intermediate_frequency( e_name, new )
+            case ("controllers", _, "analog_outputs", _, "offset"):
+                e_name, e_input = _find_port_user( new_dict, path )
+                qm.set_output_dc_offset_by_element( e_name, e_input, new )
+            case ("controllers", _, "analog_inputs", _, "offset"):
+                e_name, e_output = _find_port_user( new_dict, path )
+                qm.set_input_dc_offset_by_element( e_name, e_output, new )
+            case ("mixers", mixer_name, idx, _):
+                # Register the correction matrix for the (IF, LO) pair of this channel
+                channel = new_dict["mixers"][mixer_name][idx]
+                qm.set_mixer_correction( mixer_name, channel["intermediate_frequency"], channel["lo_frequency"], tuple(channel["correction"]) )
+    return len(diff.runtime)
@@ -0,0 +1,157 @@
+from typing import Dict, Tuple
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Parts of the config dict with named components, hashed and written component by component
+_component_kinds = ["controllers","elements","pulses","waveforms","digital_waveforms","integration_weights","mixers"]
+
+def _json_default( obj ):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _str_keys( obj ):
+    """ Keys as str like JSON, for sorting the dicts with int and str keys together """
+    if isinstance(obj, dict):
+        return { str(k): _str_keys(v) for k, v in obj.items() }
+    if isinstance(obj, (list, tuple)):
+        return [ _str_keys(v) for v in obj ]
+    return obj
+
+def canonical_bytes( obj )->bytes:
+    """
+    Canonical JSON of obj: sorted keys, no spaces, tuples as lists, numpy values as python values.\n
+    Equal content gives equal bytes whatever the order of the dict keys.
+    """
+    try:
+        text = json.dumps(obj, sort_keys=True, separators=(",",":"), default=_json_default)
+    except TypeError:
+        # dict with both int and str keys can't be sorted
+        text = json.dumps(_str_keys(obj), sort_keys=True, separators=(",",":"), default=_json_default)
+    return text.encode()
+
+def _digest( *parts:bytes )->str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+class ConfigHasher:
+    def __init__( self ):
+        """
+        Order-independent hash of a config dict, built as a Merkle tree:\n
+        component digest = sha256(kind, name, canonical JSON of the component)\n
+        kind digest = sha256 of the (name, digest) pairs sorted by name\n
+        config hash = sha256 of the version and the kind digests\n
+        The digest and JSON text of every component are kept with the dict they were computed from,
+        a component whose dict is the same object as last time (unchanged `CachedComponent`) is not serialized again.
+        """
+        # (kind, name) -> (component dict, digest)
+        self._digests = {}
+        # (kind, name, indent) -> (component dict, JSON text)
+        self._texts = {}
+        # path -> (config hash, indent, size, mtime_ns) of the last export
+        self._exports = {}
+
+    def __getstate__( self )->dict:
+        # The caches are rebuilt by the next hash
+        return {}
+
+    def __setstate__( self, state:dict ):
+        self.__init__()
+
+    def component_digest( self, kind:str, name:str, component:dict )->str:
+        cached = self._digests.get((kind, name))
+        if cached is not None and cached[0] is component:
+            return cached[1]
+        digest = _digest( kind.encode(), str(name).encode(), canonical_bytes(component) )
+        self._digests[(kind, name)] = (component, digest)
+        return digest
+
+    def section_hashes( self, config_dict:dict )->Dict[str,str]:
+        """ {kind: digest} of the parts of config_dict, the other keys ex. "version" are hashed by value """
+        hashes = {}
+        for kind, content in config_dict.items():
+            if kind in _component_kinds:
+                pairs = sorted( f"{name}\0{self.component_digest(kind, name, component)}" for name, component in content.items() )
+                hashes[kind] = _digest( kind.encode(), "\n".join(pairs).encode() )
+            else:
+                hashes[kind] = _digest( kind.encode(), canonical_bytes(content) )
+        # Forget the components removed from config
+        if len(self._digests) > sum( len(config_dict.get(kind, {})) for kind in _component_kinds ):
+            for key in [ k for k in self._digests if k[1] not in config_dict.get(k[0], {}) ]:
+                del self._digests[key]
+        return hashes
+
+    def config_hash( self, config_dict:dict )->str:
+        return _digest( canonical_bytes(sorted(self.section_hashes(config_dict).items())) )
+
+    def _component_text( self, kind:str, name:str, component:dict, indent:int )->str:
+        key = (kind, name, indent)
+        cached = self._texts.get(key)
+        if cached is not None and cached[0] is component:
+            return cached[1]
+        text = json.dumps(component, indent=indent, default=_json_default)
+        if indent is not None:
+            # nested two levels in the config dict
+            text = text.replace("\n", "\n" +" "*(2*indent))
+        self._texts[key] = (component, text)
+        return text
+
+    def export_json( self, config_dict:dict, path, indent:int=2 )->Tuple[str, bool]:
+        """
+        Write config_dict as JSON to path, the same text as `json.dump(config_dict, f, indent=indent)`.\n
+        Unchanged components reuse their JSON text from the last export, and the file isn't written again
+        if it still is the file of the last export with the same config hash.\n
+        return (config hash, written)
+        """
+        config_hash = self.config_hash(config_dict)
+        path = str(path)
+        last = self._exports.get(path)
+        if last is not None and last[:2] == (config_hash, indent) and os.path.exists(path):
+            stat = os.stat(path)
+            if (stat.st_size, stat.st_mtime_ns) == last[2:]:
+                return config_hash, False
+
+        newline = "" if indent is None else "\n"
+        pad = "" if indent is None else " "*indent
+        item_sep = ", " if indent is None else ","
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write("{")
+            for i, (kind, content) in enumerate(config_dict.items()):
+                f.write(("" if i == 0 else item_sep) +newline +pad +json.dumps(kind) +": ")
+                if kind not in _component_kinds:
+                    f.write( json.dumps(content, indent=indent, default=_json_default).replace("\n", "\n"+pad) if indent is not None else json.dumps(content, default=_json_default) )
+                    continue
+                if len(content) == 0:
+                    f.write("{}")
+                    continue
+                f.write("{")
+                for j, (name, component) in enumerate(content.items()):
+                    f.write(("" if j == 0 else item_sep) +newline +pad*2 +json.dumps(str(name)) +": ")
+                    f.write(self._component_text(kind, name, component, indent))
+                f.write(newline +pad +"}")
+            f.write(newline +"}" if len(config_dict) else "}")
+        os.replace(tmp_path, path)
+
+        # Forget the texts of the components removed from config
+        if len(self._texts) > sum( len(config_dict.get(kind, {})) for kind in _component_kinds ):
+            for key in [ k for k in self._texts if k[1] not in config_dict.get(k[0], {}) or k[2] != indent ]:
+                del self._texts[key]
+        stat = os.stat(path)
+        self._exports[path] = (config_hash, indent, stat.st_size, stat.st_mtime_ns)
+        return config_hash, True
+
+def config_hash( config_dict:dict )->str:
+    """
+    Canonical hash of a config dict, the same for configs with the same content in any key order.\n
+    Equal to `Configuration.config_hash()` for the dict from its `get_config()`.
+    """
+    return ConfigHasher().config_hash(config_dict)
@@ -5,6 +5,9 @@ from config_component.waveform import Waveform, waveform_read_dict
 from config_component.digital_waveform import DigitalWaveform, digitalWaveform_read_dict
 from config_component.integration_weight import IntegrationWeights, integrationWeight_read_dict
 from config_component.mixer import Mixer, mixer_read_list
+from config_component.waveform_interning import WaveformInterner, intern_waveforms
+from config_component.reference_index import ReferenceIndex, validate_config
+from config_component.config_hash import ConfigHasher
 from typing import Dict
 
 
@@ -19,6 +22,10 @@ class Configuration():
         self._digital_waveforms = { "ON": digitalWaveform_read_dict("ON", {"samples": [(1, 0)]}) }
         self._integration_weights = {}
         self._mixers = {}
+        # Share one waveform entry for the waveforms with identical samples
+        self.waveform_interning = True
+        self._waveform_interner = WaveformInterner()
+        self._hasher = ConfigHasher()
 
         # Build Zero waveform
         waveform = Waveform("zero_wf")
@@ -26,7 +33,23 @@ class Configuration():
         waveform.sample = 0
         self._waveforms["zero_wf"] = waveform
     def get_config( self ) -> dict :
+        """
+        Return the config dict for QM.\n
+        Each component keeps the dict fragment it built last time and only rebuilds it after being changed,
+        so repeated calls in a calibration loop only pay for the components which were updated.\n
+        The fragments are shared with the component caches, don't modify the returned dict in place.\n
+        If `waveform_interning` is True, waveforms with identical content are merged into one entry,
+        see `waveform_interning_report()`.
+        """
+        config_dict = self._component_dict()
+
+        if getattr(self, "waveform_interning", True):
+            config_dict = intern_waveforms( config_dict, self._get_waveform_interner() )
+
+        return config_dict
 
+    def _component_dict( self )->dict:
+        """ Config dict of the components as they are, before waveform interning. """
         config_dict = {"version": self.version}
         
         components = ["controllers","elements","pulses","waveforms","digital_waveforms","integration_weights","mixers"]
@@ -40,6 +63,89 @@ class Configuration():
 
         return config_dict
 
+    def index_references( self )->ReferenceIndex:
+        """
+        Build the reference index of the components, keep it in `reference_index`.\n
+        ex. config.index_references().users_of("waveforms", "zero_wf")\n
+        Call again after elements, pulses or names are changed.
+        """
+        self.reference_index = ReferenceIndex( self._component_dict() )
+        return self.reference_index
+
+    def collect_garbage( self )->dict:
+        """
+        Remove the pulses not used by any element, then the waveforms, integration weights
+        and digital waveforms not used by any pulse. "zero_wf" and "ON" are always kept.\n
+        return {kind: [removed names]}
+        """
+        index = self.index_references()
+        removed = {"pulses":index.unreferenced("pulses")}
+        for name in removed["pulses"]:
+            del self._pulses[name]
+
+        index = self.index_references()
+        keep = {"waveforms":["zero_wf"], "digital_waveforms":["ON"], "integration_weights":[]}
+        for kind, components in [("waveforms",self._waveforms), ("integration_weights",self._integration_weights), ("digital_waveforms",self._digital_waveforms)]:
+            removed[kind] = [ name for name in index.unreferenced(kind) if name not in keep[kind] ]
+            for name in removed[kind]:
+                del components[name]
+
+        self.index_references()
+        return removed
+
+    def validate( self, raise_error:bool=True )->list:
+        """
+        Check the configuration locally before sending it to QOP,
+        dangling references, ports, mixer (IF, LO) pairs, pulse, waveform and integration weight lengths.\n
+        raise_error: raise ValueError with all the problems, otherwise return the list of problems.
+        """
+        config_dict = self._component_dict()
+        self.reference_index = ReferenceIndex( config_dict )
+        problems = validate_config( config_dict, self.reference_index )
+        if raise_error and len(problems) != 0:
+            raise ValueError("Configuration is invalid:\n"+"\n".join(problems))
+        return problems
+
+    def _get_waveform_interner( self )->WaveformInterner:
+        # Configuration pickled before interning existed doesn't have it
+        if not hasattr(self, "_waveform_interner"):
+            self._waveform_interner = WaveformInterner()
+        return self._waveform_interner
+
+    def waveform_interning_report( self )->dict:
+        """
+        Return the result of waveform interning in the last `get_config()`,\n
+        keys: "waveforms", "unique", "shared", "bytes_saved".
+        """
+        return self._get_waveform_interner().report
+
+    def _get_hasher( self )->ConfigHasher:
+        # Configuration pickled before hashing existed doesn't have it
+        if not hasattr(self, "_hasher"):
+            self._hasher = ConfigHasher()
+        return self._hasher
+
+    def config_hash( self )->str:
+        """
+        Canonical hash of `get_config()`, same content gives the same hash whatever the order of the components.\n
+        Only the components changed after the last call are serialized again, use it as the key of caches
+        for opened QMs, compiled programs or analysis results.
+        """
+        return self._get_hasher().config_hash( self.get_config() )
+
+    def section_hashes( self )->Dict[str,str]:
+        """ {part of config ex. "elements": digest}, tells which parts differ between two configs """
+        return self._get_hasher().section_hashes( self.get_config() )
+
+    def export_json( self, path, indent:int=2 )->str:
+        """
+        Write `get_config()` as JSON to path, the same text as `json.dump(config, f, indent=indent)`.\n
+        The JSON of unchanged components is reused and the file isn't written again if the config hash is the same as the last export.\n
+        return the config hash.
+        """
+        config_hash, _ = self._get_hasher().export_json( self.get_config(), path, indent )
+        return config_hash
+
     def update_controller( self, controller:Controller):
         """
         The controller will be covered by new one.
@@ -83,15 +189,12 @@ class Configuration():
 
 # ================== other functions =======================
     def export_config( self, path ):
-        import pickle
-
-        # define dictionary
-        # create a binary pickle file 
-        f = open(path,"wb")
-        # write the python object ) to pickle file
-        pickle.dump(self ,f)
-        # close file
-        f.close()
+        """
+        Save this configuration to path as the versioned container in `persistence`.\n
+        The pickle files saved before are still loaded by `import_config`.
+        """
+        from config_component.persistence import save_configuration
+        save_configuration(self, path)
 
 
 
@@ -131,7 +234,14 @@ class Configuration():
     #     pass
 
 
-def import_config( path )->Configuration:
+def import_config( path, qubits:list=None )->Configuration:
+    """
+    Load the configuration saved by `export_config`, both container and pickle file are accepted.\n
+    qubits: ["q0","q3"] to load only these qubits from container, None for all. Pickle file is always loaded fully.
+    """
+    from config_component.persistence import is_container, load_configuration
+    if is_container(path):
+        return load_configuration(path, qubits)
     import pickle
     # Read dictionary pkl file
     with open(path, 'rb') as fp:
@@ -161,7 +271,16 @@ def configuration_read_dict( config:dict )->Configuration:
 
     for name, infos in config["mixers"].items():
         new_config._mixers[name] = mixer_read_list( name, infos )  
-        # new_config.controllers[con_name]
+
+    # Key the mixer channels by the elements using them
+    for name, element in new_config._elements.items():
+        if element._input_type == "mixInputs" and element.input_map.mixer in new_config._mixers:
+            try:
+                new_config._mixers[element.input_map.mixer].channel_of( name, element.input_map.lo_frequency, element.intermediate_frequency )
+            except KeyError:
+                # validate() reports the element without mixer channel
+                pass
+
     return new_config
 
 def get_element_template( mode:str )->dict:
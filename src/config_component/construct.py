@@ -3,10 +3,18 @@ from config_component.element import Element, element_read_dict
 from config_component.pulse import Pulse, pulse_read_dict
 from config_component.waveform import Waveform, waveform_read_dict
 from config_component.digital_waveform import DigitalWaveform, digitalWaveform_read_dict
-from config_component.integration_weight import IntegrationWeights, integrationWeight_read_dict
+from config_component.integration_weight import IntegrationWeights, integrationWeight_read_dict, compress_integration_weights, fit_segments_length, DEFAULT_MAX_SNR_LOSS
 from config_component.mixer import Mixer, mixer_read_list
+from config_component.gate_set import stored_gates
 from config_component.configuration import Configuration
 
+def _add_mixer_channel( config:Configuration, element:Element ):
+    """ Add the (LO, IF) channel of element to its mixer, the mixer is created if it doesn't exist. """
+    mixer_name = element.input_map.mixer
+    if mixer_name not in config._mixers:
+        config._mixers[mixer_name] = Mixer(mixer_name)
+    config._mixers[mixer_name].add_channel( element._name, element.input_map.lo_frequency, element.intermediate_frequency )
+
 def create_roChannel( config:Configuration, name, roInfo:dict, wireInfo:dict ):
     """
     element structure \n
@@ -34,20 +42,8 @@ def create_roChannel( config:Configuration, name, roInfo:dict, wireInfo:dict ):
     pulse.waveforms.Q = "zero_wf"
     pulse._digital_marker = "ON"
     
-    # Build Mixer TODO check previous mixer status for other qubit, final one will cover others
-    mixer_name = element.input_map.mixer
-    mixer = Mixer(mixer_name)
-    from config_component.mixer import IFChannel
-    iFChannel = IFChannel()
-    iFChannel._lo_frequency = element.input_map.lo_frequency
-    iFChannel._intermediate_frequency = element.intermediate_frequency
-    iFChannel._correction = (1, 0, 0, 1)
-    
-    if mixer_name in config._mixers.keys():
-        config._mixers[mixer_name]._iFChannels.append( iFChannel )
-    else: # the mixer not exist yet
-        mixer._iFChannels.append( iFChannel )
-        config._mixers[mixer_name] = mixer
+    # Build Mixer, the readout elements on the same line share it
+    _add_mixer_channel( config, element )
 
     # Build waveform
     waveform = Waveform(waveform_name)
@@ -66,10 +62,33 @@ def create_roChannel( config:Configuration, name, roInfo:dict, wireInfo:dict ):
         pulse.integration_weights[f"rotated_{weight_name}"] = complete_integ_name           
         config._integration_weights[complete_integ_name] = integration_weight_obj
 
+    optimal_weights = roInfo["RO_weights"].get("optimal", {}) if "RO_weights" in roInfo else {}
+    if optimal_weights != {}:
+        set_optimal_weights( config, name, pulse, optimal_weights )
+
     config._elements[name] = element
     config._pulses[pulse_name] = pulse
     config._waveforms[waveform_name] = waveform
 
+def set_optimal_weights( config:Configuration, name:str, pulse:Pulse, optimal_weights:dict, max_snr_loss:float=DEFAULT_MAX_SNR_LOSS ):
+    """
+    name: "q2_ro"\n
+    optimal_weights: from `ChannelInfo.optimal_ROweights_generator()`, {"cos":{"cosine","sine"}, "sin":..., "minus_sin":...}\n
+    The weights are fitted to the pulse length, cut or padded with zero, compressed within max_snr_loss
+    and added as "optimal_cos", "optimal_sin" and "optimal_minus_sin" of the pulse.
+    """
+    integ_name = f"{name}_optimal_weight"
+    for weight_name, weights in optimal_weights.items():
+        complete_integ_name = f"{integ_name}_{weight_name}"
+        cosine = fit_segments_length( weights["cosine"], pulse.length )
+        sine = fit_segments_length( weights["sine"], pulse.length )
+        cosine, sine, _ = compress_integration_weights( cosine, sine, max_snr_loss, report=(weight_name == "cos") )
+        if complete_integ_name not in config._integration_weights:
+            config._integration_weights[complete_integ_name] = IntegrationWeights(complete_integ_name)
+        config._integration_weights[complete_integ_name].cosine = cosine
+        config._integration_weights[complete_integ_name].sine = sine
+        pulse.integration_weights[f"optimal_{weight_name}"] = complete_integ_name
+
 def create_zChannel(config:Configuration, name:str, zInfo:dict, wireInfo:dict):
     """
         create the z elements for target_q, includes elements, pulses, waveforms.
@@ -98,25 +117,28 @@ def create_zChannel(config:Configuration, name:str, zInfo:dict, wireInfo:dict):
     config._pulses[pulse_name] = pulse
     config._waveforms[waveform_name] = waveform
 
-def create_xyChannel(config:Configuration, name, xyInfo:dict, wireInfo:dict):
+def create_xyChannel(config:Configuration, name, xyInfo:dict, wireInfo:dict, gate_set:str="full"):
     """
     name : "q2_xy"..\n
     element ex:\n
     \n
 
     xyInfo is from Circuit_info().xyInfo\n
-    Native gates ["x180","y180","x90","-x90","y90","-y90"]
+    Native gates ["x180","y180","x90","-x90","y90","-y90"]\n
+    gate_set: "full" stores every native gate, "two_base" and "virtual_z" only store x180 and x90,
+    the other gates are played by `exp.native_gate_macros.play_gate` with amp() matrices or in a rotated frame. See `config_component.gate_set`.
     """
     pulse_name = f"{name}_const_pulse"
     waveform_name = f"{name}_const_wf"
 
-    default_native_gates = [ "x180","-x180","y180","x90","-x90","y90","-y90" ]
+    default_native_gates = stored_gates(gate_set)
     element = Element(name, "mixInputs")
     element.input_map.I = wireInfo["xy_I"]
     element.input_map.Q = wireInfo["xy_Q"]
     element.input_map.lo_frequency = xyInfo["qubit_LO"]
     element.input_map.mixer = wireInfo["xy_mixer"]
     element.intermediate_frequency = xyInfo["qubit_IF"]
+    element.gate_set = gate_set
 
     element.operations = {
         "const": pulse_name,
@@ -124,15 +146,7 @@ def create_xyChannel(config:Configuration, name, xyInfo:dict, wireInfo:dict):
         
 
     # Create the mixer info for control
-    mixer_name = element.input_map.mixer
-    mixer = Mixer(mixer_name)
-    from config_component.mixer import IFChannel
-    iFChannel = IFChannel()
-    iFChannel.intermediate_frequency = element.intermediate_frequency
-    iFChannel.lo_frequency = element.input_map.lo_frequency
-    iFChannel.correction= (1, 0, 0, 1)
-    mixer.iFChannels.append(iFChannel)
-    config._mixers[mixer_name] = mixer
+    _add_mixer_channel( config, element )
 
     # create corresponding waveform name in pulses dict, create waveform list in waveforms dict
     from config_component.envelope_builder import EnvelopeBuilder
@@ -149,6 +163,8 @@ def create_xyChannel(config:Configuration, name, xyInfo:dict, wireInfo:dict):
     pulse.waveforms.Q = "zero_wf"
     config._pulses[pulse_name] = pulse
 
+    # All native gates are derived from one DRAG envelope
+    gate_wfs = wave_maker.build_native_gates()
     for gate_name in default_native_gates:
 
         pulse_name = f"{name}_{gate_name}_pulse"
@@ -164,23 +180,14 @@ def create_xyChannel(config:Configuration, name, xyInfo:dict, wireInfo:dict):
 
         config._pulses[pulse_name] = pulse
 
-        match gate_name:
-            case "x180": a = "x"
-            case "-x180": a = "-x"
-            case "y180": a = "y"
-            case "x90": a = "x/2"
-            case "-x90": a = "-x/2"
-            case "y90": a = "y/2"
-            case "-y90": a = "-y/2"
-            case _: a = None
-        # Create waveform list, if spec is updated it also need to be updated
-        wf = wave_maker.build_XYwaveform(axis=a)
+        # Create waveform array, if spec is updated it also need to be updated
+        wf = gate_wfs[gate_name]
         for waveform_basis in ["I","Q"]:
             ''' waveform_basis is "I" or "Q" '''
             new_wf_name = f"{waveform_name}_{waveform_basis}"
             waveform = Waveform(new_wf_name)
             waveform.type = "arbitrary"
-            waveform.sample = wf[waveform_basis].tolist()
+            waveform.sample = wf[waveform_basis]
             config._waveforms[new_wf_name] = waveform
     
     config._elements[name] = element
@@ -195,16 +202,34 @@ def create_qubit( config:Configuration, name:str, roInfo:dict, xyInfo:dict, wire
     keys
     "pi_amp","pi_len","qubit_LO","qubit_IF","drag_coef","anharmonicity","AC_stark_detuning","waveform_func"
     
+    kwargs: gate_set="two_base" or "virtual_z" for the native gates stored in config, see `create_xyChannel`.
     """        
     # Build RO
     create_roChannel( config, f"{name}_ro", roInfo[name], wireInfo[name])
 
     # Build XY
-    create_xyChannel( config, f"{name}_xy", xyInfo[name], wireInfo[name])
+    create_xyChannel( config, f"{name}_xy", xyInfo[name], wireInfo[name], kwargs.get("gate_set", "full"))
 
     # Build Z line
     create_zChannel( config, f"{name}_z", zInfo[name], wireInfo[name] )
 
+def create_qubits( config:Configuration, spec, qubits:list=None, gate_set:str="full" ):
+    """
+    Build RO, XY and Z channels for many qubits in one pass.\n
+    spec: ChannelInfo, its infos are copied once for all the qubits instead of once per qubit.\n
+    qubits: ["q0","q1"...], default for all the registered qubits in spec.\n
+    gate_set: native gates stored for the XY elements, see `create_xyChannel`.
+    """
+    ro_infos, xy_infos, wire_infos, z_infos = [ spec.get_spec_forConfig(k) for k in ["ro","xy","wire","z"] ]
+    if qubits is None:
+        qubits = ro_infos["registered"]
+
+    for name in qubits:
+        create_roChannel( config, f"{name}_ro", ro_infos[name], wire_infos[name] )
+        create_xyChannel( config, f"{name}_xy", xy_infos[name], wire_infos[name], gate_set )
+        create_zChannel( config, f"{name}_z", z_infos[name], wire_infos[name] )
+    return config
+
 # Control related shows below
 
 
@@ -1,6 +1,72 @@
 from typing import Dict
+from config_component.cached_component import CachedComponent, Field, build_serializer
 
-class Analog_output:
+# Limits of the OPX+ output filters (QOP 2.x)
+MAX_FEEDFORWARD_TAPS = 40
+MAX_FEEDBACK_TAPS = 2
+# feedforward taps in (-2, 2), feedback taps in (-1, 1)
+FEEDFORWARD_TAP_LIMIT = 2
+FEEDBACK_TAP_LIMIT = 1
+
+def _checked_taps( taps, kind:str )->list:
+    """ Taps as a list of float, raise ValueError if they are out of the hardware limits """
+    max_num, limit = (MAX_FEEDFORWARD_TAPS, FEEDFORWARD_TAP_LIMIT) if kind == "feedforward" else (MAX_FEEDBACK_TAPS, FEEDBACK_TAP_LIMIT)
+    taps = [ float(tap) for tap in taps ]
+    if len(taps) > max_num:
+        raise ValueError(f"{len(taps)} {kind} taps are given, at most {max_num} taps are supported!")
+    for tap in taps:
+        if not abs(tap) < limit:
+            raise ValueError(f"{kind} tap {tap} is out of the range (-{limit}, {limit})!")
+    return taps
+
+class Filter( CachedComponent ):
+    __slots__ = ("_feedforward", "_feedback")
+
+    def __init__( self, feedforward:list=[], feedback:list=[] ):
+        """
+        The filter of an analog output, the predistortion applied by the OPX before the output.\n
+        feedforward: FIR taps, at most 40 taps in (-2, 2)\n
+        feedback: IIR taps, at most 2 taps in (-1, 1), with one tap y[n] = sum_k feedforward[k]*x[n-k] + feedback[0]*y[n-1]\n
+        An empty filter gives {} in the config.
+        """
+        self.feedforward = feedforward
+        self.feedback = feedback
+
+    @property
+    def feedforward( self )->list:
+        self.mark_dirty()
+        return self._feedforward
+    @feedforward.setter
+    def feedforward( self, taps:list ):
+        self._feedforward = _checked_taps(taps, "feedforward")
+
+    @property
+    def feedback( self )->list:
+        self.mark_dirty()
+        return self._feedback
+    @feedback.setter
+    def feedback( self, taps:list ):
+        self._feedback = _checked_taps(taps, "feedback")
+
+    def clear( self ):
+        """ Remove all the taps, no predistortion """
+        self.feedforward = []
+        self.feedback = []
+
+    _build_dict = build_serializer( (
+        Field("feedforward", "_feedforward", "not_empty"),
+        Field("feedback", "_feedback", "not_empty"),
+    ) )
+
+def filter_read_dict( infos:dict )->Filter:
+    """
+    Input dictionary {"feedforward":[...], "feedback":[...]} and output Filter object
+    """
+    return Filter( infos.get("feedforward", []), infos.get("feedback", []) )
+
+class Analog_output( CachedComponent ):
+    __slots__ = ("_channel_index", "offset", "_crosstalk", "_filter")
+    _legacy_attrs = {"crosstalk":"_crosstalk", "filter":"_filter"}
 
     def __init__( self, channel_index:int ):
         """
@@ -8,39 +74,60 @@ class Analog_output:
         """
         self._channel_index = channel_index
         self.offset = 0.0
-        self.crosstalk = {}
-        self.filter = {} # TODO filter
+        self._crosstalk = {}
+        self._filter = Filter()
 
-    def to_dict( self ):
-        return {
-            self._channel_index:{
-                "offset":self.offset,
-                "crosstalk":self.crosstalk,
-                "filter":{} # TODO filter
-            }
-        }
-class Filter:
-    """ TODO """
-    def __init__( self ):
-        self.feedforward = []
-        self.feedback = []
+    def __setstate__( self, state:dict ):
+        super().__setstate__(state)
+        # Pickled before Filter existed, the filter was a dict
+        if isinstance(getattr(self, "_filter", None), dict) or not hasattr(self, "_filter"):
+            object.__setattr__(self, "_filter", filter_read_dict(getattr(self, "_filter", {})))
+
+    @property
+    def crosstalk( self )->dict:
+        self.mark_dirty()
+        return self._crosstalk
+    @crosstalk.setter
+    def crosstalk( self, val:dict ):
+        self._crosstalk = val
+
+    @property
+    def filter( self )->Filter:
+        return self._filter
+    @filter.setter
+    def filter( self, val:Filter ):
+        """ Filter object or dict {"feedforward":[...], "feedback":[...]} """
+        if isinstance(val, dict):
+            val = filter_read_dict(val)
+        self._filter = val
+
+    def _sub_components( self )->list:
+        return [self._filter]
 
+    _build_dict = build_serializer( (
+        Field("offset", "offset"),
+        Field("crosstalk", "_crosstalk"),
+        Field("filter", "_filter", "component"),
+    ), key_attr="_channel_index" )
 
-class Controller:
+
+class Controller( CachedComponent ):
+    __slots__ = ("_name", "_analog_outputs", "_digital_outputs", "_analog_inputs")
+    _legacy_attrs = {"digital_outputs":"_digital_outputs", "analog_inputs":"_analog_inputs"}
     def __init__(self, name:str ):
         """
         The controller part of configuration
         """
         self._name = name
         self._analog_outputs = {}
-        self.digital_outputs =  {  # TODO
+        self._digital_outputs =  {  # TODO
             1: {},
             3: {},
             5: {},
             7: {},
             10: {},
         }
-        self.analog_inputs = {  # TODO
+        self._analog_inputs = {  # TODO
             1: {"offset": 0, "gain_db": 0},  # I from down-conversion
             2: {"offset": 0, "gain_db": 0},  # Q from down-conversion
         } 
@@ -52,22 +139,43 @@ class Controller:
     @property
     def analog_outputs( self )->Dict[int,Analog_output]:
         """ Analog output on hardware"""
+        self.mark_dirty()
         return self._analog_outputs
     @analog_outputs.setter
     def analog_outputs( self, val:Analog_output ):
+        self.mark_dirty()
         self._analog_outputs[val._channel_index] = val
-    
-    def to_dict( self ):
+
+    @property
+    def digital_outputs( self )->dict:
+        self.mark_dirty()
+        return self._digital_outputs
+    @digital_outputs.setter
+    def digital_outputs( self, val:dict ):
+        self._digital_outputs = val
+
+    @property
+    def analog_inputs( self )->dict:
+        self.mark_dirty()
+        return self._analog_inputs
+    @analog_inputs.setter
+    def analog_inputs( self, val:dict ):
+        self._analog_inputs = val
+
+    def _sub_components( self )->list:
+        return list(self._analog_outputs.values())
+
+    def _build_dict( self ):
 
         analog_outputs = {}
-        for k, v in self.analog_outputs.items():
+        for k, v in self._analog_outputs.items():
             analog_outputs.update(v.to_dict())
 
         return {
             self._name:{
                 "analog_outputs":analog_outputs,
-                "digital_outputs": self.digital_outputs,
-                "analog_inputs": self.analog_inputs,
+                "digital_outputs": self._digital_outputs,
+                "analog_inputs": self._analog_inputs,
             }
         }
     
@@ -82,9 +190,13 @@ def controller_read_dict( key:str, infos:dict )->Controller:
     """
     new_controller = Controller(key)
     analog_outputs = infos["analog_outputs"]
-    for k, infos in analog_outputs.items():
+    for k, ao_infos in analog_outputs.items():
         channel_index = int(k)
-        new_controller.analog_outputs[channel_index] = analog_output_read_dict( channel_index, infos )
+        new_controller.analog_outputs[channel_index] = analog_output_read_dict( channel_index, ao_infos )
+    if "digital_outputs" in infos:
+        new_controller.digital_outputs = { int(k): v for k, v in infos["digital_outputs"].items() }
+    if "analog_inputs" in infos:
+        new_controller.analog_inputs = { int(k): v for k, v in infos["analog_inputs"].items() }
     return new_controller
 
 def analog_output_read_dict( channel_index:int, infos:dict )->Analog_output:
@@ -93,7 +205,10 @@ def analog_output_read_dict( channel_index:int, infos:dict )->Analog_output:
     """
     analog_output = Analog_output( channel_index )
     analog_output.offset = infos["offset"]
-    # analog_output.filter = infos["filter"]  TODO
+    if "crosstalk" in infos:
+        analog_output.crosstalk = infos["crosstalk"]
+    if "filter" in infos:
+        analog_output.filter = infos["filter"]
     return analog_output
 def controller_read_json( path ):
     pass
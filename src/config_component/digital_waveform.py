@@ -1,6 +1,8 @@
 from typing import List, Tuple
+from config_component.cached_component import CachedComponent, Field, build_serializer
 
-class DigitalWaveform:
+class DigitalWaveform( CachedComponent ):
+    __slots__ = ("_name", "_samples")
     def __init__(self, name:str ):
         """
         The digital_waveform part of configuration
@@ -10,18 +12,13 @@ class DigitalWaveform:
         
     @property
     def samples( self )->List[Tuple[int,int]]:
+        self.mark_dirty()
         return self._samples
  
     
-    def to_dict( self ):
-
-        output_dict = {
-            "samples": self._samples,
-        }        
-            
-        return {
-            self._name:output_dict
-        }
+    _build_dict = build_serializer( (
+        Field("samples", "_samples"),
+    ), key_attr="_name" )
  
 def digitalWaveform_read_dict( name:str, infos:dict )-> DigitalWaveform:
     """
@@ -1,34 +1,35 @@
 from typing import Dict, Union
+from config_component.cached_component import CachedComponent, Field, build_serializer
 
 
-class MixedInputs:
+class MixedInputs( CachedComponent ):
+    __slots__ = ("I", "Q", "lo_frequency", "mixer")
+    _dict_key = "mixInputs"
     def __init__( self ):
         self.I = ()
         self.Q = ()
         self.lo_frequency = ()
         self.mixer = None
-    def to_dict( self ):
-        return {
-            "mixInputs":{
-                "I":self.I,
-                "Q":self.Q,
-                "lo_frequency":self.lo_frequency,
-                "mixer":self.mixer
-            }
-        }
+    _build_dict = build_serializer( (
+        Field("I", "I"),
+        Field("Q", "Q"),
+        Field("lo_frequency", "lo_frequency"),
+        Field("mixer", "mixer"),
+    ), key_attr="_dict_key" )
     
-class SingleInput:
+class SingleInput( CachedComponent ):
+    __slots__ = ("port",)
+    _dict_key = "singleInput"
     def __init__( self ):
         self.port = ()
-    def to_dict( self ):
-        return {
-            "singleInput":{
-                "port":self.port
-            }
-        }
+    _build_dict = build_serializer( (
+        Field("port", "port"),
+    ), key_attr="_dict_key" )
 # class Operation
 
-class Element:
+class Element( CachedComponent ):
+    __slots__ = ("_name", "_input_type", "_operations", "_input_map", "_output_map", "_intermediate_frequency", "_time_of_flight", "_smearing", "_gate_set")
+    _slot_defaults = {"_gate_set":None}
     def __init__(self, name:str, input_type:str="singleInput" ):
         """
         The controller part of configuration
@@ -47,9 +48,11 @@ class Element:
         self._intermediate_frequency = None
         self._time_of_flight = None
         self._smearing = None
+        self._gate_set = None
 
     @property
     def operations( self )->dict:
+        self.mark_dirty()
         return self._operations
     @operations.setter
     def operations( self, val:dict ):
@@ -74,6 +77,17 @@ class Element:
     def time_of_flight( self, val )->int:
         self._time_of_flight  = val
               
+    @property
+    def gate_set( self )->str:
+        """
+        Gate set of an XY element, ex. "virtual_z", see `config_component.gate_set`.\n
+        Recorded when the element is created, not written in the config dict. None for the other elements.
+        """
+        return self._gate_set
+    @gate_set.setter
+    def gate_set( self, val:str ):
+        self._gate_set = val
+
     @property
     def input_map( self )->Union[MixedInputs,SingleInput]:
         """
@@ -88,28 +102,20 @@ class Element:
          
     @property
     def output_map( self )->Union[MixedInputs,SingleInput]:
+        self.mark_dirty()
         return self._output_map 
-          
-    def to_dict( self ):
-
-        output_dict = {
-            "operations":self._operations
-        }
-        output_dict.update( self.input_map.to_dict() )
-        
-        if self._intermediate_frequency != None:
-            output_dict.update( {"intermediate_frequency":self._intermediate_frequency} )
-        if self._time_of_flight != None:
-            output_dict.update( {"time_of_flight":self._time_of_flight} )
-        if self._smearing != None:
-            output_dict.update( {"smearing":self._smearing} )
 
-        if len(self._output_map)!= 0: # TODO fixed output
-            output_dict.update( {"outputs":self._output_map} )
+    def _sub_components( self )->list:
+        return [self._input_map]
 
-        return {
-            self._name:output_dict
-        }
+    _build_dict = build_serializer( (
+        Field("operations", "_operations"),
+        Field("input_map", "_input_map", "merge"),
+        Field("intermediate_frequency", "_intermediate_frequency", "not_none"),
+        Field("time_of_flight", "_time_of_flight", "not_none"),
+        Field("smearing", "_smearing", "not_none"),
+        Field("outputs", "_output_map", "not_empty"), # TODO fixed output
+    ), key_attr="_name" )
     
 def mixedInputs_read_dict( infos:dict )->MixedInputs:
     """
@@ -138,12 +144,14 @@ def element_read_dict( name:str, infos:dict )-> Element:
     keys = infos.keys()
     if "mixInputs" in keys:
         print("Mixed Inputs Element")
+        element._input_type = "mixInputs"
         element._input_map = mixedInputs_read_dict( infos["mixInputs"] )
 
     if "singleInput" in keys:
         element._input_map = singleInput_read_dict( infos["singleInput"] )
 
-    element._operations = infos["operations"]
+    # QM accepts an element without operations
+    element._operations = infos.get("operations", {})
 
     if "outputs" in keys: # TODO fixed output
         element._output_map = infos["outputs"]
@@ -1,8 +1,75 @@
-from numpy import array
+from numpy import array, stack
+from functools import lru_cache
+
+# Native gate name and the corresponding axis for build_XYwaveform
+native_gate_axes = {
+    "x180": "x",
+    "-x180": "-x",
+    "y180": "y",
+    "x90": "x/2",
+    "-x90": "-x/2",
+    "y90": "y/2",
+    "-y90": "-y/2",
+}
+# axis: (amplitude scale is 1 or the 90 scale, sign, rotated to y)
+_axis_transform = {
+    "x":    (False, 1, False),
+    "-x":   (False, -1, False),
+    "y":    (False, 1, True),
+    "x/2":  (True, 1, False),
+    "-x/2": (True, -1, False),
+    "y/2":  (True, 1, True),
+    "-y/2": (True, -1, True),
+}
+
+@lru_cache(maxsize=512)
+def _native_gate_envelopes( func:str, pi_amp:float, pi_len:int, sfactor:float, drag_coef:float, anharmonicity:float, AC_stark_detuning:float, scale_90:float )->dict:
+    """
+    Compute the Gaussian and its derivative once, derive all the axes from them.\n
+    return {axis: (I ndarray, Q ndarray)}, arrays are read-only because they are shared by the cache.
+    """
+    from qualang_tools.config.waveform_tools import drag_gaussian_pulse_waveforms
+    if func.lower() in ['gauss','g','gaussian']:
+        drag_coef = 0
+    base = array( drag_gaussian_pulse_waveforms(pi_amp, pi_len, pi_len/sfactor, drag_coef, anharmonicity, AC_stark_detuning) )
+    # y axis is the x envelope rotated by 90 degree, I = -Q_x, Q = I_x
+    rotated = stack([-base[1], base[0]])
+
+    axes = list(_axis_transform.keys())
+    scales = array([ sign*(0.5*scale_90 if is_half else 1) for is_half, sign, _ in _axis_transform.values() ])
+    is_y = array([ to_y for _, _, to_y in _axis_transform.values() ])
+    all_wf = stack([base, rotated])[is_y.astype(int)] *scales[:,None,None]
+    all_wf.setflags(write=False)
+
+    return { axis: (all_wf[i,0], all_wf[i,1]) for i, axis in enumerate(axes) }
 
 class EnvelopeBuilder:
     def __init__(self,xyInfo:dict):
         self.QsXyInfo = xyInfo
+
+    def _envelope_key( self, sfactor:float=4 )->tuple:
+        func = 'drag' if self.QsXyInfo["waveform_func"] == 0 else self.QsXyInfo["waveform_func"]
+        if func.lower() not in ['drag','dragg','gdrag','gauss','g','gaussian']:
+            raise ValueError("Only surpport Gaussian or DRAG-gaussian waveform!")
+        scale_90 = self.QsXyInfo["pi_ampScale"].get("90", 1)
+        return (
+            func, self.QsXyInfo["pi_amp"], self.QsXyInfo["pi_len"], sfactor, self.QsXyInfo["drag_coef"],
+            self.QsXyInfo["anharmonicity"], self.QsXyInfo["AC_stark_detuning"], scale_90
+        )
+
+    def build_native_gates( self, sfactor:float=4 )->dict:
+        """
+        Create the waveforms of all native gates in one pass.\n
+        return {gate name: {"I":ndarray, "Q":ndarray}}, gate names are in `native_gate_axes`.\n
+        The result is memoized on the pulse parameters, calling again with unchanged xyInfo
+        returns the same (read-only) arrays without any computation.
+        """
+        envelopes = _native_gate_envelopes( *self._envelope_key(sfactor) )
+        gate_wfs = {}
+        for gate_name, axis in native_gate_axes.items():
+            I_wf, Q_wf = envelopes[axis]
+            gate_wfs[gate_name] = {"I":I_wf, "Q":Q_wf}
+        return gate_wfs
     
     def build_XYwaveform(self,axis:str,**kwargs)->dict:
         ''' Create the pulse waveform for XY control for target qubit\n
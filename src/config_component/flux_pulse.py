@@ -0,0 +1,107 @@
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from scipy.special import erf
+
+from config_component.configuration import Configuration
+from config_component.pulse import Pulse
+from config_component.waveform import Waveform
+
+# QM waveforms are at least 16 samples and a multiple of 4 samples long
+_min_samples = 16
+_sample_step = 4
+
+# ================= Shapes =========================
+# shape(t, duration, rise, params) -> envelope with peak 1, t in ns from the start of the pulse
+def _flat_top_gaussian( t, duration:float, rise:float, params:dict ):
+    sigma = rise/params.get("sfactor", 4)
+    rising = np.exp( -(t -rise)**2/(2*sigma**2) )
+    falling = np.exp( -(t -(duration -rise))**2/(2*sigma**2) )
+    return np.where( t < rise, rising, np.where( t > duration -rise, falling, 1. ) )
+
+def _erf( t, duration:float, rise:float, params:dict ):
+    sigma = rise/params.get("sfactor", 4)
+    scale = np.sqrt(2)*sigma
+    return 0.5*( erf((t -rise/2)/scale) -erf((t -(duration -rise/2))/scale) )
+
+def _cosine( t, duration:float, rise:float, params:dict ):
+    rising = 0.5*(1 -np.cos(np.pi*t/rise))
+    falling = 0.5*(1 -np.cos(np.pi*(duration -t)/rise))
+    return np.where( t < rise, rising, np.where( t > duration -rise, falling, 1. ) )
+
+def _slepian( t, duration:float, rise:float, params:dict ):
+    """ Fourier form of Martinis and Geller, PRA 90, 022307 (2014), sum_n lambda_n*(1 -cos(2*pi*n*t/duration)) on the whole pulse """
+    lambdas = params.get("lambdas", (1., 0.))
+    envelope = sum( lam*(1 -np.cos(2*np.pi*(n +1)*t/duration)) for n, lam in enumerate(lambdas) )
+    dense_t = np.linspace(0, duration, 1001)
+    peak = np.max(sum( lam*(1 -np.cos(2*np.pi*(n +1)*dense_t/duration)) for n, lam in enumerate(lambdas) ))
+    return envelope/peak
+
+flux_shapes = {
+    "flat_top_gaussian": _flat_top_gaussian,
+    "erf": _erf,
+    "cosine": _cosine,
+    "slepian": _slepian,
+}
+
+@lru_cache(maxsize=1024)
+def _flux_samples( shape:str, amp:float, duration:float, rise:float, shift:float, params:Tuple[tuple,...] )->np.ndarray:
+    length = max( _min_samples, int(np.ceil((duration +shift)/_sample_step))*_sample_step )
+    t = np.arange(length) -shift
+    inside = (t >= 0) & (t <= duration)
+    samples = np.where( inside, amp*flux_shapes[shape](t, duration, rise, dict(params)), 0. )
+    samples.setflags(write=False)
+    return samples
+
+def flux_pulse_samples( shape:str, amp:float, duration:float, rise:float=8, shift:float=0., **params )->np.ndarray:
+    """
+    Samples (1 ns) of a flux pulse, zero padded to a valid waveform length (multiple of 4, at least 16).\n
+    shape: "flat_top_gaussian", "erf", "cosine" or "slepian".\n
+    amp: peak amplitude (V).\n
+    duration: pulse duration in ns, not limited to a multiple of 4 or to integers.\n
+    rise: duration of the rising and falling edges in ns, not used by "slepian".\n
+    shift: delay of the pulse in ns, a fraction of a sample moves the shape between the samples.\n
+    params: "sfactor" rise/sigma for the Gaussian and erf edges (default 4), "lambdas" Fourier coefficients for "slepian" (default (1,0)).\n
+    The arrays are memoized on the parameters and read-only, a sweep over pulse variants builds each one once per session.
+    """
+    if shape not in flux_shapes:
+        raise KeyError(f"Unknown flux pulse shape '{shape}', should be one of {list(flux_shapes.keys())}")
+    if duration <= 0 or shift < 0:
+        raise ValueError("Flux pulse duration should be positive and shift should not be negative!")
+    if shape != "slepian" and 2*rise > duration:
+        raise ValueError(f"Flux pulse duration {duration} ns is shorter than its two edges of {rise} ns!")
+    params = tuple(sorted( (k, tuple(v) if isinstance(v, (list, np.ndarray)) else v) for k, v in params.items() ))
+    return _flux_samples( shape, float(amp), float(duration), float(rise), float(shift), params )
+
+def flux_pulse_cache_info():
+    """ Hits, misses and size of the flux pulse cache """
+    return _flux_samples.cache_info()
+
+def add_flux_pulse( config:Configuration, element:str, operation:str, shape:str, amp:float, duration:float, rise:float=8, shift:float=0., **params )->str:
+    """
+    Add or update the flux pulse as an operation of the z element, ex. add_flux_pulse(config, "q2_z", "cz", "erf", 0.12, 41.5, shift=0.25).\n
+    The waveform "{element}_{operation}_wf" and pulse "{element}_{operation}_pulse" are created or replaced,
+    a pulse with unchanged parameters keeps its cached arrays and config components.\n
+    See `flux_pulse_samples` for the arguments. return the operation name.
+    """
+    samples = flux_pulse_samples( shape, amp, duration, rise, shift, **params )
+    pulse_name = f"{element}_{operation}_pulse"
+    waveform_name = f"{element}_{operation}_wf"
+
+    if waveform_name not in config._waveforms:
+        config._waveforms[waveform_name] = Waveform(waveform_name)
+    waveform = config._waveforms[waveform_name]
+    waveform.type = "arbitrary"
+    waveform.sample = samples
+
+    if pulse_name not in config._pulses:
+        config._pulses[pulse_name] = Pulse(pulse_name)
+    pulse = config._pulses[pulse_name]
+    pulse.operation = "control"
+    pulse.length = len(samples)
+    pulse.waveforms.single = waveform_name
+
+    if config._elements[element]._operations.get(operation) != pulse_name:
+        config.elements[element].operations[operation] = pulse_name
+    return operation
@@ -0,0 +1,77 @@
+from typing import Dict, List, Tuple
+
+from config_component.envelope_builder import native_gate_axes
+
+# amp() matrix (v00, v01, v10, v11) plays I' = v00*I +v01*Q, Q' = v10*I +v11*Q on the stored pulse
+_negate = (-1., 0., 0., -1.)
+# x axis rotated to y, I' = -Q, Q' = I, the same rotation as EnvelopeBuilder
+_to_y = (0., -1., 1., 0.)
+_to_minus_y = (0., 1., -1., 0.)
+
+# {gate set: {gate: (stored operation, amp matrix or None to play the stored pulse as it is)}}
+gate_sets = {
+    # every native gate has its own pulse and waveforms
+    "full": {
+        **{ gate: (gate, None) for gate in native_gate_axes },
+        "-y180": ("y180", _negate),
+    },
+    # only x180 and x90 are stored, the other gates are the base pulses through an amp() matrix
+    "two_base": {
+        "x180": ("x180", None),
+        "-x180": ("x180", _negate),
+        "y180": ("x180", _to_y),
+        "-y180": ("x180", _to_minus_y),
+        "x90": ("x90", None),
+        "-x90": ("x90", _negate),
+        "y90": ("x90", _to_y),
+        "-y90": ("x90", _to_minus_y),
+    },
+}
+
+# Frame of the x pulse playing the gate in the "virtual_z" gate set, in turns of 2pi
+virtual_z_frames = {
+    "x180": 0., "-x180": 0.5, "y180": 0.25, "-y180": 0.75,
+    "x90": 0., "-x90": 0.5, "y90": 0.25, "-y90": 0.75,
+}
+# The same stored gates as "two_base", the other gates are x pulses in a rotated frame, see `gate_frame`
+gate_sets["virtual_z"] = { gate: ("x180" if gate.endswith("180") else "x90", None) for gate in virtual_z_frames }
+
+def stored_gates( gate_set:str )->List[str]:
+    """ The native gates having pulses and waveforms in the config for the gate set """
+    if gate_set not in gate_sets:
+        raise KeyError(f"Unknown gate set '{gate_set}', should be one of {list(gate_sets.keys())}")
+    stored = []
+    for operation, _ in gate_sets[gate_set].values():
+        if operation not in stored:
+            stored.append(operation)
+    return stored
+
+def gate_realization( gate_set:str, gate:str )->Tuple[str, tuple]:
+    """
+    How the gate is played in the gate set.\n
+    return (stored operation, amp matrix), the amp matrix is None if the operation is played as it is.
+    """
+    if gate_set not in gate_sets:
+        raise KeyError(f"Unknown gate set '{gate_set}', should be one of {list(gate_sets.keys())}")
+    if gate not in gate_sets[gate_set]:
+        raise KeyError(f"Gate '{gate}' is not in the gate set '{gate_set}'")
+    return gate_sets[gate_set][gate]
+
+def gate_frame( gate_set:str, gate:str )->float:
+    """ Frame (turns) in which the stored operation of the gate is played, only "virtual_z" rotates the frame """
+    gate_realization( gate_set, gate )
+    if gate_set == "virtual_z":
+        return virtual_z_frames[gate]
+    return 0.
+
+def gate_set_of( operations:Dict[str,str] )->str:
+    """
+    The gate set of an XY element guessed from its operations, the one with the most stored gates they contain.\n
+    "two_base" and "virtual_z" store the same gates and can't be told apart, "two_base" is returned for both.
+    The gate set recorded on the element by `create_xyChannel` is `Element.gate_set`.
+    """
+    candidates = sorted( gate_sets.keys(), key=lambda name: len(stored_gates(name)), reverse=True )
+    for name in candidates:
+        if all( gate in operations for gate in stored_gates(name) ):
+            return name
+    raise KeyError(f"The operations {list(operations.keys())} don't contain any gate set")
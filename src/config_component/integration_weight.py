@@ -1,6 +1,15 @@
 from typing import List, Tuple
+import heapq
+import numpy as np
+from config_component.cached_component import CachedComponent, Field, build_serializer
 
-class IntegrationWeights:
+# Default allowed SNR loss when compressing the optimal weights, 0.1 %
+DEFAULT_MAX_SNR_LOSS = 1e-3
+# Integration weights are sampled every clock cycle
+_CLOCK_NS = 4
+
+class IntegrationWeights( CachedComponent ):
+    __slots__ = ("_name", "_cosine", "_sine")
     def __init__(self, name:str ):
         """
         The integration_weights part of configuration
@@ -11,6 +20,7 @@ class IntegrationWeights:
 
     @property
     def cosine( self )->List[Tuple[float,int]]:
+        self.mark_dirty()
         return self._cosine
     @cosine.setter
     def cosine( self, val:List[Tuple[float,int]] ):
@@ -18,21 +28,16 @@ class IntegrationWeights:
     
     @property
     def sine( self )->List[Tuple[float,int]]:
+        self.mark_dirty()
         return self._sine 
     @sine.setter
     def sine( self, val:List[Tuple[float,int]] ):
         self._sine = val
     
-    def to_dict( self ):
-
-        output_dict = {
-            "cosine": self._cosine,
-            "sine": self._sine
-        }        
-            
-        return {
-            self._name:output_dict
-        }
+    _build_dict = build_serializer( (
+        Field("cosine", "_cosine"),
+        Field("sine", "_sine"),
+    ), key_attr="_name" )
  
 def integrationWeight_read_dict( name:str, infos:dict )-> IntegrationWeights:
     """
@@ -44,4 +49,110 @@ def integrationWeight_read_dict( name:str, infos:dict )-> IntegrationWeights:
     integrationWeights._cosine = infos["cosine"]
     integrationWeights._sine = infos["sine"]
 
-    return integrationWeights
\ No newline at end of file
+    return integrationWeights
+
+def round_weights( weights, accuracy:float=2**-15 )->np.ndarray:
+    """ Round to the fixed point accuracy of the OPX integration weights """
+    return np.round(np.asarray(weights, dtype=float)/accuracy)*accuracy
+
+def weights_to_segments( weights )->List[Tuple[float,int]]:
+    """
+    weights: one value per clock cycle (4 ns), ex. the arrays of optimal weights.\n
+    return the exact list of (weight, length in ns), one segment per run of equal values.
+    """
+    weights = round_weights(weights)
+    starts = np.r_[0, np.flatnonzero(np.diff(weights) != 0) +1]
+    lengths = np.diff(np.r_[starts, len(weights)]) *_CLOCK_NS
+    return list(zip(weights[starts].tolist(), lengths.tolist()))
+
+def _segments_to_samples( segments:List[Tuple[float,int]] )->np.ndarray:
+    values = np.array([ seg[0] for seg in segments ], dtype=float)
+    lengths = np.array([ seg[1] for seg in segments ], dtype=int)
+    if np.any(lengths %_CLOCK_NS):
+        raise ValueError(f"Integration weight segment lengths should be multiples of {_CLOCK_NS} ns")
+    return np.repeat(values, lengths//_CLOCK_NS)
+
+def fit_segments_length( segments:List[Tuple[float,int]], length:int )->List[Tuple[float,int]]:
+    """
+    Cut the segments at length ns, or pad them with zero weight up to it,
+    ex. the optimal weights measured for another readout length.
+    """
+    total = sum( seg[1] for seg in segments )
+    if total == length:
+        return segments
+    samples = _segments_to_samples(segments)[:length//_CLOCK_NS]
+    samples = np.r_[samples, np.zeros(length//_CLOCK_NS -len(samples))]
+    return weights_to_segments(samples)
+
+def compress_integration_weights( cosine:List[Tuple[float,int]], sine:List[Tuple[float,int]], max_snr_loss:float=DEFAULT_MAX_SNR_LOSS, report:bool=True ):
+    """
+    Merge the adjacent segments of an integration weight pair with the smallest error first,
+    until the SNR loss would exceed max_snr_loss (0.001 for 0.1 %).\n
+    The SNR of a weight w approximated by w' is |w'|/|w| of the original one, so the squared error
+    is kept below |w|^2 (1-(1-max_snr_loss)^2). Cosine and sine share the segment boundaries.\n
+    return cosine, sine, info. info: "segments_before", "segments_after" and "snr_loss".
+    """
+    cos_samples = _segments_to_samples(cosine)
+    sin_samples = _segments_to_samples(sine)
+    if len(cos_samples) != len(sin_samples):
+        raise ValueError(f"Cosine ({len(cos_samples)*_CLOCK_NS} ns) and sine ({len(sin_samples)*_CLOCK_NS} ns) have different lengths")
+
+    # Initial segments are the runs where both cosine and sine are constant
+    starts = np.r_[0, np.flatnonzero((np.diff(cos_samples) != 0) | (np.diff(sin_samples) != 0)) +1]
+    counts = np.diff(np.r_[starts, len(cos_samples)]).tolist()
+    cos_means = cos_samples[starts].tolist()
+    sin_means = sin_samples[starts].tolist()
+    segment_num = len(counts)
+
+    energy = float(np.sum(cos_samples**2) +np.sum(sin_samples**2))
+    budget = energy *(1 -(1 -max_snr_loss)**2)
+
+    def merge_cost( i:int, j:int )->float:
+        n_i, n_j = counts[i], counts[j]
+        return n_i*n_j/(n_i+n_j) *((cos_means[i]-cos_means[j])**2 +(sin_means[i]-sin_means[j])**2)
+
+    # Linked list of the alive segments, version invalidates the old heap entries of a merged segment
+    next_idx = list(range(1, segment_num)) +[-1]
+    prev_idx = [-1] +list(range(segment_num -1))
+    version = [0]*segment_num
+    heap = [ (merge_cost(i, i+1), i, 0, 0) for i in range(segment_num -1) ]
+    heapq.heapify(heap)
+
+    error = 0.
+    alive = segment_num
+    while heap:
+        cost, i, v_i, v_j = heapq.heappop(heap)
+        j = next_idx[i]
+        if counts[i] == 0 or j == -1 or version[i] != v_i or version[j] != v_j:
+            continue
+        if error +cost > budget:
+            break
+        error += cost
+        # merge j into i
+        total = counts[i] +counts[j]
+        cos_means[i] = (cos_means[i]*counts[i] +cos_means[j]*counts[j])/total
+        sin_means[i] = (sin_means[i]*counts[i] +sin_means[j]*counts[j])/total
+        counts[i], counts[j] = total, 0
+        next_idx[i] = next_idx[j]
+        if next_idx[j] != -1:
+            prev_idx[next_idx[j]] = i
+        version[i] += 1
+        alive -= 1
+        p = prev_idx[i]
+        if p != -1:
+            heapq.heappush(heap, (merge_cost(p, i), p, version[p], version[i]))
+        n = next_idx[i]
+        if n != -1:
+            heapq.heappush(heap, (merge_cost(i, n), i, version[i], version[n]))
+
+    alive_idx = [ i for i in range(segment_num) if counts[i] > 0 ]
+    new_cosine = [ (cos_means[i], counts[i]*_CLOCK_NS) for i in alive_idx ]
+    new_sine = [ (sin_means[i], counts[i]*_CLOCK_NS) for i in alive_idx ]
+    info = {
+        "segments_before":max(len(cosine), len(sine)),
+        "segments_after":alive,
+        "snr_loss":1 -np.sqrt(max(1 -error/energy, 0.)) if energy > 0 else 0.,
+    }
+    if report:
+        print(f"Integration weights compressed: {info['segments_before']} -> {info['segments_after']} segments, SNR loss {info['snr_loss']*100:.3f} %")
+    return new_cosine, new_sine, info
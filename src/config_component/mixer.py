@@ -1,7 +1,12 @@
 
 from typing import List
+from config_component.cached_component import CachedComponent, Field, build_serializer
+
+class IFChannel( CachedComponent ):
+    __slots__ = ("_intermediate_frequency", "_lo_frequency", "_correction", "_owner", "_key")
+    # Channels pickled before they knew their mixer
+    _slot_defaults = {"_owner":None, "_key":None}
 
-class IFChannel():
     def __init__(self ):
         """
         The class for different IF freq in the same mixer
@@ -9,62 +14,179 @@ class IFChannel():
         self._intermediate_frequency = 0
         self._lo_frequency = 0
         self._correction = []
+        # The mixer keeping this channel and the key in it, the mixer re-indexes the channel when its frequencies change
+        self._owner = None
+        self._key = None
 
     @property
     def intermediate_frequency( self )->int:
         return self._intermediate_frequency
     @intermediate_frequency.setter
     def intermediate_frequency( self, val:int ):
+        old_pair = self.pair
         self._intermediate_frequency = val
+        if self._owner is not None:
+            self._owner._move_pair( self._key, old_pair, self.pair )
         
     @property
     def lo_frequency( self )->int:
         return self._lo_frequency
     @lo_frequency.setter
     def lo_frequency( self, val:int ):
+        old_pair = self.pair
         self._lo_frequency = val
+        if self._owner is not None:
+            self._owner._move_pair( self._key, old_pair, self.pair )
+
+    @property
+    def pair( self )->tuple:
+        """ (lo_frequency, intermediate_frequency) """
+        return (self._lo_frequency, self._intermediate_frequency)
     
     @property
     def correction( self )->list:
+        if isinstance(self._correction, list):
+            self.mark_dirty()
         return self._correction
     @correction.setter
     def correction( self, val:list )->list:
         self._correction = val
     
-    def to_dict( self )->dict:
-
-        output_dict = {
-            "intermediate_frequency":self._intermediate_frequency,
-            "lo_frequency": self._lo_frequency,
-            "correction": self._correction,
-        }        
-
-        return output_dict
+    _build_dict = build_serializer( (
+        Field("intermediate_frequency", "_intermediate_frequency"),
+        Field("lo_frequency", "_lo_frequency"),
+        Field("correction", "_correction"),
+    ) )
           
  
-class Mixer:
+class Mixer( CachedComponent ):
+    __slots__ = ("_name", "_iFChannels", "_pair_index")
     def __init__(self, name:str ):
         """
-        The Mixer part of configuration
+        The Mixer part of configuration\n
+        IF channels are kept in a dict keyed by the element name using them.
+        Channels read from a config dict don't know their element yet, they are keyed by their
+        position (int) until `channel_of` binds them to an element.
         """
         self._name = name
-        self._iFChannels = []
+        self._iFChannels = {}
+        # (lo_frequency, intermediate_frequency) -> keys of the channels with this pair
+        self._pair_index = {}
         
     @property
     def iFChannels( self )->List[IFChannel]:
-        return self._iFChannels
- 
+        """ The channels in output order. The list is a copy, use `add_channel` and `remove_channel` to change it. """
+        return list(self._iFChannels.values())
+
+    @property
+    def elements( self )->List[str]:
+        """ Names of the elements bound to a channel """
+        return [ key for key in self._iFChannels if isinstance(key, str) ]
+
+    def _index( self, key, pair:tuple ):
+        self._pair_index.setdefault(pair, []).append(key)
+
+    def _unindex( self, key, pair:tuple ):
+        keys = self._pair_index[pair]
+        keys.remove(key)
+        if len(keys) == 0:
+            del self._pair_index[pair]
+
+    def _move_pair( self, key, old_pair:tuple, new_pair:tuple ):
+        """ Called by the channel when its frequencies change """
+        if old_pair != new_pair:
+            self._unindex(key, old_pair)
+            self._index(key, new_pair)
+            self.mark_dirty()
+
+    def _attach( self, key, channel:IFChannel ):
+        channel._owner = self
+        channel._key = key
+        self._iFChannels[key] = channel
+        self._index(key, channel.pair)
+        self.mark_dirty()
+
+    def add_channel( self, element:str, lo_frequency:int, intermediate_frequency:int, correction:tuple=(1, 0, 0, 1) )->IFChannel:
+        """
+        Add the channel for element, the existing channel of element is updated instead.\n
+        return the channel.
+        """
+        if element in self._iFChannels:
+            return self.update_channel(element, lo_frequency, intermediate_frequency, correction)
+        channel = IFChannel()
+        channel._lo_frequency = lo_frequency
+        channel._intermediate_frequency = intermediate_frequency
+        channel._correction = correction
+        self._attach(element, channel)
+        return channel
+
+    def update_channel( self, element:str, lo_frequency:int=None, intermediate_frequency:int=None, correction:tuple=None )->IFChannel:
+        """ Update the given values of the channel for element, return the channel. """
+        channel = self._iFChannels[element]
+        if lo_frequency is not None:
+            channel.lo_frequency = lo_frequency
+        if intermediate_frequency is not None:
+            channel.intermediate_frequency = intermediate_frequency
+        if correction is not None:
+            channel.correction = correction
+        return channel
+
+    def remove_channel( self, element:str )->IFChannel:
+        channel = self._iFChannels.pop(element)
+        self._unindex(element, channel.pair)
+        channel._owner = None
+        channel._key = None
+        self.mark_dirty()
+        return channel
+
+    def channels_at( self, lo_frequency:int, intermediate_frequency:int )->List[IFChannel]:
+        """ Channels with the (LO, IF) pair """
+        return [ self._iFChannels[key] for key in self._pair_index.get((lo_frequency, intermediate_frequency), []) ]
+
+    def channel_of( self, element:str, lo_frequency:int=None, intermediate_frequency:int=None )->IFChannel:
+        """
+        The channel for element.\n
+        If element isn't bound yet, the first unbound channel at (lo_frequency, intermediate_frequency) is bound to it.
+        """
+        if element in self._iFChannels:
+            return self._iFChannels[element]
+        for key in self._pair_index.get((lo_frequency, intermediate_frequency), []):
+            if not isinstance(key, str):
+                return self.bind_element(element, key)
+        raise KeyError(f"Mixer '{self._name}' has no channel for element '{element}' at (LO, IF)={(lo_frequency, intermediate_frequency)}")
+
+    def bind_element( self, element:str, key:int )->IFChannel:
+        """ Key the unbound channel `key` by element, the output order is kept. """
+        channel = self._iFChannels[key]
+        self._unindex(key, channel.pair)
+        self._iFChannels = { (element if k == key else k): ch for k, ch in self._iFChannels.items() }
+        channel._key = element
+        self._index(element, channel.pair)
+        return channel
+
+    def _sub_components( self )->list:
+        return self._iFChannels.values()
     
-    def to_dict( self )->dict:
+    def _build_dict( self )->dict:
 
         channel_dicts = []
-        for iFChannel in self.iFChannels:
+        for iFChannel in self._iFChannels.values():
             channel_dicts.append( iFChannel.to_dict() )  
 
         return {
             self._name:channel_dicts
         }
 
+    def __setstate__( self, state:dict ):
+        super().__setstate__(state)
+        if isinstance(self._iFChannels, list):
+            # Mixer pickled with the channel list
+            channels = self._iFChannels
+            object.__setattr__(self, "_iFChannels", {})
+            object.__setattr__(self, "_pair_index", {})
+            for idx, channel in enumerate(channels):
+                self._attach(idx, channel)
+
     
 def iFChannel_read_dict( infos:dict ):
 
@@ -76,11 +198,10 @@ def iFChannel_read_dict( infos:dict ):
 
 def mixer_read_list( name:str, infos:list[dict] )-> Mixer:
     """
-    Input dictionary and output Mixer object
+    Input dictionary and output Mixer object, the channels are bound to elements by `Mixer.channel_of`
     """
     mixer = Mixer(name)
-    mixer._iFChannels = []
-    for iFInfo in infos:
-        mixer._iFChannels.append(iFChannel_read_dict(iFInfo))
+    for idx, iFInfo in enumerate(infos):
+        mixer._attach(idx, iFChannel_read_dict(iFInfo))
 
-    return mixer
\ No newline at end of file
+    return mixer
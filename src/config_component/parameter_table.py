@@ -0,0 +1,367 @@
+from collections.abc import Mapping, MutableMapping
+from copy import deepcopy
+from typing import List, Tuple
+
+import numpy as np
+
+# Kind of a table cell
+_MISSING, _FLOAT, _INT = 0, 1, 2
+class _InTable:
+    """ Marks the keys of a qubit whose value is in the table, other values are kept as python objects """
+    def __copy__( self ):
+        return self
+    def __deepcopy__( self, memo:dict ):
+        return self
+    def __reduce__( self ):
+        # the same marker after pickle
+        return "_IN_TABLE"
+    def __repr__( self )->str:
+        return "<in table>"
+_IN_TABLE = _InTable()
+# Larger int can't be kept exactly in float64
+_MAX_EXACT_INT = 2**53
+
+def _numeric_kind( value )->int:
+    """ Kind of the cell to keep value in the table, _MISSING for the values kept as objects """
+    if isinstance(value, (bool, np.bool_)):
+        return _MISSING
+    if isinstance(value, (int, np.integer)):
+        return _INT if abs(int(value)) < _MAX_EXACT_INT else _MISSING
+    if isinstance(value, (float, np.floating)):
+        return _FLOAT
+    return _MISSING
+
+class QubitParameterTable:
+    def __init__( self ):
+        """
+        Columnar storage of the per-qubit parameters in `ChannelInfo`.\n
+        Numeric values are kept in a numpy structured array with one row per qubit and one field per
+        "Info/key" ex. "XyInfo/qubit_IF", other values (str, tuple, dict...) are kept as python objects.
+        The int/float type of each value is kept, so the dict views give back what was set.\n
+        `InfoView` and `QubitView` are the dict-style access used by `ChannelInfo._RoInfo["q0"]["resonator_IF"]`,
+        `column()` and `set_column()` read and write all the qubits in one array operation.
+        """
+        self.qubits = []
+        self._rows = {}
+        # "Info/key" of the fields in the structured arrays
+        self._fields = []
+        self._values = np.zeros(0, dtype=[])
+        self._kinds = np.zeros(0, dtype=[])
+        # info -> {qubit: None} in insertion order
+        self._members = {}
+        # (info, qubit) -> {key: value or _IN_TABLE} in insertion order
+        self._cells = {}
+        # info -> {key: value} for the values shared by the qubits, ex. "register" or "settle_time"
+        self._shared = {}
+
+    # ===================== storage =====================
+    @property
+    def capacity( self )->int:
+        return self._values.shape[0]
+
+    def _row( self, qubit:str )->int:
+        if qubit not in self._rows:
+            if len(self.qubits) == self.capacity:
+                self._resize( max(8, 2*self.capacity), self._fields )
+            self._rows[qubit] = len(self.qubits)
+            self.qubits.append(qubit)
+        return self._rows[qubit]
+
+    def _resize( self, capacity:int, fields:List[str] ):
+        """ Allocate new arrays with the capacity and fields, the old content is copied """
+        values = np.zeros(capacity, dtype=[ (name, "f8") for name in fields ])
+        kinds = np.zeros(capacity, dtype=[ (name, "u1") for name in fields ])
+        n = min(len(self.qubits), capacity)
+        for name in fields:
+            # empty cells are NaN for the vectorized queries
+            values[name] = np.nan
+            if name in self._fields:
+                values[name][:n] = self._values[name][:n]
+                kinds[name][:n] = self._kinds[name][:n]
+        self._values, self._kinds = values, kinds
+        self._fields = list(fields)
+
+    def _column_name( self, info:str, key:str, create:bool=False )->str:
+        name = f"{info}/{key}"
+        if create and name not in self._fields:
+            self._resize( self.capacity, self._fields +[name] )
+        return name
+
+    @property
+    def columns( self )->List[str]:
+        """ "Info/key" of the numeric parameters """
+        return list(self._fields)
+
+    # ===================== cells =====================
+    def members( self, info:str )->List[str]:
+        """ Qubits having parameters in info """
+        return list(self._members.get(info, {}))
+
+    def add_qubit( self, info:str, qubit:str, params:Mapping=None ):
+        """ Add qubit to info with its params, the params of a qubit already in info are replaced """
+        if qubit in self._members.get(info, {}):
+            self.remove_qubit(info, qubit)
+        self._row(qubit)
+        self._members.setdefault(info, {})[qubit] = None
+        self._cells[(info, qubit)] = {}
+        for key, value in (params or {}).items():
+            self.set(info, qubit, key, value)
+
+    def remove_qubit( self, info:str, qubit:str ):
+        """ Remove the params of qubit in info, the row is kept for the other infos """
+        for key in list(self._cells[(info, qubit)]):
+            self.delete(info, qubit, key)
+        del self._cells[(info, qubit)]
+        del self._members[info][qubit]
+
+    def get( self, info:str, qubit:str, key:str ):
+        value = self._cells[(info, qubit)][key]
+        if value is not _IN_TABLE:
+            return value
+        name = f"{info}/{key}"
+        row = self._rows[qubit]
+        number = self._values[name][row]
+        return int(number) if self._kinds[name][row] == _INT else float(number)
+
+    def set( self, info:str, qubit:str, key:str, value ):
+        cells = self._cells[(info, qubit)]
+        kind = _numeric_kind(value)
+        if kind == _MISSING:
+            if cells.get(key) is _IN_TABLE:
+                self._clear_cell(info, qubit, key)
+            cells[key] = value
+            return
+        name = self._column_name(info, key, create=True)
+        row = self._rows[qubit]
+        self._values[name][row] = value
+        self._kinds[name][row] = kind
+        cells[key] = _IN_TABLE
+
+    def delete( self, info:str, qubit:str, key:str ):
+        cells = self._cells[(info, qubit)]
+        if cells[key] is _IN_TABLE:
+            self._clear_cell(info, qubit, key)
+        del cells[key]
+
+    def _clear_cell( self, info:str, qubit:str, key:str ):
+        name = f"{info}/{key}"
+        row = self._rows[qubit]
+        self._values[name][row] = np.nan
+        self._kinds[name][row] = _MISSING
+
+    def keys_of( self, info:str, qubit:str )->List[str]:
+        return list(self._cells[(info, qubit)])
+
+    # ===================== whole info =====================
+    def load_info( self, info:str, content:Mapping ):
+        """
+        Replace info by content in the dict layout of `ChannelInfo`,
+        ex. {"q0":{"qubit_IF":-1e8,...}, "register":["q0"]}.
+        The values which are Mapping are qubits, the others are shared by the qubits.
+        """
+        for qubit in self.members(info):
+            self.remove_qubit(info, qubit)
+        self._shared[info] = {}
+        for key, value in content.items():
+            if isinstance(value, Mapping):
+                self.add_qubit(info, key, value)
+            else:
+                self._shared[info][key] = value
+
+    def to_dict( self, info:str )->dict:
+        """ Copy of info in the dict layout of `ChannelInfo` """
+        content = {}
+        for qubit in self._members.get(info, {}):
+            content[qubit] = { key: deepcopy(self.get(info, qubit, key)) for key in self._cells[(info, qubit)] }
+        content.update(deepcopy(self._shared.get(info, {})))
+        return content
+
+    # ===================== vectorized =====================
+    def rows( self, qubits:List[str] )->np.ndarray:
+        return np.array([ self._rows[q] for q in qubits ], dtype=int)
+
+    def column( self, info:str, key:str, qubits:List[str]=None )->np.ndarray:
+        """
+        Values of key for the qubits in info as float array, NaN for the qubits without a numeric value.\n
+        qubits: None for all the qubits in info, in the order of `members(info)`.
+        """
+        if qubits is None:
+            qubits = self.members(info)
+        name = f"{info}/{key}"
+        if name not in self._fields:
+            return np.full(len(qubits), np.nan)
+        return self._values[name][self.rows(qubits)]
+
+    def set_column( self, info:str, key:str, values, qubits:List[str]=None ):
+        """
+        Set key of the qubits in info in one array operation.\n
+        values: a number for all the qubits or an array with one value per qubit, int arrays are kept as int.
+        A float array keeps the int cells int with the rounded values, ex. "qubit_IF" in Hz.\n
+        qubits: None for all the qubits in info.
+        """
+        if qubits is None:
+            qubits = self.members(info)
+        for qubit in qubits:
+            if qubit not in self._members.get(info, {}):
+                raise KeyError(f"{qubit} is not in {info}")
+        values = np.broadcast_to(np.asarray(values), (len(qubits),))
+        if values.dtype.kind in "iu":
+            kind = _INT
+        elif values.dtype.kind == "f":
+            kind = _FLOAT
+        else:
+            raise ValueError(f"Only int or float values can be set as column, got {values.dtype}")
+        name = self._column_name(info, key, create=True)
+        rows = self.rows(qubits)
+        kinds = np.full(len(qubits), kind, dtype="u1")
+        if kind == _FLOAT:
+            # NaN or inf can't be int, these cells become float
+            kinds[(self._kinds[name][rows] == _INT) & np.isfinite(values)] = _INT
+            values = np.where(kinds == _INT, np.rint(values), values)
+        self._values[name][rows] = values
+        self._kinds[name][rows] = kinds
+        for qubit in qubits:
+            self._cells[(info, qubit)][key] = _IN_TABLE
+
+    def where( self, mask:np.ndarray, info:str, qubits:List[str]=None )->List[str]:
+        """ Qubits in info where mask (from `column`) is True """
+        if qubits is None:
+            qubits = self.members(info)
+        return [ q for q, selected in zip(qubits, mask) if selected ]
+
+    # ===================== frequency plan =====================
+    _frequency_keys = {"xy":("XyInfo","qubit_LO","qubit_IF"), "ro":("RoInfo","resonator_LO","resonator_IF")}
+
+    def frequencies( self, channel:str )->Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        channel: "xy" or "ro".\n
+        return (qubits, LO+IF, LO-IF) in Hz, LO-IF is the image of the mixer.
+        """
+        info, lo_key, if_key = self._frequency_keys[channel]
+        qubits = self.members(info)
+        lo = self.column(info, lo_key, qubits)
+        intermediate = self.column(info, if_key, qubits)
+        return qubits, lo +intermediate, lo -intermediate
+
+    def frequency_collisions( self, min_spacing:float, channels:Tuple[str]=("xy","ro"), images:bool=True )->List[Tuple[str,str,float]]:
+        """
+        Pairs of signals closer than min_spacing (Hz), checked for all the qubits together.\n
+        Signals are named "q3_xy" for the drive, "q3_xy_image" for its mixer image with `images`.
+        Images are only compared to the drives, the image of a drive is not compared to itself.\n
+        return [(signal, signal, spacing)] sorted by spacing.
+        """
+        labels, owners, freqs, is_image = [], [], [], []
+        for channel in channels:
+            qubits, signal, image = self.frequencies(channel)
+            # every drive and its image have the same owner id
+            first_owner = len(labels) if not images else len(labels)//2
+            labels += [ f"{q}_{channel}" for q in qubits ]
+            owners.append(np.arange(first_owner, first_owner +len(qubits)))
+            is_image.append(np.zeros(len(qubits), dtype=bool))
+            freqs.append(signal)
+            if images:
+                labels += [ f"{q}_{channel}_image" for q in qubits ]
+                owners.append(np.arange(first_owner, first_owner +len(qubits)))
+                is_image.append(np.ones(len(qubits), dtype=bool))
+                freqs.append(image)
+        if len(labels) == 0:
+            return []
+        freqs = np.concatenate(freqs)
+        is_image = np.concatenate(is_image)
+        owners = np.concatenate(owners)
+
+        spacing = np.abs(freqs[:,None] -freqs[None,:])
+        close = np.triu(spacing < min_spacing, k=1)
+        close &= ~(is_image[:,None] & is_image[None,:])
+        close &= owners[:,None] != owners[None,:]
+        i_idx, j_idx = np.nonzero(close)
+        collisions = [ (labels[i], labels[j], spacing[i,j]) for i, j in zip(i_idx.tolist(), j_idx.tolist()) ]
+        collisions.sort(key=lambda c: c[2])
+        return [ (a, b, float(d)) for a, b, d in collisions ]
+
+class QubitView( MutableMapping ):
+    def __init__( self, table:QubitParameterTable, info:str, qubit:str ):
+        """ dict-style access to the parameters of a qubit in info, changes go to the table """
+        self._table = table
+        self._info = info
+        self._qubit = qubit
+
+    def __getitem__( self, key:str ):
+        try:
+            return self._table.get(self._info, self._qubit, key)
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __setitem__( self, key:str, value ):
+        self._table.set(self._info, self._qubit, key, value)
+
+    def __delitem__( self, key:str ):
+        try:
+            self._table.delete(self._info, self._qubit, key)
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__( self ):
+        return iter(self._table.keys_of(self._info, self._qubit))
+
+    def __len__( self )->int:
+        return len(self._table._cells[(self._info, self._qubit)])
+
+    def __repr__( self )->str:
+        return repr(dict(self.items()))
+
+    def copy( self )->dict:
+        return dict(self.items())
+
+    def __copy__( self )->dict:
+        return self.copy()
+
+    def __deepcopy__( self, memo:dict )->dict:
+        # A copy is a plain dict, like the spec before the table
+        return { key: deepcopy(value, memo) for key, value in self.items() }
+
+class InfoView( MutableMapping ):
+    def __init__( self, table:QubitParameterTable, info:str ):
+        """
+        dict-style access to info ex. "RoInfo" of `ChannelInfo`.\n
+        Qubits give `QubitView`, the shared keys ex. "register" give their values.
+        """
+        self._table = table
+        self._info = info
+
+    def __getitem__( self, key:str ):
+        if key in self._table._members.get(self._info, {}):
+            return QubitView(self._table, self._info, key)
+        return self._table._shared.setdefault(self._info, {})[key]
+
+    def __setitem__( self, key:str, value ):
+        if isinstance(value, Mapping):
+            # copy before add_qubit replaces the params in case value is the view of this qubit
+            self._table.add_qubit(self._info, key, dict(value.items()))
+        else:
+            self._table._shared.setdefault(self._info, {})[key] = value
+
+    def __delitem__( self, key:str ):
+        if key in self._table._members.get(self._info, {}):
+            self._table.remove_qubit(self._info, key)
+        else:
+            del self._table._shared.setdefault(self._info, {})[key]
+
+    def __iter__( self ):
+        yield from self._table.members(self._info)
+        yield from list(self._table._shared.get(self._info, {}))
+
+    def __len__( self )->int:
+        return len(self._table._members.get(self._info, {})) +len(self._table._shared.get(self._info, {}))
+
+    def __repr__( self )->str:
+        return repr(self.to_dict())
+
+    def to_dict( self )->dict:
+        return self._table.to_dict(self._info)
+
+    def __copy__( self )->dict:
+        return dict(self.items())
+
+    def __deepcopy__( self, memo:dict )->dict:
+        return self.to_dict()
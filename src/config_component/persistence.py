@@ -0,0 +1,597 @@
+"""
+Schema-versioned container for `Configuration` and `ChannelInfo`, the format `export_config` and `export_spec` save.\n
+The container is a zip file with\n
+    manifest.json           : format name, schema version, kind, (offset, size) of the sections and the array table\n
+    sections.bin            : one section per qubit ("q0", "q1", ...) and one "shared" section\n
+    arrays.bin              : the arrays of all sections, an array shared by the qubits is written once\n
+Each section can be loaded alone, so a script working on one qubit doesn't build the other qubits.\n
+A configuration section pickles the components themselves, each as its attribute names and values,
+and is loaded straight into the components without rebuilding them from the config dict.
+Only the component classes and numpy arrays can be loaded, a renamed or added attribute is handled
+by `_legacy_attrs` and `_slot_defaults` of the component like for the pickle files.
+A spec section is plain data.\n
+Schema version 1 had JSON sections and version 2 plain data sections, both in sections/<name> with the arrays
+in arrays/<name>.bin, they are still read.
+"""
+from typing import Dict, List, Mapping, Tuple
+import copyreg
+import io
+import operator
+import json
+import math
+import pickle
+import re
+import zipfile
+
+import numpy as np
+
+FORMAT_NAME = "QM_driver_AS"
+SCHEMA_VERSION = 3
+SHARED_SECTION = "shared"
+_qubit_name = re.compile(r"^(q\d+)(_|$)")
+
+# Functions upgrading a manifest and its sections from version n to n+1, {n: func(manifest, sections)}
+_migrations = {
+    # 1 -> 2 only changed the encoding of the sections, read by `decode_section`
+    1: lambda manifest, sections: None,
+    # 2 -> 3 pickles the components, the plain data sections are built by `configuration_from_sections`
+    2: lambda manifest, sections: None,
+}
+
+def is_container( path )->bool:
+    """ True if the file is a container, False for the pickle files """
+    with open(path, "rb") as f:
+        return f.read(4) == b"PK\x03\x04"
+
+def section_of( name:str )->str:
+    """ "q3_xy_x180_pulse" -> "q3", other names -> "shared" """
+    matched = _qubit_name.match(str(name))
+    return matched.group(1) if matched else SHARED_SECTION
+
+
+# ===================== encode and decode =====================
+class _ArrayBlock:
+    def __init__( self ):
+        """
+        All arrays of a section written into one binary block, the section keeps (offset, dtype, shape).\n
+        Arrays with the same content are written once, ex. the envelopes shared by the XY pulses of the qubits.
+        """
+        self.chunks = []
+        self.size = 0
+        # (dtype, shape, bytes) -> ref
+        self._refs = {}
+        # id of the added array -> (array, ref), the array is kept so its id isn't reused
+        self._ids = {}
+        # ref of each added array object, id of the array -> position in it
+        self.table = []
+        self._positions = {}
+
+    def add( self, arr:np.ndarray )->list:
+        if id(arr) in self._ids:
+            return self._ids[id(arr)][1]
+        ref = self._add(arr)
+        self._ids[id(arr)] = (arr, ref)
+        self._positions[id(arr)] = len(self.table)
+        self.table.append(ref)
+        return ref
+
+    def _add( self, arr:np.ndarray )->list:
+        arr = np.ascontiguousarray(arr)
+        data = arr.tobytes()
+        key = (arr.dtype.str, arr.shape, data)
+        if key in self._refs:
+            return self._refs[key]
+        ref = [self.size, arr.dtype.str, list(arr.shape)]
+        self._refs[key] = ref
+        # keep every array aligned to 8 bytes
+        padding = -len(data) %8
+        self.chunks.append(data +b"\0"*padding)
+        self.size += len(data) +padding
+        return ref
+
+    def position( self, arr:np.ndarray )->int:
+        """ Position of arr in `table`, the arrays of the same content written once still have their own position """
+        self.add(arr)
+        return self._positions[id(arr)]
+
+    def tobytes( self )->bytes:
+        return b"".join(self.chunks)
+
+def _read_array( block:bytearray, ref:list )->np.ndarray:
+    offset, dtype, shape = ref
+    count = math.prod(shape)
+    return np.frombuffer(block, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+_plain_types = frozenset([dict, list, tuple, str, int, float, bool, type(None)])
+
+class _SectionPickler( pickle.Pickler ):
+    def __init__( self, file, block:_ArrayBlock ):
+        """ Pickle plain data, the arrays go to the binary block, numpy scalars become python numbers and mappings dicts """
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._block = block
+
+    def persistent_id( self, obj ):
+        if type(obj) in _plain_types:
+            return None
+        if isinstance(obj, np.ndarray):
+            return ("array", self._block.add(obj))
+        if isinstance(obj, np.generic):
+            return ("value", obj.item())
+        if isinstance(obj, Mapping):
+            # ex. the views of `ParameterTable`
+            return ("value", dict(obj))
+        return None
+
+class _SectionUnpickler( pickle.Unpickler ):
+    def __init__( self, file, block:bytearray ):
+        """ Load a section pickled by `_SectionPickler`, no class or function can be loaded """
+        super().__init__(file)
+        self._block = block
+
+    def persistent_load( self, pid ):
+        kind, value = pid
+        if kind == "array":
+            return _read_array(self._block, value)
+        return value
+
+    def find_class( self, module:str, name:str ):
+        raise pickle.UnpicklingError(f"Sections only hold plain data, {module}.{name} can't be loaded")
+
+def _decode_json( obj, block:bytearray ):
+    """ Sections of schema version 1 """
+    if isinstance(obj, list):
+        return [ _decode_json(v, block) for v in obj ]
+    if isinstance(obj, dict):
+        if "__array__" in obj:
+            return _read_array(block, obj["__array__"])
+        if "__segments__" in obj:
+            seg_type = tuple if obj["tuple"] else list
+            return [ seg_type((w, int(l))) for w, l in _read_array(block, obj["__segments__"]).tolist() ]
+        if "__tuple__" in obj:
+            return tuple( _decode_json(v, block) for v in obj["__tuple__"] )
+        if "__dict__" in obj:
+            return { _decode_json(k, block): _decode_json(v, block) for k, v in obj["__dict__"] }
+        return { k: _decode_json(v, block) for k, v in obj.items() }
+    return obj
+
+
+# ===================== components =====================
+# numpy functions rebuilding the arrays and scalars, (module, name)
+_numpy_globals = frozenset([
+    ("numpy", "dtype"), ("numpy", "ndarray"),
+    ("numpy.core.numeric", "_frombuffer"), ("numpy.core.multiarray", "_reconstruct"), ("numpy.core.multiarray", "scalar"),
+    ("numpy._core.numeric", "_frombuffer"), ("numpy._core.multiarray", "_reconstruct"), ("numpy._core.multiarray", "scalar"),
+])
+# (class, saved attribute names) -> function setting the attributes of the components, see `_restorer`
+_restorers = {}
+# class -> (slot names, getter of their values) of the components pickled by `_ComponentPickler`, None for the other classes
+_layouts = {}
+# (module, name) -> class of the components, filled again when a class isn't found
+_classes = {}
+
+def _component_class( module:str, name:str ):
+    """ The `CachedComponent` subclass, None if it isn't one """
+    if (module, name) not in _classes:
+        from config_component.cached_component import CachedComponent
+        pending = [CachedComponent]
+        while pending:
+            cls = pending.pop()
+            _classes[(cls.__module__, cls.__qualname__)] = cls
+            pending.extend(cls.__subclasses__())
+    return _classes.get((module, name))
+
+def _has_own_setstate( cls )->bool:
+    from config_component.cached_component import CachedComponent
+    return cls.__setstate__ is not CachedComponent.__setstate__ or cls.__getstate__ is not CachedComponent.__getstate__
+
+def _shared_array( position:int ):
+    """ Placeholder pickled for the arrays in the array block, `_ComponentUnpickler` gives its own reader """
+    raise pickle.UnpicklingError("Arrays of a container section are loaded by its ContainerReader")
+
+def _layout( cls ):
+    """ (slot names, getter of their values) of cls, None for the classes pickled as usual """
+    from config_component.cached_component import CachedComponent
+    layout = None
+    if issubclass(cls, CachedComponent) and not _has_own_setstate(cls):
+        names = tuple(sorted(cls._all_slots()))
+        # attrgetter of one name doesn't give a tuple
+        layout = (names, operator.attrgetter(*names) if len(names) > 1 else lambda obj: (getattr(obj, names[0]),))
+    _layouts[cls] = layout
+    return layout
+
+def _restorer( cls, names:tuple ):
+    """
+    Generate the function setting the attributes saved as names on the components of cls, like `__setstate__`:
+    the names in `_legacy_attrs` are renamed, the names which aren't slots any more are skipped
+    and the missing slots get `_slot_defaults`. Only the slots of cls are written in the generated code.
+    """
+    restore = _restorers.get((cls, names))
+    if restore is not None:
+        return restore
+    slots = cls._all_slots()
+    targets = [ cls._legacy_attrs.get(name, name) for name in names ]
+    row = ", ".join( f"v{idx}" for idx in range(len(names)) )
+    lines = ["def restore( components, rows ):"]
+    lines.append(f"    for component, ({row},) in zip(components, rows):" if len(names) else "    for component in components:")
+    for idx, target in enumerate(targets):
+        if target in slots:
+            lines.append(f"        _set(component, {target!r}, v{idx})")
+    for name in cls._slot_defaults:
+        if name not in targets and name in slots:
+            lines.append(f"        _set(component, {name!r}, _defaults[{name!r}])")
+    lines.append("        _set(component, '_cached_dict', None)")
+    lines.append("        _set(component, '_dirty', True)")
+    namespace = {"_set":object.__setattr__, "_defaults":cls._slot_defaults}
+    exec("\n".join(lines), namespace)
+    restore = _restorers[(cls, names)] = namespace["restore"]
+    return restore
+
+class _ComponentPickler( pickle.Pickler ):
+    def __init__( self, file, block:_ArrayBlock ):
+        """
+        Pickle a section in batches sharing one memo. The components are first pickled empty,
+        a batch after the content gives their attributes by class, (class, names, components, values of each).
+        The attributes may hold more components, they come in the next batch. None ends the section.\n
+        The components with their own `__setstate__` are pickled as usual.\n
+        The arrays go to block, shared by the sections of the container, ex. the envelopes of the XY pulses of all qubits.
+        """
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._block = block
+        # class -> components pickled empty, waiting for their attributes
+        self._pending = {}
+
+    def reducer_override( self, obj ):
+        cls = type(obj)
+        if cls is np.ndarray:
+            return (_shared_array, (self._block.position(obj),))
+        layout = _layouts[cls] if cls in _layouts else _layout(cls)
+        if layout is None:
+            return NotImplemented
+        self._pending.setdefault(cls, []).append(obj)
+        return (copyreg.__newobj__, (cls,))
+
+    def _batch( self )->list:
+        batch = []
+        pending, self._pending = self._pending, {}
+        for cls, components in pending.items():
+            names, getter = _layouts[cls]
+            try:
+                batch.append( (cls, names, components, [ getter(component) for component in components ]) )
+            except AttributeError:
+                # Some slots are not set, group the components by their set slots
+                groups = {}
+                for component in components:
+                    set_names = tuple( name for name in names if hasattr(component, name) )
+                    groups.setdefault(set_names, []).append(component)
+                for set_names, group in groups.items():
+                    batch.append( (cls, set_names, group, [ tuple( getattr(c, name) for name in set_names ) for c in group ]) )
+        return batch
+
+    def dump_section( self, content:dict ):
+        self.dump(content)
+        while self._pending:
+            self.dump(self._batch())
+        self.dump(None)
+
+class _ComponentUnpickler( pickle.Unpickler ):
+    def __init__( self, file, arrays:list ):
+        """ arrays: the arrays of the container block in the order of its table """
+        super().__init__(file)
+        self._arrays = arrays
+
+    def find_class( self, module:str, name:str ):
+        """ Only the component classes and the numpy arrays """
+        cls = _classes.get((module, name))
+        if cls is not None:
+            return cls
+        if module == __name__ and name == "_shared_array":
+            return self._arrays.__getitem__
+        if (module, name) in _numpy_globals:
+            return super().find_class(module, name)
+        cls = _component_class(module, name)
+        if cls is None:
+            raise pickle.UnpicklingError(f"Sections only hold config components, {module}.{name} can't be loaded")
+        return cls
+
+    def load_section( self )->dict:
+        content = self.load()
+        while True:
+            batch = self.load()
+            if batch is None:
+                return content
+            for cls, names, components, rows in batch:
+                _restorer(cls, tuple(names))(components, rows)
+
+def pickle_section( content:dict, block:_ArrayBlock )->bytes:
+    """ Pickle a section of schema version 3, its arrays go to block and are pickled as their position in `block.table` """
+    buffer = io.BytesIO()
+    _ComponentPickler(buffer, block).dump_section(content)
+    return buffer.getvalue()
+
+def unpickle_section( section_bytes:bytes, arrays:list )->dict:
+    """ Section from `pickle_section`, arrays: the arrays read by `read_array_table` """
+    return _ComponentUnpickler(io.BytesIO(section_bytes), arrays).load_section()
+
+def read_array_table( block:bytearray, table:list )->list:
+    """
+    The arrays of the block in the order of `_ArrayBlock.table`, block is a bytearray to keep them writable.\n
+    The arrays saved as different objects with the same content are copied, they don't share their memory after loading.
+    """
+    arrays = []
+    read_offsets = set()
+    for ref in table:
+        array = _read_array(block, ref)
+        arrays.append(array.copy() if ref[0] in read_offsets else array)
+        read_offsets.add(ref[0])
+    return arrays
+
+
+# ===================== container file =====================
+def write_container( path, kind:str, sections:Dict[str,dict], attrs:dict=None ):
+    """
+    kind: "configuration" or "channel_info"\n
+    sections: {section name: content}, content is pickled by `pickle_section`.\n
+    The pickled sections are written one after another in sections.bin, the manifest keeps their (offset, size).
+    The arrays of all sections go to arrays.bin and the manifest keeps their table.
+    """
+    manifest = {
+        "format":FORMAT_NAME,
+        "schema_version":SCHEMA_VERSION,
+        "kind":kind,
+        "attrs":attrs if attrs is not None else {},
+        "sections":{},
+    }
+    block = _ArrayBlock()
+    chunks = []
+    offset = 0
+    for name, content in sections.items():
+        chunks.append(pickle_section(content, block))
+        manifest["sections"][name] = {"offset":offset, "size":len(chunks[-1])}
+        offset += len(chunks[-1])
+    manifest["arrays"] = block.table
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        # One entry for all sections, reading many small entries costs more than the sections of the other qubits
+        zf.writestr("sections.bin", b"".join(chunks))
+        # arrays don't shrink much by deflate, store them without compression
+        zf.writestr("arrays.bin", block.tobytes(), compress_type=zipfile.ZIP_STORED)
+        zf.writestr("manifest.json", json.dumps(manifest, indent=1))
+
+def encode_section( content:dict )->Tuple[bytes, bytes]:
+    """ return (section bytes, binary block of arrays) of a section """
+    block = _ArrayBlock()
+    buffer = io.BytesIO()
+    _SectionPickler(buffer, block).dump(content)
+    return buffer.getvalue(), block.tobytes()
+
+def decode_section( section_bytes:bytes, block:bytes=b"" )->dict:
+    """ Section from `encode_section`, or the JSON section of schema version 1 """
+    # bytearray keeps the loaded arrays writable
+    block = bytearray(block)
+    if section_bytes[:1] == b"{":
+        return _decode_json(json.loads(section_bytes), block)
+    return _SectionUnpickler(io.BytesIO(section_bytes), block).load()
+
+class ContainerReader:
+    def __init__( self, path ):
+        """
+        Open a container and read its manifest only, sections are read by `load_section()`.\n
+        Use as context manager or call `close()`.
+        """
+        self._zf = zipfile.ZipFile(path, "r")
+        self.manifest = json.loads(self._zf.read("manifest.json"))
+        if self.manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"{path} is not a {FORMAT_NAME} container")
+        version = self.manifest["schema_version"]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{path} has schema version {version}, this package only reads up to {SCHEMA_VERSION}")
+        self._loaded = {}
+        # sections.bin and the arrays of arrays.bin of schema version 3, read with the first section
+        self._section_bytes = None
+        self._arrays = None
+        # Old schema is upgraded after loading the sections
+        self._needs_migration = version < SCHEMA_VERSION
+
+    @property
+    def kind( self )->str:
+        return self.manifest["kind"]
+
+    @property
+    def sections( self )->List[str]:
+        return list(self.manifest["sections"].keys())
+
+    @property
+    def schema_version( self )->int:
+        return self.manifest["schema_version"]
+
+    def load_section( self, name:str )->dict:
+        if name not in self._loaded:
+            if self.schema_version >= 3:
+                if self._section_bytes is None:
+                    self._section_bytes = self._zf.read("sections.bin")
+                    self._arrays = read_array_table(bytearray(self._zf.read("arrays.bin")), self.manifest["arrays"])
+                place = self.manifest["sections"][name]
+                self._loaded[name] = unpickle_section(self._section_bytes[place["offset"]:place["offset"] +place["size"]], self._arrays)
+            else:
+                block = self._zf.read(f"arrays/{name}.bin") if self.manifest["sections"][name]["array_bytes"] else b""
+                suffix = "json" if self.schema_version == 1 else "pkl"
+                self._loaded[name] = decode_section(self._zf.read(f"sections/{name}.{suffix}"), block)
+        return self._loaded[name]
+
+    def load_sections( self, names:List[str]=None )->Dict[str,dict]:
+        """ names: None for all sections """
+        if names is None:
+            names = self.sections
+        sections = { name: self.load_section(name) for name in names if name in self.manifest["sections"] }
+        if self._needs_migration:
+            version = self.manifest["schema_version"]
+            while version < SCHEMA_VERSION:
+                _migrations[version](self.manifest, sections)
+                version += 1
+        return sections
+
+    def close( self ):
+        self._zf.close()
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, *args ):
+        self.close()
+
+def _selected_sections( reader:ContainerReader, qubits:List[str] )->List[str]:
+    if qubits is None:
+        return reader.sections
+    return [SHARED_SECTION] +[ q for q in qubits if q in reader.sections ]
+
+
+# ===================== Configuration =====================
+_config_parts = ["controllers","elements","pulses","waveforms","digital_waveforms","integration_weights","mixers"]
+
+def configuration_sections( config )->Tuple[Dict[str,dict], dict]:
+    """ Split `Configuration` into sections, return (sections, attrs) """
+    sections = {}
+    for part in _config_parts:
+        for name, component in getattr(config, f"_{part}").items():
+            section = sections.setdefault(section_of(name), { p: {} for p in _config_parts })
+            if part == "waveforms" and component.type == "arbitrary":
+                # Keep the samples in binary instead of the list in to_dict
+                section[part][name] = {"type":"arbitrary", "samples":np.asarray(component.sample), "dtype":component.dtype}
+            else:
+                section[part][name] = component.to_dict()[name]
+    attrs = {"version":config.version, "waveform_interning":getattr(config, "waveform_interning", True)}
+    # The gate sets of the XY elements aren't in their dicts
+    attrs["gate_sets"] = { name: element.gate_set for name, element in config._elements.items() if element.gate_set is not None }
+    return sections, attrs
+
+def configuration_from_sections( sections:Dict[str,dict], attrs:dict ):
+    """ Build `Configuration` from the sections made by `configuration_sections` """
+    from config_component.configuration import configuration_read_dict
+    config_dict = {"version":attrs["version"]}
+    for part in _config_parts:
+        config_dict[part] = {}
+        for content in sections.values():
+            config_dict[part].update(content[part])
+    config = configuration_read_dict(config_dict)
+    config.waveform_interning = attrs["waveform_interning"]
+    for name, gate_set in attrs.get("gate_sets", {}).items():
+        if name in config.elements:
+            config.elements[name].gate_set = gate_set
+    for name, wf_infos in config_dict["waveforms"].items():
+        if wf_infos.get("dtype", "float64") != "float64":
+            config.waveforms[name].dtype = wf_infos["dtype"]
+    return config
+
+def configuration_components( config )->Tuple[Dict[str,dict], dict]:
+    """ Split `Configuration` into sections of components, return (sections, attrs) """
+    sections = {}
+    for part in _config_parts:
+        for name, component in getattr(config, f"_{part}").items():
+            section_name = section_of(name)
+            if section_name not in sections:
+                sections[section_name] = { p: {} for p in _config_parts }
+            sections[section_name][part][name] = component
+    return sections, {"version":config.version, "waveform_interning":getattr(config, "waveform_interning", True)}
+
+def configuration_from_components( sections:Dict[str,dict], attrs:dict ):
+    """ `Configuration` holding the components of the sections made by `configuration_components` """
+    from config_component.configuration import Configuration
+    config = Configuration(attrs["version"])
+    config.version = attrs["version"]
+    config.waveform_interning = attrs["waveform_interning"]
+    for part in _config_parts:
+        components = getattr(config, f"_{part}")
+        for content in sections.values():
+            components.update(content[part])
+    return config
+
+def save_configuration( config, path ):
+    """ Save `Configuration` as container with one section per qubit. """
+    sections, attrs = configuration_components(config)
+    write_container(path, "configuration", sections, attrs)
+
+def load_configuration( path, qubits:List[str]=None ):
+    """
+    Load `Configuration` from container.\n
+    qubits: ["q0","q3"] to load only the components of these qubits and the shared ones, None for all.
+    """
+    with ContainerReader(path) as reader:
+        if reader.kind != "configuration":
+            raise ValueError(f"{path} contains {reader.kind}, not configuration")
+        sections = reader.load_sections(_selected_sections(reader, qubits))
+        attrs = reader.manifest["attrs"]
+        if reader.schema_version < 3:
+            return configuration_from_sections(sections, attrs)
+    return configuration_from_components(sections, attrs)
+
+
+# ===================== ChannelInfo =====================
+_spec_parts = ["RoInfo","XyInfo","ZInfo","DecoInfo","WireInfo","HardwareInfo"]
+_register_keys = ["registered","register"]
+
+def channel_info_sections( spec )->Tuple[Dict[str,dict], dict]:
+    """ Split `ChannelInfo` into sections, return (sections, attrs) """
+    sections = {SHARED_SECTION:{ part: {} for part in _spec_parts }}
+    for part in _spec_parts:
+        info = getattr(spec, f"_{part}")
+        # the views of `ParameterTable` give a dict copy
+        info = info.to_dict() if hasattr(info, "to_dict") else info
+        for key, val in info.items():
+            section_name = section_of(key) if part != "HardwareInfo" else SHARED_SECTION
+            if section_name != SHARED_SECTION and key != section_name:
+                section_name = SHARED_SECTION
+            section = sections.setdefault(section_name, { p: {} for p in _spec_parts })
+            section[part][key] = val
+    return sections, {"q_num":spec.q_num}
+
+def channel_info_from_sections( sections:Dict[str,dict], attrs:dict, qubits:List[str]=None ):
+    """
+    Build `ChannelInfo` from the sections made by `channel_info_sections`.\n
+    qubits: the register lists are filtered to these qubits, None to keep them.
+    """
+    from config_component.channel_info import ChannelInfo
+    spec = ChannelInfo()
+    spec.q_num = attrs["q_num"]
+    for part in _spec_parts:
+        info = {}
+        for content in sections.values():
+            info.update(content[part])
+        if qubits is not None:
+            for key in _register_keys:
+                if key in info:
+                    info[key] = [ q for q in info[key] if q in qubits ]
+        setattr(spec, f"_{part}", info)
+    return spec
+
+def save_channel_info( spec, path ):
+    """ Save `ChannelInfo` as container with one section per qubit. """
+    sections, attrs = channel_info_sections(spec)
+    write_container(path, "channel_info", sections, attrs)
+
+def load_channel_info( path, qubits:List[str]=None ):
+    """
+    Load `ChannelInfo` from container.\n
+    qubits: ["q0","q3"] to load only these qubits, the register lists are filtered to the loaded qubits. None for all.
+    """
+    with ContainerReader(path) as reader:
+        if reader.kind != "channel_info":
+            raise ValueError(f"{path} contains {reader.kind}, not channel_info")
+        sections = reader.load_sections(_selected_sections(reader, qubits))
+        attrs = reader.manifest["attrs"]
+    return channel_info_from_sections(sections, attrs, qubits)
+
+
+# ===================== Migration =====================
+def migrate_pickle( pkl_path, new_path ):
+    """
+    Convert a pickle file from `export_config` or `export_spec` to container.\n
+    The kind of object is detected from the pickle content.
+    """
+    import pickle
+    with open(pkl_path, "rb") as fp:
+        obj = pickle.load(fp)
+    if isinstance(obj, dict) and "RoInfo" in obj:
+        from config_component.channel_info import import_spec
+        save_channel_info(import_spec(pkl_path), new_path)
+        return "channel_info"
+    save_configuration(obj, new_path)
+    return "configuration"
@@ -0,0 +1,200 @@
+from contextlib import contextmanager
+from typing import List
+
+import numpy as np
+
+from config_component.channel_info import ChannelInfo, SpecChangeEvent
+from config_component.configuration import Configuration
+from config_component.construct import create_roChannel, create_xyChannel, create_zChannel, set_optimal_weights
+from config_component.update import mixer_channel_of, update_controlWaveform
+
+# XyInfo fields shaping the native gate envelopes
+_envelope_fields = {"pi_amp","pi_len","drag_coef","anharmonicity","AC_stark_detuning","waveform_func","pi_ampScale/90","pi_ampScale/180"}
+
+class SpecPropagator:
+    def __init__( self, config:Configuration, spec:ChannelInfo ):
+        """
+        Keep config in sync with spec by the change events of `ChannelInfo.update_*_for`.\n
+        Each event only changes the config parts depending on the changed field,
+        ex. a qubit IF changes the element and its mixer channel, a pi amplitude rebuilds the gate waveforms of that qubit.\n
+        Use `with propagator.batch():` to merge the events of several updates, a qubit's waveforms are rebuilt once.
+        """
+        self.config = config
+        self.spec = spec
+        self._deferred = None
+        # events which don't change config, ex. T1 or OFFbias
+        self.ignored = []
+        spec.subscribe(self.on_event)
+
+    def detach( self ):
+        """ Stop following the spec """
+        self.spec.unsubscribe(self.on_event)
+
+    def on_event( self, event:SpecChangeEvent ):
+        if self._deferred is not None:
+            self._deferred.append(event)
+        else:
+            self.apply([event])
+
+    @contextmanager
+    def batch( self ):
+        """ Collect the events in the block and apply them together at the end """
+        if self._deferred is not None:
+            # nested batch joins the outer one
+            yield
+            return
+        self._deferred = []
+        try:
+            yield
+        finally:
+            events, self._deferred = self._deferred, None
+            self.apply(events)
+
+    def apply( self, events:List[SpecChangeEvent] ):
+        rebuild_xy = []
+        readout_weights = []
+        for event in events:
+            if event.old is event.new or _equal(event.old, event.new):
+                continue
+            match event.info:
+                case "XyInfo":
+                    if event.field in _envelope_fields:
+                        if event.qubit not in rebuild_xy:
+                            rebuild_xy.append(event.qubit)
+                    else:
+                        self._apply_xy(event)
+                case "RoInfo":
+                    if event.field in ["readout_len", "rotated", "RO_weights/rotated"]:
+                        if event.qubit not in readout_weights:
+                            readout_weights.append(event.qubit)
+                    else:
+                        self._apply_ro(event)
+                case "ZInfo":
+                    self._apply_z(event)
+                case "WireInfo":
+                    self._apply_wire(event)
+                case _:
+                    self.ignored.append(event)
+
+        for q in rebuild_xy:
+            update_controlWaveform(self.config, self.spec._XyInfo, q)
+        for q in readout_weights:
+            self._update_readout_length(q)
+
+    # ===================== XY =====================
+    def _apply_xy( self, event:SpecChangeEvent ):
+        element_name = f"{event.qubit}_xy"
+        match event.field:
+            case "qubit_IF":
+                _set_frequency(self.config, element_name, intermediate_frequency=event.new)
+            case "qubit_LO":
+                _set_frequency(self.config, element_name, lo_frequency=event.new)
+            case "const_amp":
+                self.config.waveforms[f"{element_name}_const_wf"].sample = event.new
+            case _:
+                self.ignored.append(event)
+
+    # ===================== RO =====================
+    def _apply_ro( self, event:SpecChangeEvent ):
+        element_name = f"{event.qubit}_ro"
+        match event.field:
+            case "resonator_IF":
+                _set_frequency(self.config, element_name, intermediate_frequency=event.new)
+            case "resonator_LO":
+                _set_frequency(self.config, element_name, lo_frequency=event.new)
+            case "readout_amp":
+                self.config.waveforms[f"{element_name}_readout_wf"].sample = event.new
+            case "time_of_flight":
+                self.config.elements[element_name].time_of_flight = event.new
+            case "RO_weights/optimal":
+                if event.new != {}:
+                    pulse = self.config.pulses[self.config.elements[element_name].operations["readout"]]
+                    set_optimal_weights(self.config, element_name, pulse, event.new)
+            case "offset":
+                wire = self.spec._WireInfo[event.qubit]
+                for port, offset in zip([wire["rin_I"], wire["rin_Q"]], event.new):
+                    con_name, ch_idx = port
+                    self.config.controllers[con_name].analog_inputs[ch_idx]["offset"] = offset
+            case _:
+                self.ignored.append(event)
+
+    def _update_readout_length( self, q:str ):
+        """ Readout pulse length, the rotated weights and the optimal weights follow readout_len and the rotation angle """
+        ro_info = self.spec._RoInfo[q]
+        element_name = f"{q}_ro"
+        length = ro_info["readout_len"]
+        angle = ro_info["rotated"] if "rotated" in ro_info else ro_info["RO_weights"]["rotated"]
+        pulse = self.config.pulses[self.config.elements[element_name].operations["readout"]]
+        length_changed = pulse.length != length
+        pulse.length = length
+        w_name = f"{element_name}_rotated_weight_"
+        for weight_name, cos_w, sin_w in [("cos", np.cos(angle), np.sin(angle)), ("sin", -np.sin(angle), np.cos(angle)), ("minus_sin", np.sin(angle), -np.cos(angle))]:
+            self.config.integration_weights[w_name+weight_name].cosine = [(cos_w, length)]
+            self.config.integration_weights[w_name+weight_name].sine = [(sin_w, length)]
+        optimal_weights = ro_info["RO_weights"].get("optimal", {}) if "RO_weights" in ro_info else {}
+        if length_changed and optimal_weights != {}:
+            set_optimal_weights(self.config, element_name, pulse, optimal_weights)
+
+    # ===================== Z =====================
+    def _apply_z( self, event:SpecChangeEvent ):
+        if event.qubit is None:
+            self.ignored.append(event)
+            return
+        element_name = f"{event.qubit}_z"
+        con_name, ch_idx = self.spec._WireInfo[event.qubit]["z"]
+        z_output = self.config.controllers[con_name].analog_outputs[ch_idx]
+        match event.field:
+            case "const_flux_len":
+                self.config.pulses[f"{element_name}_const_flux_pulse"].length = event.new
+            case "const_flux_amp":
+                self.config.waveforms[f"{element_name}_const_flux_wf"].sample = event.new
+            case "offset":
+                z_output.offset = event.new
+            case "crosstalk":
+                z_output.crosstalk = event.new
+            case "filter":
+                z_output.filter = event.new
+            case _:
+                self.ignored.append(event)
+
+    # ===================== Wiring =====================
+    def _apply_wire( self, event:SpecChangeEvent ):
+        """ Ports and mixers are part of the element structure, the channel of the qubit is built again """
+        q = event.qubit
+        wire = self.spec._WireInfo[q]
+        if event.field in ["ro_mixer", "rin_I", "rin_Q", "rout_I", "rout_Q"]:
+            element_name, builder, info = f"{q}_ro", create_roChannel, self.spec._RoInfo[q]
+        elif event.field in ["xy_mixer", "xy_I", "xy_Q"]:
+            element_name, builder, info = f"{q}_xy", create_xyChannel, self.spec._XyInfo[q]
+        else:
+            element_name, builder, info = f"{q}_z", create_zChannel, self.spec._ZInfo[q]
+
+        old_mixer = None
+        if event.field.endswith("_mixer"):
+            old_mixer = self.config.mixers.get(event.old)
+            if old_mixer is not None and element_name in old_mixer.elements:
+                old_mixer.remove_channel(element_name)
+        builder(self.config, element_name, info, wire)
+        # The mixer left without channels is removed with its last element
+        if old_mixer is not None and len(old_mixer.iFChannels) == 0 and event.old != event.new:
+            if not any( e.input_map is not None and getattr(e.input_map, "mixer", None) == event.old for e in self.config.elements.values() ):
+                del self.config.mixers[event.old]
+
+def _equal( old, new )->bool:
+    try:
+        return bool(old == new)
+    except ValueError:
+        # arrays
+        return False
+
+def _set_frequency( config:Configuration, element_name:str, lo_frequency:int=None, intermediate_frequency:int=None ):
+    """ Change the element and its mixer channel together """
+    # The channel is found by the frequencies before the change
+    channel = mixer_channel_of(config, element_name)
+    element = config.elements[element_name]
+    if lo_frequency is not None:
+        element.input_map.lo_frequency = lo_frequency
+        channel.lo_frequency = lo_frequency
+    if intermediate_frequency is not None:
+        element.intermediate_frequency = intermediate_frequency
+        channel.intermediate_frequency = intermediate_frequency
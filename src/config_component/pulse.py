@@ -1,4 +1,7 @@
-class Waveform:
+from config_component.cached_component import CachedComponent, Field, build_serializer
+
+class Waveform( CachedComponent ):
+    __slots__ = ("_I", "_Q", "_single")
     def __init__( self ):
         """
         The waveform in Pulse
@@ -31,20 +34,14 @@ class Waveform:
     def single( self, val:str ):
         self._single = val
         
-    def to_dict( self ):
-
-        output_dict = {}        
-
-        if self.I != None:
-            output_dict["I"] = self.I
-        if self.Q != None:
-            output_dict["Q"] = self.Q
-        if self.single != None:
-            output_dict["single"] = self.single
-
-        return output_dict
+    _build_dict = build_serializer( (
+        Field("I", "_I", "not_none"),
+        Field("Q", "_Q", "not_none"),
+        Field("single", "_single", "not_none"),
+    ) )
     
-class Pulse:
+class Pulse( CachedComponent ):
+    __slots__ = ("_name", "_operation", "_length", "_waveforms", "_integration_weights", "_digital_marker")
     def __init__(self, name:str ):
         """
         The Pulse part of configuration
@@ -73,6 +70,7 @@ class Pulse:
        
     @property
     def waveforms( self )->Waveform:
+        """ Changes on the returned Waveform are tracked by itself """
         return self._waveforms
     @waveforms.setter
     def waveforms( self, val:Waveform ):
@@ -87,26 +85,22 @@ class Pulse:
         "rotated_minus_sin": "rotated_minus_sine_weights_q1"\n
         }
         """
+        self.mark_dirty()
         return self._integration_weights
     @integration_weights.setter
     def integration_weights( self, val:dict ):
         self._integration_weights = val
 
-    def to_dict( self ):
-
-        output_dict = {
-            "operation":self.operation,
-            "length": self.length,
-            "waveforms": self.waveforms.to_dict(),
-        }        
-        if len(self._integration_weights) != 0:
-            output_dict.update( {"integration_weights":self._integration_weights} )
-        if len(self._digital_marker) != 0:
-            output_dict.update( {"digital_marker":self._digital_marker} )
+    def _sub_components( self )->list:
+        return [self._waveforms]
 
-        return {
-            self._name:output_dict
-        }
+    _build_dict = build_serializer( (
+        Field("operation", "_operation"),
+        Field("length", "_length"),
+        Field("waveforms", "_waveforms", "component"),
+        Field("integration_weights", "_integration_weights", "not_empty"),
+        Field("digital_marker", "_digital_marker", "not_empty"),
+    ), key_attr="_name" )
  
 def pulse_read_dict( name:str, infos:dict )-> Pulse:
     """
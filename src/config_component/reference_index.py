@@ -0,0 +1,167 @@
+from typing import List, Set, Tuple
+
+# (kind, name) of a config component, kind is the key of the part in config dict
+ComponentKey = Tuple[str, str]
+
+class ReferenceIndex:
+    def __init__( self, config_dict:dict ):
+        """
+        Bidirectional index of the string references in the config dict:\n
+        elements -> pulses, mixers\n
+        pulses -> waveforms, integration_weights, digital_waveforms\n
+        Lookups are dict access, build it again after the config structure is changed.\n
+        The optional keys QM accepts without, ex. "operations" of an element, may be missing,
+        `validate_config` reports the missing required ones.
+        """
+        self._config = config_dict
+        self._references = {}   # user -> set of used components
+        self._users = {}        # used component -> set of users
+
+        for e_name, e_info in config_dict.get("elements", {}).items():
+            user = ("elements", e_name)
+            for pulse_name in e_info.get("operations", {}).values():
+                self._add( user, ("pulses", pulse_name) )
+            if e_info.get("mixInputs", {}).get("mixer") is not None:
+                self._add( user, ("mixers", e_info["mixInputs"]["mixer"]) )
+
+        for p_name, p_info in config_dict.get("pulses", {}).items():
+            user = ("pulses", p_name)
+            for wf_name in p_info.get("waveforms", {}).values():
+                self._add( user, ("waveforms", wf_name) )
+            for w_name in p_info.get("integration_weights", {}).values():
+                self._add( user, ("integration_weights", w_name) )
+            if "digital_marker" in p_info:
+                self._add( user, ("digital_waveforms", p_info["digital_marker"]) )
+
+    def _add( self, user:ComponentKey, used:ComponentKey ):
+        self._references.setdefault(user, set()).add(used)
+        self._users.setdefault(used, set()).add(user)
+
+    def users_of( self, kind:str, name:str )->Set[ComponentKey]:
+        """ ex. users_of("waveforms", "q0_xy_x180_wf_I") -> {("pulses","q0_xy_x180_pulse")} """
+        return self._users.get((kind, name), set())
+
+    def references_of( self, kind:str, name:str )->Set[ComponentKey]:
+        """ ex. references_of("pulses", "q0_ro_readout_pulse") -> waveforms, weights and digital marker it uses """
+        return self._references.get((kind, name), set())
+
+    def unreferenced( self, kind:str )->List[str]:
+        """ Names in the config part `kind` which are not used by anything """
+        return [ name for name in self._config.get(kind, {}) if (kind, name) not in self._users ]
+
+    def dangling( self )->List[Tuple[ComponentKey, ComponentKey]]:
+        """ (user, missing component) for the references to components not in config """
+        missing = []
+        for used, users in self._users.items():
+            kind, name = used
+            if name not in self._config.get(kind, {}):
+                for user in users:
+                    missing.append( (user, used) )
+        return missing
+
+def validate_config( config_dict:dict, index:ReferenceIndex=None )->List[str]:
+    """
+    Local check of the config dict before it is sent to QOP, return the list of problems.\n
+    Checks the references, ports, mixer (IF, LO) pairs, pulse and waveform lengths, integration weight lengths and amplitude in the range of the output ports.
+    """
+    if index is None:
+        index = ReferenceIndex(config_dict)
+    problems = []
+
+    for (user_kind, user_name), (kind, name) in index.dangling():
+        problems.append(f"{user_kind} '{user_name}' uses {kind} '{name}' which doesn't exist")
+
+    controllers = config_dict.get("controllers", {})
+    mixers = config_dict.get("mixers", {})
+    def port_info( port, port_type:str )->dict:
+        """ Settings of (controller, port) or (controller, FEM, port), None if the port isn't in controllers """
+        if len(port) == 3:
+            con_name, fem, ch = port
+            fems = controllers.get(con_name, {}).get("fems", {})
+            ports = fems.get(fem, fems.get(str(fem), {})).get(port_type, {})
+        else:
+            con_name, ch = port
+            ports = controllers.get(con_name, {}).get(port_type, {})
+        # port index is str after json
+        return ports.get(ch, ports.get(str(ch)))
+
+    def output_range( port )->float:
+        """ Max amplitude of the analog output, an LF-FEM output in amplified mode goes to 2.5 V """
+        info = port_info(port, "analog_outputs")
+        if isinstance(info, dict) and info.get("output_mode") == "amplified":
+            return 2.5
+        return 0.5
+
+    # pulse name -> max amplitude of the outputs playing it
+    pulse_ranges = {}
+    for e_name, e_info in config_dict.get("elements", {}).items():
+        if "singleInput" in e_info:
+            ports = [e_info["singleInput"]["port"]]
+        elif "mixInputs" in e_info:
+            ports = [e_info["mixInputs"]["I"], e_info["mixInputs"]["Q"]]
+            mixer_name = e_info["mixInputs"].get("mixer")
+            if mixer_name in mixers:
+                pair = (e_info.get("intermediate_frequency"), e_info["mixInputs"].get("lo_frequency"))
+                channels = [ (ch["intermediate_frequency"], ch["lo_frequency"]) for ch in mixers[mixer_name] ]
+                if pair not in channels:
+                    problems.append(f"mixer '{mixer_name}' has no correction for element '{e_name}' with (IF, LO)={pair}")
+        else:
+            ports = []
+        for port in ports:
+            if port_info(port, "analog_outputs") is None:
+                problems.append(f"element '{e_name}' uses analog output {tuple(port)} which isn't in controllers")
+        for out_port in e_info.get("outputs", {}).values():
+            if port_info(out_port, "analog_inputs") is None:
+                problems.append(f"element '{e_name}' uses analog input {tuple(out_port)} which isn't in controllers")
+        if len(ports) != 0:
+            e_range = min( output_range(port) for port in ports )
+            for pulse_name in e_info.get("operations", {}).values():
+                pulse_ranges[pulse_name] = max( pulse_ranges.get(pulse_name, 0.), e_range )
+
+    waveforms = config_dict.get("waveforms", {})
+    weights = config_dict.get("integration_weights", {})
+    for p_name, p_info in config_dict.get("pulses", {}).items():
+        missing = [ key for key in ["operation","length","waveforms"] if key not in p_info ]
+        if len(missing) != 0:
+            problems.append(f"pulse '{p_name}' has no {', '.join(missing)}")
+            continue
+        length = p_info["length"]
+        if length < 16 or length %4 != 0:
+            problems.append(f"pulse '{p_name}' length {length} should be >= 16 and a multiple of 4")
+        # A pulse no element plays isn't checked for amplitude
+        limit = pulse_ranges.get(p_name)
+        for wf_name in p_info["waveforms"].values():
+            wf_info = waveforms.get(wf_name)
+            if wf_info is None:
+                continue
+            if wf_info["type"] == "arbitrary":
+                samples = wf_info["samples"]
+                if len(samples) != length:
+                    problems.append(f"pulse '{p_name}' length {length} doesn't match {len(samples)} samples of waveform '{wf_name}'")
+                if limit is not None and len(samples) != 0 and (max(samples) > limit or min(samples) < -limit):
+                    problems.append(f"waveform '{wf_name}' is out of range [-{limit}, {limit}]")
+            elif limit is not None and abs(wf_info["sample"]) > limit:
+                problems.append(f"waveform '{wf_name}' is out of range [-{limit}, {limit}]")
+        # A measurement pulse without weights is valid, ex. for raw ADC traces
+        for w_name in p_info.get("integration_weights", {}).values():
+            w_info = weights.get(w_name)
+            if w_info is None:
+                continue
+            for part in ["cosine","sine"]:
+                if part not in w_info:
+                    problems.append(f"integration weight '{w_name}' has no {part}")
+                    continue
+                w_len = integration_weight_length( w_info[part] )
+                if w_len != length:
+                    problems.append(f"integration weight '{w_name}' {part} length {w_len} doesn't match pulse '{p_name}' length {length}")
+
+    return problems
+
+def integration_weight_length( weights:list )->int:
+    """
+    Length in ns of the cosine or sine part of an integration weight,\n
+    [(value, length), ...] segments or a list of values for every 4 ns.
+    """
+    if len(weights) != 0 and isinstance(weights[0], (list, tuple)):
+        return sum( seg[1] for seg in weights )
+    return 4*len(weights)
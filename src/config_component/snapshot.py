@@ -0,0 +1,286 @@
+"""
+Local history of the saved `Configuration` and `ChannelInfo`.\n
+Every snapshot is split into the per-qubit sections of `persistence`, each section is saved once as
+a zlib compressed chunk named by its sha256. Snapshots only keep the chunk names, so a snapshot after
+changing one qubit costs the chunks of that qubit.\n
+    <root>/chunks/ab/cdef...    : compressed chunks\n
+    <root>/snapshots/<id>.json  : time, message and the chunk names of the sections changed from the previous snapshot
+"""
+from typing import Dict, List, Tuple
+import hashlib
+import json
+import os
+import time
+import zlib
+
+from config_component.persistence import (
+    SHARED_SECTION, encode_section, decode_section,
+    configuration_sections, configuration_from_sections,
+    channel_info_sections, channel_info_from_sections,
+)
+
+_kinds = ["config","spec"]
+# 128 bits of sha256 for the chunk names, the snapshot records are mostly these names
+_DIGEST_LEN = 32
+# A snapshot keeps all its sections after this number of snapshots keeping only the changed ones
+_KEYFRAME_INTERVAL = 50
+
+class SnapshotStore:
+    def __init__( self, root ):
+        """
+        root: folder of the store, created if it doesn't exist.
+        """
+        self.root = str(root)
+        self._chunk_dir = os.path.join(self.root, "chunks")
+        self._snapshot_dir = os.path.join(self.root, "snapshots")
+        os.makedirs(self._chunk_dir, exist_ok=True)
+        os.makedirs(self._snapshot_dir, exist_ok=True)
+        # Chunks, records and section lists read in this session
+        self._chunk_cache = {}
+        self._records = {}
+        self._resolved = {}
+
+    # ===================== chunks =====================
+    def _chunk_path( self, digest:str )->str:
+        return os.path.join(self._chunk_dir, digest[:2], digest[2:])
+
+    def _put_chunk( self, data:bytes )->Tuple[str, int]:
+        """ return (chunk name, bytes written), nothing is written if the chunk exists """
+        digest = hashlib.sha256(data).hexdigest()[:_DIGEST_LEN]
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, 6)
+        _atomic_write(path, compressed)
+        return digest, len(compressed)
+
+    def _get_chunk( self, digest:str )->bytes:
+        if digest not in self._chunk_cache:
+            with open(self._chunk_path(digest), "rb") as f:
+                self._chunk_cache[digest] = zlib.decompress(f.read())
+        return self._chunk_cache[digest]
+
+    def _put_sections( self, sections:Dict[str,dict] )->Tuple[Dict[str,list], int]:
+        refs = {}
+        written = 0
+        for name, content in sections.items():
+            json_bytes, block = encode_section(content)
+            json_digest, n_json = self._put_chunk(json_bytes)
+            refs[name] = [json_digest]
+            written += n_json
+            if len(block):
+                block_digest, n_block = self._put_chunk(block)
+                refs[name].append(block_digest)
+                written += n_block
+        return refs, written
+
+    def _get_sections( self, refs:Dict[str,list], names:List[str]=None )->Dict[str,dict]:
+        if names is None:
+            names = list(refs.keys())
+        sections = {}
+        for name in names:
+            if name in refs:
+                chunks = [ self._get_chunk(digest) for digest in refs[name] ]
+                sections[name] = decode_section(*chunks)
+        return sections
+
+    # ===================== snapshots =====================
+    def save( self, config=None, spec=None, message:str="" )->str:
+        """
+        Record the current state of config and/or spec, return the snapshot id.\n
+        The id is the time with a short hash of the content, ex. "20240510-153012.123456-1a2b3c4d".
+        """
+        ids = self.ids()
+        # ids are sorted by time, keep it increasing for the snapshots saved in the same microsecond
+        now_us = int(time.time()*1e6)
+        if len(ids) != 0:
+            now_us = max(now_us, round(self._record(ids[-1])["time"]*1e6) +1)
+        record = {"time":now_us/1e6, "message":message, "bytes_written":0}
+        full_refs = {}
+        for kind, obj, splitter in [("config", config, configuration_sections), ("spec", spec, channel_info_sections)]:
+            if obj is None:
+                continue
+            sections, attrs = splitter(obj)
+            refs, written = self._put_sections(sections)
+            record[kind] = {"attrs":attrs, **self._delta_to_parent(kind, refs)}
+            record["bytes_written"] += written
+            full_refs[kind] = refs
+
+        content_hash = hashlib.sha256(json.dumps([full_refs.get(k) for k in _kinds], sort_keys=True).encode()).hexdigest()
+        snapshot_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(now_us//1_000_000)) +f".{now_us%1_000_000:06d}-{content_hash[:8]}"
+        record["id"] = snapshot_id
+        self._write_record(record)
+        for kind, refs in full_refs.items():
+            self._resolved[(snapshot_id, kind)] = refs
+        return snapshot_id
+
+    def _delta_to_parent( self, kind:str, refs:Dict[str,list] )->dict:
+        """
+        Most snapshots change a few sections, so a record keeps only the sections changed from the
+        previous snapshot (parent). Every `_KEYFRAME_INTERVAL` snapshots keep all sections.
+        """
+        for parent_id in reversed(self.ids()):
+            parent = self._record(parent_id)
+            if kind in parent:
+                break
+        else:
+            return {"parent":None, "depth":0, "sections":refs}
+        depth = parent[kind]["depth"] +1
+        if depth >= _KEYFRAME_INTERVAL:
+            return {"parent":None, "depth":0, "sections":refs}
+        parent_refs = self._refs(parent_id, kind)
+        changed = { name: r for name, r in refs.items() if parent_refs.get(name) != r }
+        changed.update({ name: None for name in parent_refs if name not in refs })
+        return {"parent":parent_id, "depth":depth, "sections":changed}
+
+    def _write_record( self, record:dict ):
+        _atomic_write(os.path.join(self._snapshot_dir, f"{record['id']}.json"), json.dumps(record, separators=(",",":")).encode())
+        self._records[record["id"]] = record
+
+    def _record( self, snapshot_id:str )->dict:
+        if snapshot_id in self._records:
+            return self._records[snapshot_id]
+        path = os.path.join(self._snapshot_dir, f"{snapshot_id}.json")
+        if not os.path.exists(path):
+            # accept the unique prefix of an id
+            matched = [ i for i in self.ids() if i.startswith(snapshot_id) ]
+            if len(matched) != 1:
+                raise KeyError(f"No unique snapshot with id '{snapshot_id}' in {self.root}")
+            return self._record(matched[0])
+        with open(path, "r") as f:
+            record = json.load(f)
+        self._records[record["id"]] = record
+        return record
+
+    def _refs( self, snapshot_id:str, kind:str )->Dict[str,list]:
+        """ {section: chunk names} of kind in the snapshot, the changes are applied on the parent """
+        record = self._record(snapshot_id)
+        key = (record["id"], kind)
+        if key not in self._resolved:
+            if kind not in record:
+                return {}
+            entry = record[kind]
+            if entry["parent"] is None:
+                refs = entry["sections"]
+            else:
+                refs = dict(self._refs(entry["parent"], kind))
+                for name, r in entry["sections"].items():
+                    if r is None:
+                        refs.pop(name, None)
+                    else:
+                        refs[name] = r
+            self._resolved[key] = refs
+        return self._resolved[key]
+
+    def ids( self )->List[str]:
+        """ Snapshot ids from old to new """
+        return sorted( name[:-5] for name in os.listdir(self._snapshot_dir) if name.endswith(".json") )
+
+    def latest( self )->str:
+        ids = self.ids()
+        if len(ids) == 0:
+            raise KeyError(f"No snapshot in {self.root}")
+        return ids[-1]
+
+    def list( self )->List[dict]:
+        """ id, time, message and the saved kinds of the snapshots from old to new """
+        snapshots = []
+        for snapshot_id in self.ids():
+            record = self._record(snapshot_id)
+            snapshots.append({
+                "id":snapshot_id,
+                "time":time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["time"])),
+                "message":record["message"],
+                "kinds":[ k for k in _kinds if k in record ],
+                "bytes_written":record["bytes_written"],
+            })
+        return snapshots
+
+    def restore( self, snapshot_id:str=None, qubits:List[str]=None ):
+        """
+        Rebuild (config, spec) of the snapshot, the one not saved in the snapshot is None.\n
+        snapshot_id: None for the latest one.\n
+        qubits: ["q0","q3"] to restore only these qubits, None for all.
+        """
+        record = self._record(snapshot_id if snapshot_id is not None else self.latest())
+        names = None if qubits is None else [SHARED_SECTION] +list(qubits)
+        config, spec = None, None
+        if "config" in record:
+            sections = self._get_sections(self._refs(record["id"], "config"), names)
+            config = configuration_from_sections(sections, record["config"]["attrs"])
+        if "spec" in record:
+            sections = self._get_sections(self._refs(record["id"], "spec"), names)
+            spec = channel_info_from_sections(sections, record["spec"]["attrs"], qubits)
+        return config, spec
+
+    def diff( self, old_id:str, new_id:str=None )->dict:
+        """
+        Compare two snapshots, new_id None for the latest one.\n
+        return {"config": changed sections, "spec": changed sections, "config_diff": `ConfigDiff` of the changed config sections}\n
+        Unchanged sections have the same chunks and are skipped without loading.
+        """
+        from config_component.config_diff import diff_config
+        old_record = self._record(old_id)
+        new_record = self._record(new_id if new_id is not None else self.latest())
+        result = {}
+        for kind in _kinds:
+            old_refs = self._refs(old_record["id"], kind)
+            new_refs = self._refs(new_record["id"], kind)
+            result[kind] = sorted( name for name in old_refs.keys() | new_refs.keys() if old_refs.get(name) != new_refs.get(name) )
+
+        config_diff = None
+        if "config" in old_record and "config" in new_record:
+            changed = result["config"]
+            old_config = configuration_from_sections(self._get_sections(self._refs(old_record["id"], "config"), changed), old_record["config"]["attrs"])
+            new_config = configuration_from_sections(self._get_sections(self._refs(new_record["id"], "config"), changed), new_record["config"]["attrs"])
+            config_diff = diff_config(old_config._component_dict(), new_config._component_dict())
+        result["config_diff"] = config_diff
+        return result
+
+    def delete( self, snapshot_id:str ):
+        """ Remove the snapshot record, chunks used by no snapshot are removed by `prune()` """
+        record = self._record(snapshot_id)
+        # The snapshots built on this one keep all their sections from now on
+        for other_id in self.ids():
+            other = self._record(other_id)
+            rewrite = False
+            for kind in _kinds:
+                if kind in other and other[kind]["parent"] == record["id"]:
+                    other[kind] = {"attrs":other[kind]["attrs"], "parent":None, "depth":0, "sections":self._refs(other_id, kind)}
+                    rewrite = True
+            if rewrite:
+                self._write_record(other)
+        os.remove(os.path.join(self._snapshot_dir, f"{record['id']}.json"))
+        del self._records[record["id"]]
+        for kind in _kinds:
+            self._resolved.pop((record["id"], kind), None)
+
+    def prune( self )->int:
+        """ Remove the chunks which no snapshot uses, return the number of removed chunks """
+        used = set()
+        for snapshot_id in self.ids():
+            for kind in _kinds:
+                for refs in self._refs(snapshot_id, kind).values():
+                    used.update(refs)
+        removed = 0
+        for sub_dir in os.listdir(self._chunk_dir):
+            for name in os.listdir(os.path.join(self._chunk_dir, sub_dir)):
+                if sub_dir+name not in used:
+                    os.remove(os.path.join(self._chunk_dir, sub_dir, name))
+                    self._chunk_cache.pop(sub_dir+name, None)
+                    removed += 1
+        return removed
+
+    def disk_usage( self )->int:
+        """ Total bytes of chunks and snapshot records """
+        total = 0
+        for folder, _, files in os.walk(self.root):
+            total += sum( os.path.getsize(os.path.join(folder, f)) for f in files )
+        return total
+
+def _atomic_write( path:str, data:bytes ):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,361 @@
+import contextlib
+import copy
+import io
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from config_component.channel_info import ChannelInfo, SpecChangeEvent
+from config_component.config_diff import ConfigDiff, diff_config
+from config_component.config_hash import canonical_bytes
+from config_component.configuration import Configuration
+from config_component.construct import create_qubits
+from config_component.controller import Analog_output, Controller
+from config_component.propagation import SpecPropagator
+
+# ================= JSON patch (RFC 6902) =========================
+def _pointer_keys( pointer:str )->List[str]:
+    """ Keys of a JSON pointer (RFC 6901), "" is the whole document """
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"JSON pointer '{pointer}' should start with '/'")
+    return [ key.replace("~1", "/").replace("~0", "~") for key in pointer[1:].split("/") ]
+
+def _child_key( container, key:str, pointer:str, allow_end:bool=False ):
+    """ key as the index of a list or the key of a dict """
+    if isinstance(container, list):
+        if allow_end and key == "-":
+            return len(container)
+        if not key.isdigit() or (key != "0" and key.startswith("0")):
+            raise KeyError(f"'{key}' in '{pointer}' is not a list index")
+        index = int(key)
+        if index > len(container) or (index == len(container) and not allow_end):
+            raise KeyError(f"Index {index} in '{pointer}' is out of range")
+        return index
+    if isinstance(container, dict):
+        return key
+    raise KeyError(f"'{pointer}' goes through a value which is not a list or dict")
+
+def _resolve( document, pointer:str ):
+    """ (parent container, key) of the pointer, parent is None for the whole document """
+    keys = _pointer_keys(pointer)
+    if len(keys) == 0:
+        return None, None
+    parent = document
+    for key in keys[:-1]:
+        child_key = _child_key(parent, key, pointer)
+        if isinstance(parent, dict) and child_key not in parent:
+            raise KeyError(f"'{pointer}' doesn't exist")
+        parent = parent[child_key]
+    return parent, keys[-1]
+
+def _get( document, pointer:str ):
+    parent, key = _resolve(document, pointer)
+    if parent is None:
+        return document
+    child_key = _child_key(parent, key, pointer)
+    if isinstance(parent, dict) and child_key not in parent:
+        raise KeyError(f"'{pointer}' doesn't exist")
+    return parent[child_key]
+
+def _add( document, pointer:str, value ):
+    parent, key = _resolve(document, pointer)
+    if parent is None:
+        return value
+    child_key = _child_key(parent, key, pointer, allow_end=True)
+    if isinstance(parent, list):
+        parent.insert(child_key, value)
+    else:
+        parent[child_key] = value
+    return document
+
+def _remove( document, pointer:str ):
+    parent, key = _resolve(document, pointer)
+    if parent is None:
+        raise ValueError("The whole document can't be removed")
+    child_key = _child_key(parent, key, pointer)
+    if isinstance(parent, dict) and child_key not in parent:
+        raise KeyError(f"'{pointer}' doesn't exist")
+    return parent.pop(child_key)
+
+def apply_patch( document, patch:List[dict] ):
+    """
+    Apply a JSON patch (RFC 6902) to a copy of document and return the copy, document is not changed.\n
+    patch: [{"op":"replace", "path":"/qubits/0/xy/pi_amp", "value":0.13}, ...], op is one of add, remove, replace, move, copy, test.\n
+    Raise KeyError for a path which doesn't exist, ValueError for a wrong operation or a failed test, nothing is applied then.
+    """
+    document = copy.deepcopy(document)
+    for operation in patch:
+        op, path = operation.get("op"), operation.get("path")
+        if path is None:
+            raise ValueError(f"Patch operation {operation} has no path")
+        match op:
+            case "add":
+                document = _add( document, path, copy.deepcopy(operation["value"]) )
+            case "remove":
+                _remove( document, path )
+            case "replace":
+                _get( document, path )
+                if path == "":
+                    document = copy.deepcopy(operation["value"])
+                else:
+                    _remove( document, path )
+                    document = _add( document, path, copy.deepcopy(operation["value"]) )
+            case "move":
+                if path.startswith(operation["from"] +"/"):
+                    raise ValueError(f"Can't move '{operation['from']}' into itself")
+                value = _remove( document, operation["from"] )
+                document = _add( document, path, value )
+            case "copy":
+                document = _add( document, path, copy.deepcopy(_get(document, operation["from"])) )
+            case "test":
+                if canonical_bytes(_get(document, path)) != canonical_bytes(operation["value"]):
+                    raise ValueError(f"Patch test failed at '{path}'")
+            case _:
+                raise ValueError(f"Unknown patch operation '{op}'")
+    return document
+
+
+# ================= State compiler =========================
+def _IQ_imbalance( g:float, phi:float )->list:
+    """ Mixer correction matrix of the gain and phase imbalance """
+    c = np.cos(phi)
+    s = np.sin(phi)
+    N = 1 / ((1 - g**2) * (2 * c**2 - 1))
+    return [ float(N * x) for x in [(1 - g) * c, (1 + g) * s, (1 - g) * s, (1 + g) * c] ]
+
+def _lo_of( state:dict, kind:str, idx:int )->dict:
+    """ The LO of the idx-th qubit or resonator, the last LO is shared by the rest """
+    los = state["local_oscillators"][kind]
+    return los[min(idx, len(los) -1)]
+
+class StateCompiler:
+    def __init__( self, state:dict, controller:str="con1" ):
+        """
+        Compile a declarative state document (see `quam/state.py`) into a `Configuration` and a `ChannelInfo`.\n
+        The i-th qubit and resonator are "q{i}", all ports are on the controller.\n
+        Each qubit and resonator is derived from its part of the state by a memoized sub-builder,
+        after `patch()` only the parts whose inputs changed are derived again and their changes
+        reach the config through a `SpecPropagator`, ex. a pi amplitude only rebuilds that qubit's gate waveforms.\n
+        ex.\n
+            compiler = StateCompiler(state)\n
+            config, spec = compiler.compile()\n
+            compiler.patch([{"op":"replace", "path":"/qubits/0/xy/pi_amp", "value":0.13}])
+        """
+        self.state = copy.deepcopy(state)
+        self.controller = controller
+        self.config = None
+        self.spec = None
+        self._propagator = None
+        # part -> (canonical input, [(info, qubit, field, value)])
+        self._parts = {}
+        # (port kind, controller port) -> state value already written to the controller
+        self._ports = {}
+
+    # ===================== Sub-builders =====================
+    def _part_inputs( self )->Dict[tuple,dict]:
+        state = self.state
+        qubits = state["qubits"]
+        z_ports = [ qubit["z"]["wiring"]["port"] for qubit in qubits ]
+        dc = state.get("crosstalk", {}).get("flux", {}).get("dc", [])
+        inputs = {}
+        for idx, qubit in enumerate(qubits):
+            row = dc[idx] if idx < len(dc) else []
+            inputs[("qubit", idx)] = {
+                "qubit": qubit, "lo": _lo_of(state, "qubits", idx),
+                "crosstalk": { z_ports[j]: coef for j, coef in enumerate(row[:len(qubits)]) if j != idx and coef != 0 },
+            }
+        for idx, resonator in enumerate(state["resonators"]):
+            inputs[("resonator", idx)] = {
+                "resonator": resonator, "lo": _lo_of(state, "readout", idx),
+                "global": state["global_parameters"], "ge_threshold": qubits[idx].get("ge_threshold", 0.) if idx < len(qubits) else 0.,
+            }
+        inputs[("shared",)] = {
+            "depletion_time": max( [ r["depletion_time"] for r in state["resonators"] ], default=0 ),
+            "network": state["network"],
+        }
+        return inputs
+
+    @staticmethod
+    def _qubit_fields( q:str, part:dict, controller:str )->list:
+        qubit = part["qubit"]
+        xy, z = qubit["xy"], qubit["z"]
+        lo = part["lo"]["freq"]
+        z_filter = z["wiring"].get("filter", {})
+        return [
+            ("XyInfo", q, "qubit_LO", int(lo)),
+            ("XyInfo", q, "qubit_IF", int(xy["f_01"] -lo)),
+            ("XyInfo", q, "pi_amp", xy["pi_amp"]),
+            ("XyInfo", q, "pi_len", xy["pi_length"]),
+            ("XyInfo", q, "drag_coef", xy["drag_coefficient"]),
+            ("XyInfo", q, "anharmonicity", xy["anharmonicity"]),
+            ("XyInfo", q, "AC_stark_detuning", xy["ac_stark_detuning"]),
+            ("ZInfo", q, "offset", z["max_frequency_point"]),
+            ("ZInfo", q, "const_flux_len", z["flux_pulse_length"]),
+            ("ZInfo", q, "const_flux_amp", z["flux_pulse_amp"]),
+            ("ZInfo", q, "crosstalk", part["crosstalk"]),
+            ("ZInfo", q, "filter", {"feedforward":list(z_filter.get("fir_taps", [])), "feedback":list(z_filter.get("iir_taps", []))}),
+            ("DecoInfo", q, "T1", qubit.get("T1", 0)),
+            ("DecoInfo", q, "T2", qubit.get("T2", 0)),
+            ("WireInfo", q, "xy_I", (controller, xy["wiring"]["I"])),
+            ("WireInfo", q, "xy_Q", (controller, xy["wiring"]["Q"])),
+            ("WireInfo", q, "z", (controller, z["wiring"]["port"])),
+        ]
+
+    @staticmethod
+    def _resonator_fields( q:str, part:dict, controller:str )->list:
+        resonator = part["resonator"]
+        lo = part["lo"]["freq"]
+        return [
+            ("RoInfo", q, "resonator_LO", int(lo)),
+            ("RoInfo", q, "resonator_IF", int(resonator["f_opt"] -lo)),
+            ("RoInfo", q, "readout_amp", resonator["readout_pulse_amp"]),
+            ("RoInfo", q, "readout_len", resonator["readout_pulse_length"]),
+            ("RoInfo", q, "time_of_flight", part["global"]["time_of_flight"]),
+            ("RoInfo", q, "ge_threshold", part["ge_threshold"]),
+            ("RoInfo", q, "RO_weights/rotated", resonator["rotation_angle"]),
+            ("WireInfo", q, "rin_I", (controller, resonator["wiring"]["I"])),
+            ("WireInfo", q, "rin_Q", (controller, resonator["wiring"]["Q"])),
+            ("WireInfo", q, "rout_I", (controller, 1)),
+            ("WireInfo", q, "rout_Q", (controller, 2)),
+        ]
+
+    def _fields_of( self, part:tuple, content:dict )->list:
+        match part[0]:
+            case "qubit":
+                return self._qubit_fields( f"q{part[1]}", content, self.controller )
+            case "resonator":
+                return self._resonator_fields( f"q{part[1]}", content, self.controller )
+            case _:
+                return [ ("RoInfo", None, "depletion_time", content["depletion_time"]) ]
+
+    def _changed_fields( self )->list:
+        """ Derive the parts whose inputs changed, return their fields """
+        fields = []
+        for part, content in self._part_inputs().items():
+            key = canonical_bytes(content)
+            cached = self._parts.get(part)
+            if cached is not None and cached[0] == key:
+                continue
+            self._parts[part] = (key, self._fields_of(part, content))
+            fields.extend(self._parts[part][1])
+        return fields
+
+    # ===================== Controller =====================
+    def _port_values( self )->Dict[tuple,object]:
+        """ {(kind, port): value} of the controller ports from the state and spec """
+        values = {}
+        for idx, qubit in enumerate(self.state["qubits"]):
+            q = f"q{idx}"
+            correction = qubit["xy"]["wiring"]["mixer_correction"]
+            values[("offset", qubit["xy"]["wiring"]["I"])] = correction["offset_I"]
+            values[("offset", qubit["xy"]["wiring"]["Q"])] = correction["offset_Q"]
+            z_port = qubit["z"]["wiring"]["port"]
+            z_info = self.spec._ZInfo[q]
+            values[("offset", z_port)] = z_info["offset"]
+            values[("crosstalk", z_port)] = z_info["crosstalk"]
+            values[("filter", z_port)] = z_info["filter"]
+        for resonator in self.state["resonators"]:
+            correction = resonator["wiring"]["mixer_correction"]
+            values[("offset", resonator["wiring"]["I"])] = correction["offset_I"]
+            values[("offset", resonator["wiring"]["Q"])] = correction["offset_Q"]
+        global_parameters = self.state["global_parameters"]
+        values[("input_offset", 1)] = global_parameters.get("downconversion_offset_I", 0.)
+        values[("input_offset", 2)] = global_parameters.get("downconversion_offset_Q", 0.)
+        return values
+
+    def _sync_controller( self ):
+        """ Write the port values which changed since the last sync """
+        controller = self.config.controllers[self.controller]
+        for (kind, port), value in self._port_values().items():
+            key = canonical_bytes(value)
+            if self._ports.get((kind, port)) == key:
+                continue
+            self._ports[(kind, port)] = key
+            if kind == "input_offset":
+                controller.analog_inputs[port]["offset"] = value
+                continue
+            if port not in controller._analog_outputs:
+                controller.analog_outputs = Analog_output(port)
+            output = controller._analog_outputs[port]
+            match kind:
+                case "offset":
+                    output.offset = value
+                case "crosstalk":
+                    output.crosstalk = dict(value)
+                case "filter":
+                    output.filter = value
+
+    def _sync_mixers( self ):
+        for kind, items in [("xy", self.state["qubits"]), ("ro", self.state["resonators"])]:
+            for idx, item in enumerate(items):
+                correction = (item["xy"] if kind == "xy" else item)["wiring"]["mixer_correction"]
+                element = f"q{idx}_{kind}"
+                mixer = self.config.mixers[ self.config.elements[element].input_map.mixer ]
+                matrix = _IQ_imbalance( correction["gain"], correction["phase"] )
+                channel = mixer.channel_of( element )
+                if list(channel._correction) != matrix:
+                    mixer.update_channel( element, correction=matrix )
+
+    # ===================== Compile =====================
+    def compile( self )->Tuple[Configuration, ChannelInfo]:
+        """ Build the config and spec from the whole state, return (config, spec) """
+        if self._propagator is not None:
+            self._propagator.detach()
+        self._parts = {}
+        self._ports = {}
+        q_num = len(self.state["qubits"])
+        if len(self.state["resonators"]) != q_num:
+            raise ValueError(f"{q_num} qubits and {len(self.state['resonators'])} resonators are in the state, each qubit needs one resonator!")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec = ChannelInfo(q_num)
+        for info, q, field, value in self._changed_fields():
+            spec._set_info( info, q, field, copy.deepcopy(value) )
+        spec._HardwareInfo["qop_ip"] = self.state["network"]["qop_ip"]
+        spec._HardwareInfo["qop_port"] = self.state["network"]["qop_port"]
+
+        config = Configuration()
+        config._controllers[self.controller] = Controller(self.controller)
+        create_qubits( config, spec )
+        self.config, self.spec = config, spec
+        self._sync_controller()
+        self._sync_mixers()
+
+        self._propagator = SpecPropagator( config, spec )
+        # create_roChannel builds the readout with the default length
+        self._propagator.apply([ SpecChangeEvent("RoInfo", q, "readout_len", None, spec._RoInfo[q]["readout_len"]) for q in spec._RoInfo["registered"] ])
+        return config, spec
+
+    def patch( self, patch:List[dict], check:bool=False )->Tuple[Configuration, ChannelInfo]:
+        """
+        Apply the JSON patch (RFC 6902) to the state and update the config and spec incrementally.\n
+        Adding or removing qubits or resonators compiles everything again.\n
+        check: compare the config with a fresh compile of the state, raise ValueError if they differ.\n
+        return (config, spec), the same objects as before unless everything was compiled again.
+        """
+        new_state = apply_patch( self.state, patch )
+        counts = (len(self.state["qubits"]), len(self.state["resonators"]))
+        self.state = new_state
+        if self.config is None or counts != (len(new_state["qubits"]), len(new_state["resonators"])):
+            return self.compile()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self._propagator.batch():
+                for info, q, field, value in self._changed_fields():
+                    self.spec._set_info( info, q, field, copy.deepcopy(value) )
+        self.spec._HardwareInfo["qop_ip"] = new_state["network"]["qop_ip"]
+        self.spec._HardwareInfo["qop_port"] = new_state["network"]["qop_port"]
+        self._sync_controller()
+        self._sync_mixers()
+        if check:
+            diff = self.check()
+            if not diff.is_empty:
+                raise ValueError(f"The patched config differs from a fresh compile:\n{diff}")
+        return self.config, self.spec
+
+    def check( self )->ConfigDiff:
+        """ `ConfigDiff` from the config of a fresh compile of the state to the current config, empty if they are the same """
+        fresh_config, _ = StateCompiler( self.state, self.controller ).compile()
+        return diff_config( fresh_config.get_config(), self.config.get_config() )
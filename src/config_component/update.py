@@ -1,9 +1,25 @@
 
 from config_component.configuration import Configuration
-from config_component.channel_info import Waveform
+from config_component.envelope_builder import EnvelopeBuilder, native_gate_axes
+from config_component.construct import set_optimal_weights
 import numpy as np
 # ===================== Update about XY =====================================
 ### directly update the frequency info into config ### 
+def mixer_channel_of( config:Configuration, element_name:str ):
+    """
+    The IFChannel in the mixer of the element, found by element name in the mixer index.\n
+    A channel not bound yet (config from dict or old pickle) is matched by the current (LO, IF) of the element,
+    the mixer gets a new channel for the element if none matches.
+    """
+    element = config.elements[element_name]
+    mixer = config.mixers[element.input_map.mixer]
+    lo, intermediate = element.input_map.lo_frequency, element.intermediate_frequency
+    try:
+        return mixer.channel_of( element_name, lo, intermediate )
+    except KeyError:
+        print(f"Mixer {element.input_map.mixer} had no channel for {element_name}, added one.")
+        return mixer.add_channel( element_name, lo, intermediate )
+
 def update_controlFreq( config:Configuration, updatedInfo:dict ):
     """
         Only update the info in config about control frequency\n
@@ -16,17 +32,14 @@ def update_controlFreq( config:Configuration, updatedInfo:dict ):
             target_q_idx = int(target_q[1:])
             element_name = f"{target_q}_xy"
             element = config.elements[element_name]
-            mixer_name = element.input_map.mixer
-            mixer = config.mixers[mixer_name]
-            # print(mixer.iFChannels)
+            channel = mixer_channel_of( config, element_name )
             # update LO or IF in elements and mixers
-            # TODO target_q_idx should replace 0
             if info.split("_")[1] == "LO":
                 element.input_map.lo_frequency = updatedInfo[info]
-                mixer.iFChannels[0].lo_frequency = updatedInfo[info]
+                channel.lo_frequency = updatedInfo[info]
             else: 
                 element.intermediate_frequency = updatedInfo[info]
-                mixer.iFChannels[0].intermediate_frequency = updatedInfo[info]
+                channel.intermediate_frequency = updatedInfo[info]
             
         else: 
             raise KeyError("Only surpport update frequenct related info to config!")
@@ -35,13 +48,11 @@ def update_controlFreq( config:Configuration, updatedInfo:dict ):
 def update_controlWaveform(config:Configuration,updatedSpec:dict={},target_q:str="all",**kwargs):
     '''
         If the spec about control had been updated need to re-build the waveforms in the config.\n
-        A updated spec is given and call the Waveform class re-build the config.\n
+        A updated spec is given and call the EnvelopeBuilder re-build the config.\n
         Give the specific target qubit "q1" to update if it's necessary, default for all the qubits.\n
         kwargs for assign update constant wf or saturation wf, USE: other=True/False.
     '''
-    if updatedSpec != {}:
-        waveform_remaker = Waveform(updatedSpec)
-    else:
+    if updatedSpec == {}:
         raise ValueError("The updated spec should be given!")
     qs = [target_q] if target_q != 'all' else updatedSpec["register"]
     for q in qs:
@@ -49,26 +60,19 @@ def update_controlWaveform(config:Configuration,updatedSpec:dict={},target_q:str
         print(f"{q} update controlWaveform")
         # Default constant pulse
         config.waveforms[f"{q}_xy_const_wf"].sample = updatedSpec[q]["const_amp"]
+        # Memoized, unchanged spec gives the same arrays and the waveforms stay clean
+        gate_wfs = EnvelopeBuilder(updatedSpec[q]).build_native_gates()
 
-        for opration in config.elements[element_name].operations: 
+        for opration in config.elements[element_name]._operations: 
             
            
             pulse_name = f"{q}_xy_{opration}_pulse"
             # Single Q operation
-            if opration in ["x180", "-x180", "y180", "x90", "-x90", "y90", "-y90"]: 
-                conv_table = {
-                    "x180": "x",
-                    "-x180": "-x",
-                    "y180": "y",
-                    "x90": "x/2",
-                    "-x90": "-x/2",
-                    "y90": "y/2",
-                    "-y90": "-y/2"
-                }
-                wf = waveform_remaker.build_XYwaveform(target_q=q,axis=conv_table[opration])
+            if opration in native_gate_axes: 
+                wf = gate_wfs[opration]
                 for if_port in ["I","Q"]:
                     waveform_name = f"{q}_xy_{opration}_wf_{if_port}"
-                    config.waveforms[waveform_name].sample = wf[if_port].tolist()
+                    config.waveforms[waveform_name].sample = wf[if_port]
                 # pi_len check
                 config.pulses[pulse_name].length = updatedSpec[q]['pi_len']
 
@@ -97,6 +101,18 @@ def update_z_crosstalk(config:Configuration,zInfo:dict,wire:dict):
     z_output = config.controllers[ctrler_name].analog_outputs
 
     z_output[channel].crosstalk = zInfo["crosstalk"]   
+
+def update_z_filter(config:Configuration,zInfo:dict,wire:dict):
+    '''
+        update the z predistortion filter in config controllers belongs to the target qubit.\n
+        zInfo is the dict belongs to the target qubit returned by the func. `Circuit_info().update_zInfo_for()`,
+        without "filter" the z output has no filter.\n
+        The taps add a delay on the outputs of the controller, recalibrate the readout rotation after changing them.\n
+    '''
+    ctrler_name, channel = wire["z"]
+    z_output = config.controllers[ctrler_name].analog_outputs
+
+    z_output[channel].filter = zInfo.get("filter", {})
    
 
 def update_zConstWaveform(config,updatedZspec:dict):
@@ -126,14 +142,14 @@ def update_ReadoutFreqs(config:Configuration,updatedInfo:dict):
     for info in updatedInfo:
         target_q = info.split("_")[-1]
         elements = config.elements[f'{target_q}_ro']
-        mixer_name = elements.input_map.mixer
+        channel = mixer_channel_of( config, f'{target_q}_ro' )
         match info.split("_")[1].lower():
             case 'if':
                 elements.intermediate_frequency = updatedInfo[info]
-                config.mixers[mixer_name].iFChannels[int(target_q[-1])].intermediate_frequency = updatedInfo[info]
+                channel.intermediate_frequency = updatedInfo[info]
             case 'lo' :
                 elements.input_map.lo_frequency = updatedInfo[info]
-                config.mixers[mixer_name].iFChannels[int(target_q[-1])].lo_frequency = updatedInfo[info]
+                channel.lo_frequency = updatedInfo[info]
             case _:
                 raise KeyError(f"RO update keyname goes wrong: {info.split('_')[1].lower()}")
         
@@ -170,6 +186,10 @@ def update_Readout(config:Configuration,target_q:str='all',roInfo:dict={}, wirin
         config.integration_weights[w_name+"minus_sin"].cosine = [(np.sin(roInfo[q]['rotated']),roInfo[q]['readout_len'])]
         config.integration_weights[w_name+"minus_sin"].sine = [(-np.cos(roInfo[q]['rotated']),roInfo[q]['readout_len'])]
 
+        optimal_weights = roInfo[q]["RO_weights"].get("optimal", {})
+        if optimal_weights != {}:
+            set_optimal_weights( config, element_name, config.pulses[pulse_name], optimal_weights )
+
         con_I_name, ch_I_idx = wiring[q]["rin_I"]
         con_Q_name, ch_Q_idx = wiring[q]["rin_Q"]
         # print(roInfo[q]['offset'], (con_I_name, ch_I_idx), (con_Q_name, ch_Q_idx),config.controllers[con_I_name].analog_inputs)
@@ -1,14 +1,30 @@
 from typing import Union
+from numpy import ndarray, array, asarray
+from config_component.cached_component import CachedComponent
 
-class Waveform:
-    def __init__(self, name:str ):
+def _frozen( val, dtype:str )->ndarray:
+    """ Read-only ndarray of the samples, a writable array is copied so that editing it can't change a cached config dict """
+    samples = asarray(val, dtype=dtype)
+    if samples.flags.writeable:
+        samples = array(samples, dtype=dtype)
+        samples.setflags(write=False)
+    return samples
+
+class Waveform( CachedComponent ):
+    __slots__ = ("_name", "_type", "_sample", "_dtype")
+    # Default for the Waveform pickled before dtype existed
+    _slot_defaults = {"_dtype":"float64"}
+
+    def __init__(self, name:str, dtype:str="float64" ):
         """
         The Waveform part of configuration
-        wf_type: constant or arbitrary
+        wf_type: constant or arbitrary\n
+        dtype: "float64" or "float32", the ndarray type to keep arbitrary samples
         """
         self._name = name
         self._type = None
         self._sample = None
+        self._dtype = dtype
       
     @property
     def type( self )->str:
@@ -19,26 +35,42 @@ class Waveform:
         self._type = val
     
     @property
-    def sample( self )->Union[list, float]:
+    def dtype( self )->str:
+        """ ndarray type of arbitrary samples, "float64" or "float32" """
+        return self._dtype
+    @dtype.setter
+    def dtype( self, val:str ):
+        self._dtype = val
+        if isinstance(self._sample, ndarray):
+            self._sample = _frozen(self._sample, val)
+
+    @property
+    def sample( self )->Union[ndarray, float]:
         """ 
-        list for arbitrary
+        read-only ndarray for arbitrary, list or ndarray is accepted, assign a new array to change the samples
         float for constant
         """
         return self._sample 
     @sample.setter
-    def sample( self, val:Union[list, float] ):
+    def sample( self, val:Union[ndarray, list, float] ):
+        if isinstance(val, (list, tuple, ndarray)):
+            # Only convert to list in to_dict
+            val = _frozen(val, self._dtype)
         self._sample = val
         
-    def to_dict( self ):
+    def _build_dict( self ):
 
         output_dict = {
-            "type":self.type,
+            "type":self._type,
         }
-        match self.type:
+        match self._type:
             case "constant":
                 output_dict["sample"] = self._sample
             case "arbitrary":
-                output_dict["samples"] = self._sample
+                if isinstance(self._sample, ndarray):
+                    output_dict["samples"] = self._sample.tolist()
+                else:
+                    output_dict["samples"] = self._sample
 
         return {
             self._name:output_dict
@@ -56,7 +88,7 @@ def waveform_read_dict( name:str, infos:dict )-> Waveform:
         case "constant":
             waveform._sample = infos["sample"]
         case "arbitrary":
-            waveform._sample = infos["samples"] 
+            waveform.sample = infos["samples"] 
         case _:
             waveform._sample = infos["sample"]   
     return waveform
\ No newline at end of file
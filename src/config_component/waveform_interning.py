@@ -0,0 +1,118 @@
+from typing import Dict, Tuple
+from array import array
+import hashlib
+import json
+
+class WaveformInterner:
+    def __init__( self ):
+        """
+        Content-addressed lookup for the waveforms in configuration.\n
+        Waveforms with identical type and samples share one entry in the output config,
+        the pulses referencing the duplicates are pointed to the shared one.
+        """
+        # waveform name -> (dict fragment, content key, size in bytes)
+        self._keys = {}
+        # content key -> JSON size of the waveform without name
+        self._sizes = {}
+        self._report = {"waveforms":0, "unique":0, "shared":0, "bytes_saved":0}
+
+    def __getstate__( self )->dict:
+        # Content keys are rebuilt on the next interning
+        return {"_keys":{}, "_sizes":{}, "_report":self._report}
+
+    def __setstate__( self, state:dict ):
+        self._keys = {}
+        self._sizes = {}
+        self._report = state["_report"]
+
+    @property
+    def report( self )->dict:
+        """
+        Result of the last interning\n
+        waveforms: number of waveforms before interning\n
+        unique: number of waveforms after interning\n
+        shared: number of waveforms replaced by an identical one\n
+        bytes_saved: size of the removed waveforms in the JSON config
+        """
+        return dict(self._report)
+
+    def content_key( self, name:str, wf_dict:dict )->Tuple[tuple, int]:
+        """
+        wf_dict: {"type":"constant","sample":0.1} or {"type":"arbitrary","samples":[...]}\n
+        return the hashable content key and the size of the waveform in bytes.
+        """
+        cached = self._keys.get(name)
+        if cached is not None and cached[0] is wf_dict:
+            return cached[1], cached[2]
+
+        wf_type = wf_dict["type"]
+        if wf_type == "arbitrary":
+            samples = array("d", wf_dict["samples"])
+            key = (wf_type, len(samples), hashlib.sha1(samples.tobytes()).hexdigest())
+        else:
+            key = (wf_type, float(wf_dict["sample"]))
+        # Same content has same JSON size, only the name differs
+        if key not in self._sizes:
+            self._sizes[key] = len(json.dumps(wf_dict, default=float))
+        nbytes = self._sizes[key] +len(json.dumps(name)) +4
+
+        self._keys[name] = (wf_dict, key, nbytes)
+        return key, nbytes
+
+    def intern( self, waveforms:Dict[str,dict] )->Dict[str,str]:
+        """
+        waveforms: the "waveforms" part of config dict.\n
+        return {duplicated name: shared name} for the waveforms with same content.
+        """
+        shared_names = {}
+        name_map = {}
+        bytes_saved = 0
+        for name, wf_dict in waveforms.items():
+            key, nbytes = self.content_key(name, wf_dict)
+            if key in shared_names:
+                name_map[name] = shared_names[key]
+                bytes_saved += nbytes
+            else:
+                shared_names[key] = name
+
+        # Forget the waveforms which were removed from configuration
+        if len(self._keys) > len(waveforms):
+            for name in [n for n in self._keys if n not in waveforms]:
+                del self._keys[name]
+        # and the contents no waveform has any more, ex. the amplitude steps of a calibration loop
+        if len(self._sizes) > len(shared_names):
+            self._sizes = { key: self._sizes[key] for key in shared_names }
+
+        self._report = {
+            "waveforms":len(waveforms),
+            "unique":len(shared_names),
+            "shared":len(name_map),
+            "bytes_saved":bytes_saved,
+        }
+        return name_map
+
+def intern_waveforms( config_dict:dict, interner:WaveformInterner=None )->dict:
+    """
+    Merge the waveforms with identical content in the config dict and remap the pulses on them.\n
+    Only the changed pulses are copied, the other parts of config_dict are kept.
+    """
+    if interner is None:
+        interner = WaveformInterner()
+    name_map = interner.intern(config_dict["waveforms"])
+    if len(name_map) == 0:
+        return config_dict
+
+    config_dict["waveforms"] = { n: wf for n, wf in config_dict["waveforms"].items() if n not in name_map }
+
+    pulses = {}
+    for pulse_name, pulse_dict in config_dict["pulses"].items():
+        pulse_wfs = pulse_dict["waveforms"]
+        for wf_name in pulse_wfs.values():
+            if wf_name in name_map:
+                pulse_dict = dict(pulse_dict)
+                pulse_dict["waveforms"] = { port: name_map.get(n, n) for port, n in pulse_wfs.items() }
+                break
+        pulses[pulse_name] = pulse_dict
+    config_dict["pulses"] = pulses
+
+    return config_dict
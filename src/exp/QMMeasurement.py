@@ -1,12 +1,37 @@
 from qm.QuantumMachinesManager import QuantumMachinesManager
-from qm import SimulationConfig
+from qm import SimulationConfig, generate_qua_script
+from qm.qua import declare, declare_input_stream, advance_input_stream
 from qualang_tools.results import progress_counter, fetching_tool
 
 from abc import ABC, abstractmethod
 import matplotlib.pyplot as plt
+import asyncio
+import hashlib
+import threading
 import time
+from copy import deepcopy
 from datetime import datetime
 from xarray import Dataset
+from config_component.config_diff import diff_config, apply_runtime_changes
+from config_component.reference_index import validate_config
+from exp.session_pool import QMSessionPool
+from exp.streaming_writer import StreamingWriter
+
+# The QUA DSL builds programs on a global stack, programs are built one at a time in threaded runs
+_program_lock = threading.Lock()
+# id(qmm) -> (qmm, QM last opened on it), opening a QM closes the other QMs of the manager
+_last_opened = {}
+
+def _is_last_opened( qmm, qm )->bool:
+    """ If qm is still opened, no other QM was opened on qmm since it and it wasn't closed """
+    qmm_entry = _last_opened.get(id(qmm))
+    return qm is not None and qmm_entry is not None and qmm_entry[0] is qmm and qmm_entry[1] is qm
+
+def _program_key( qua_program )->str:
+    """ Hash of the QUA script of the program without its time stamp """
+    script = generate_qua_script( qua_program )
+    lines = [ line for line in script.splitlines() if not line.startswith("# Single QUA script generated at") ]
+    return hashlib.sha256( "\n".join(lines).encode() ).hexdigest()
 
 class QMMeasurement( ABC ):
 
@@ -14,6 +39,13 @@ class QMMeasurement( ABC ):
         self.__describe()
         self.config = config
         self.qmm = qmm
+        # Streaming of the live fetched data to disk, see `run(stream_path=...)`
+        self.stream_interval = 10.
+        self.stream_append_dim = None
+        self._stream = None
+        self._stream_error = None
+        # Parameters are declared as input streams while `_compile` builds the program
+        self._stream_parameters = False
 
     @abstractmethod
     def _get_qua_program( self ):
@@ -27,40 +59,227 @@ class QMMeasurement( ABC ):
     def _data_formation( self )->Dataset:
         pass
 
-    def run( self, shot_num:int=None, save_path:str=None ):
+    def _get_qua_parameters( self )->dict:
+        """
+        Scalar parameters of the program fed by input streams after the job starts, {stream name: value}.\n
+        A program reading its sweep values by `_declare_parameter` instead of python constants keeps the same
+        QUA script when they change, so it is compiled only once, see `_submit`.
+        """
+        return {}
+
+    def _declare_parameter( self, name:str, qua_type ):
+        """
+        QUA variable of the parameter name of `_get_qua_parameters()`, declare it in `_get_qua_program()`.\n
+        In the program queued by `run()` it is an input stream, read once at the start.
+        A program built otherwise, ex. for `pulse_schedule_simulation` or a direct `qm.execute`,
+        has the current value as a constant, since nothing pushes to its input streams.
+        """
+        if self._stream_parameters:
+            variable = declare_input_stream(qua_type, name=name)
+            advance_input_stream(variable)
+            return variable
+        return declare(qua_type, value=self._get_qua_parameters()[name])
+
+    def run( self, shot_num:int=None, save_path:str=None, stream_path:str=None, stream_resume:bool=False ):
+        """
+        stream_path: directory of a `StreamingWriter` store the live fetched data is written to every
+        `stream_interval` seconds, the data until a crash or Ctrl-C is kept there, see `streaming_writer.load_partial`.
+        Set `stream_append_dim` for a scan whose data grows along a dimension, only the new rows are written.
+        The results are fetched only for these writes and released after them.\n
+        stream_resume: continue the existing store at stream_path, ex. after a reconnection,
+        otherwise an existing store raises ValueError.
+        """
+        self._start( shot_num, stream_path, stream_resume )
+        try:
+            while self._results.is_processing():
+                self._poll()
+                time.sleep(1)
+        except BaseException:
+            self._flush_stream()
+            raise
+        
+        return self._finish( save_path )
 
+    async def run_async( self, shot_num:int=None, save_path:str=None, poll_interval:float=1., stream_path:str=None, stream_resume:bool=False ):
+        """
+        `run()` as a coroutine, the results are polled every poll_interval seconds without blocking the event loop.\n
+        The blocking calls to the QM run in threads, so measurements on different clusters or QMs can be gathered,
+        ex. `await asyncio.gather( t1.run_async(), ramsey.run_async() )`.\n
+        Cancelling the task halts the job.
+        """
+        self._job = None
+        starting = asyncio.ensure_future( asyncio.to_thread( self._start, shot_num, stream_path, stream_resume ) )
+        try:
+            await asyncio.shield( starting )
+            while await asyncio.to_thread( self._results.is_processing ):
+                await asyncio.to_thread( self._poll )
+                await asyncio.sleep( poll_interval )
+            return await asyncio.to_thread( self._finish, save_path )
+        except asyncio.CancelledError:
+            if starting.done():
+                self._halt()
+                self._flush_stream()
+            else:
+                # The job is still being submitted, halt it when it starts
+                starting.add_done_callback( lambda _: self._halt() )
+            raise
+
+    def _start( self, shot_num:int=None, stream_path:str=None, stream_resume:bool=False ):
+        """ Open the QM, start the job and the live fetching """
         if shot_num is not None:
             print(f"New setting {shot_num} shots")
             self.shot_num = shot_num
-        self._qm = self.qmm.open_qm( self.config )
-        qua_program = self._get_qua_program()
+        self._stream = None
+        self._stream_error = None
+        if stream_path is not None:
+            self.fetch_data = None
+            self._stream = StreamingWriter( stream_path, append_dim=self.stream_append_dim, min_interval=self.stream_interval, resume=stream_resume )
+        self._qm = self._open_qm()
 
-        measurement_start_time = datetime.now()
+        self._measurement_start_time = datetime.now()
 
-        job = self._qm.execute(qua_program)
+        self._attach( self._submit() )
 
-        self._results = fetching_tool(job, data_list=self._get_fetch_data_list(), mode="live")
-        while self._results.is_processing():
-            # Fetch results
-            fetch_data = self._results.fetch_all()
-            # Progress bar
-            iteration = fetch_data[-1]
-            progress_counter(iteration, self.shot_num, start_time=self._results.start_time)
-            time.sleep(1)
-        
+    def _poll( self ):
+        if self._stream is not None and self._stream.due():
+            self.fetch_data = self._results.fetch_all()
+            iteration = self.fetch_data[-1]
+            self._write_stream()
+        else:
+            # Only the iteration for the progress bar, the results are fetched when they are written or finished
+            iteration = self._progress.fetch_all()[0]
+        progress_counter(iteration, self.shot_num, start_time=self._results.start_time)
+
+    def _write_stream( self, force:bool=False ):
+        """ Write the fetched data to the stream store, the fetched data is released after it """
+        try:
+            self._write_fetched( force )
+        finally:
+            self.fetch_data = None
+            self._results.results = []
+
+    def _write_fetched( self, force:bool ):
+        try:
+            dataset = self._data_formation()
+        except Exception as e:
+            # The live data of some programs can't be formed before the first buffers are filled,
+            # the error is printed once per run
+            if self._stream_error is None:
+                print(f"Live data can't be formed, skip streaming it until it can: {e!r}")
+            self._stream_error = e
+            return
+        dataset.attrs["start_time"] = str(self._measurement_start_time.strftime("%Y%m%d_%H%M%S"))
+        self._stream.write( dataset, force=force )
+
+    def _flush_stream( self ):
+        """ Write the results after an interruption, the store keeps the last written ones if they can't be fetched """
+        if self._stream is None:
+            return
+        try:
+            self.fetch_data = self._results.fetch_all()
+        except Exception as e:
+            print(f"The results can't be fetched, the stream store keeps the last written ones: {e!r}")
+            return
+        self._write_stream( force=True )
+
+    def _finish( self, save_path:str=None ):
+        """ Fetch the final results and form the dataset """
         measurement_end_time = datetime.now()
         self.fetch_data = self._results.fetch_all()
 
         self.output_data = self._data_formation()
-        self.output_data.attrs["start_time"] = str(measurement_start_time.strftime("%Y%m%d_%H%M%S"))
+        self.output_data.attrs["start_time"] = str(self._measurement_start_time.strftime("%Y%m%d_%H%M%S"))
         self.output_data.attrs["end_time"] = str(measurement_end_time.strftime("%Y%m%d_%H%M%S"))
 
+        if self._stream is not None:
+            self._stream.close( self.output_data )
+            self._stream = None
         if save_path is not None:
             self.output_data.to_netcdf(save_path)
             
         return self.output_data
+
+    def _halt( self ):
+        if getattr(self, "_job", None) is not None:
+            self._job.halt()
+            print(f"{self.__class__.__name__} job is halted.")
     
 
+    def _submit( self ):
+        """
+        Queue the QUA program on the opened QM and push `_get_qua_parameters()` to its input streams, return the running job.\n
+        Programs are compiled once per opened QM and keyed by their QUA script,
+        a program with the same script as a previous run is queued without compiling it again.
+        """
+        return self._enqueue( self._compile() ).wait_for_execution()
+
+    def _compile( self )->str:
+        """ Program id of the QUA program compiled on the opened QM, see `_submit` """
+        with _program_lock:
+            self._stream_parameters = True
+            try:
+                qua_program = self._get_qua_program()
+            finally:
+                self._stream_parameters = False
+            key = _program_key( qua_program )
+        compiled_programs = self._compiled_programs
+        if key not in compiled_programs:
+            compiled_programs[key] = self._qm.compile( qua_program )
+        else:
+            print("Reuse the compiled program.")
+        return compiled_programs[key]
+
+    def _enqueue( self, program_id:str ):
+        """ Add the compiled program to the job queue of the opened QM with its input streams, return the pending job """
+        pending_job = self._qm.queue.add_compiled( program_id )
+        for name, value in self._get_qua_parameters().items():
+            pending_job.insert_input_stream( name, list(value) if isinstance(value, (list, tuple)) else [value] )
+        return pending_job
+
+    def _attach( self, job ):
+        """ Follow the running job by live fetching """
+        self._job = job
+        self._results = fetching_tool(self._job, data_list=self._get_fetch_data_list(), mode="live")
+        # The iteration alone, the last name of the fetch list
+        self._progress = fetching_tool(self._job, data_list=self._get_fetch_data_list()[-1:], mode="live")
+
+    def _open_qm( self ):
+        """
+        Open QM with self.config.\n
+        If the QM opened by previous run is still the last one opened on the manager and the config only changed
+        in runtime settable values (IF, DC offset, mixer correction), push the changes to it instead of opening a new one.\n
+        With a `QMSessionPool` as qmm, the pool gives the QM and tracks its config.
+        """
+        if isinstance(self.qmm, QMSessionPool):
+            qm = self.qmm.open_qm( self.config )
+            self._opened_config = None
+            if qm.machine is not getattr(self, "_compiled_on", None):
+                self._compiled_programs = {}
+                self._compiled_on = qm.machine
+            return qm
+
+        opened_config = getattr(self, "_opened_config", None)
+        if _is_last_opened( self.qmm, getattr(self, "_qm", None) ) and opened_config is not None:
+            diff = diff_config( opened_config, self.config )
+            if not diff.needs_reopen:
+                if not diff.is_empty:
+                    print(f"Apply {len(diff.runtime)} runtime changes to the opened QM.")
+                    apply_runtime_changes( self._qm, diff, self.config )
+                    self._opened_config = deepcopy(self.config)
+                return self._qm
+
+        # Local check is much faster than a failed compile on the server
+        problems = validate_config( self.config )
+        if len(problems) != 0:
+            raise ValueError("Config is invalid:\n"+"\n".join(problems))
+        qm = self.qmm.open_qm( self.config )
+        _last_opened[id(self.qmm)] = (self.qmm, qm)
+        self._opened_config = deepcopy(self.config)
+        # Compiled programs belong to the QM they were compiled on
+        self._compiled_programs = {}
+        self._compiled_on = qm
+        return qm
+
     def pulse_schedule_simulation( self, controllers:list, max_time:int ):
         
         self.shot_num = 1
@@ -78,6 +297,8 @@ class QMMeasurement( ABC ):
     def close(self):
         
         self._qm.close()
+        if _is_last_opened( self.qmm, self._qm ):
+            del _last_opened[id(self.qmm)]
         print("QM connection is closed.")
 
     def __del__(self):
@@ -8,10 +8,14 @@ from qm.qua import *
 from qualang_tools.addons.variables import assign_variables_to_element
 from qualang_tools.results import fetching_tool, progress_counter
 from qualang_tools.plot import interrupt_on_close
+from qualang_tools.units import unit
 import matplotlib.pyplot as plt
 from scipy import signal
 from scipy.optimize import curve_fit
 
+from exp.native_gate_macros import play_gate
+u = unit(coerce_to_integer=True)
+
 ##############
 # QUA macros #
 ##############
@@ -152,9 +156,10 @@ def state_tomo_singleRO_declare( resonators:list ):
 
     return I, I_st, Q, Q_st
 
-def state_tomo_measurement( iqdata_stream, process, q_name, resonators, thermalization_time=200, sequential=False, amp_modify=1.0, weights=""):
+def state_tomo_measurement( iqdata_stream, process, q_name, resonators, thermalization_time=200, sequential=False, amp_modify=1.0, weights="", gate_set="full"):
     """
-        Only for 1Q 
+        Only for 1Q \n
+        gate_set: how the basis rotations are played, ex. "virtual_z", see `exp.native_gate_macros`.
     """
     (I, I_st, Q, Q_st) = iqdata_stream
     if type(resonators) is not list:
@@ -175,9 +180,9 @@ def state_tomo_measurement( iqdata_stream, process, q_name, resonators, thermali
             with case_(0):
                 pass
             with case_(1):
-                play("y90", q_name)
+                play_gate("y90", q_name, gate_set)
             with case_(2):
-                play("-x90", q_name)
+                play_gate("-x90", q_name, gate_set)
         # Measure resonator state after the sequence
         align()
         for idx, res in enumerate(resonators):
@@ -215,10 +220,11 @@ def tomo_pre_save_singleShot( iqdata_stream, q_name:list, resonators:list, suffi
 
 
 
-def state_tomo_NQ_measurement( QV, iqdata_stream, process, q_name, resonators, thermalization_time=200, sequential=False, amp_modify=1.0, weights="" ):
+def state_tomo_NQ_measurement( QV, iqdata_stream, process, q_name, resonators, thermalization_time=200, sequential=False, amp_modify=1.0, weights="", gate_set="full" ):
     """
        for NQ 
-       q_name should have same length with resonators
+       q_name should have same length with resonators\n
+       gate_set: how the basis rotations are played, ex. "virtual_z", see `exp.native_gate_macros`.
     """
     (I, I_st, Q, Q_st) = iqdata_stream
 
@@ -230,16 +236,16 @@ def state_tomo_NQ_measurement( QV, iqdata_stream, process, q_name, resonators, t
             with case_(0):
                 pass
             with case_(1):
-                play("y90", f"{q}")
+                play_gate("y90", f"{q}", gate_set)
             with case_(2):
-                play("-x90", f"{q}")
+                play_gate("-x90", f"{q}", gate_set)
     # Measure resonator state after the sequence
     align()
     multiRO_measurement( iqdata_stream, resonators, weights=weights )
         # with else_(layer_idx==1):
         #     state_tomo_measurement( iqdata_stream, process, q_next, resonators, thermalization_time=200, sequential=False, amp_modify=1.0, weights="" )
 
-def tomo_NQ_proj( iqdata_stream, process, q_name, resonators, thermalization_time=200, sequential=False, weights="", q_proj=[] )->list:
+def tomo_NQ_proj( iqdata_stream, process, q_name, resonators, thermalization_time=200, sequential=False, weights="", q_proj=[], gate_set="full" )->list:
 
     q_current = q_name[-1]
     proj = declare(int)
@@ -247,7 +253,7 @@ def tomo_NQ_proj( iqdata_stream, process, q_name, resonators, thermalization_tim
         q_proj_next = q_proj +[(q_current,proj)]
         if len(q_name) > 1:
             q_next = q_name[:-1]
-            tomo_NQ_proj( iqdata_stream, process, q_next, resonators, thermalization_time=thermalization_time, sequential=sequential, weights=weights, q_proj=q_proj_next )
+            tomo_NQ_proj( iqdata_stream, process, q_next, resonators, thermalization_time=thermalization_time, sequential=sequential, weights=weights, q_proj=q_proj_next, gate_set=gate_set )
         else:
-            state_tomo_NQ_measurement( q_proj_next, iqdata_stream, process, q_name, resonators, thermalization_time=thermalization_time, weights=weights )
+            state_tomo_NQ_measurement( q_proj_next, iqdata_stream, process, q_name, resonators, thermalization_time=thermalization_time, weights=weights, gate_set=gate_set )
 
@@ -12,6 +12,7 @@ import warnings
 from ab.QM_config_dynamic import QM_config, Circuit_info
 
 from exp.RO_macros import multiRO_declare, multiRO_measurement, multiRO_pre_save
+from exp.native_gate_macros import play_gate, element_gate_set
 
 warnings.filterwarnings("ignore")
 from qualang_tools.units import unit
@@ -23,10 +24,13 @@ import xarray as xr
 ###################
 
 
-def DRAG_calibration_Yale( drag_coef, q_name:str, ro_element:list, config, qmm:QuantumMachinesManager, n_avg=3000, mode:str='live', initializer:tuple=None):
+def DRAG_calibration_Yale( drag_coef, q_name:str, ro_element:list, config, qmm:QuantumMachinesManager, n_avg=3000, mode:str='live', initializer:tuple=None, gate_set:str=None):
     """
-     "The DRAG coefficient 'drag_coef' must be different from 0 in the config."
+     "The DRAG coefficient 'drag_coef' must be different from 0 in the config."\n
+     gate_set: how the gates are played, ex. "virtual_z", see `exp.native_gate_macros`. None for the gate set of q_name in config.
     """
+    if gate_set is None:
+        gate_set = element_gate_set( config, q_name )
     a_min = 0
     a_max = 1.5
     fit_point = 40
@@ -61,12 +65,12 @@ def DRAG_calibration_Yale( drag_coef, q_name:str, ro_element:list, config, qmm:Q
                     with switch_(op_idx, unsafe=True):
                         with case_(0):
                             # positive
-                            play("x180" * amp(1, 0, 0, a), q_name)
-                            play("y90" * amp(a, 0, 0, 1), q_name)
+                            play_gate("x180", q_name, gate_set, matrix=(1, 0, 0, a))
+                            play_gate("y90", q_name, gate_set, matrix=(a, 0, 0, 1))
                         with case_(1):
                             # nagtive
-                            play("y180" * amp(a, 0, 0, 1), q_name)
-                            play("x90" * amp(1, 0, 0, a), q_name)
+                            play_gate("y180", q_name, gate_set, matrix=(a, 0, 0, 1))
+                            play_gate("x90", q_name, gate_set, matrix=(1, 0, 0, a))
 
                     # Align the two elements to measure after playing the qubit pulses.
                     align()  # Global align between the two sequences
@@ -267,9 +271,10 @@ def amp_calibration( amp_modify_range, q_name:str, ro_element:list, config, qmm:
         return transposed_data
     
 
-def StarkShift_program(q_name:str, ro_element:list, sequence_repeat:int=1, n_avg=100, initializer:tuple=None):
+def StarkShift_program(q_name:str, ro_element:list, sequence_repeat:int=1, n_avg=100, initializer:tuple=None, gate_set:str="full"):
     '''
-        initializer from `QM_config_dynamic.initializer()`
+        initializer from `QM_config_dynamic.initializer()`\n
+        gate_set: gate set of q_name, from `exp.native_gate_macros.element_gate_set`
     '''
     # a_min = 1-amp_modify_range
     # a_max = 1+amp_modify_range
@@ -297,8 +302,8 @@ def StarkShift_program(q_name:str, ro_element:list, sequence_repeat:int=1, n_avg
             
             # Operation
             for _ in range(sequence_repeat):
-                play("x180", q_name)
-                play("-x180", q_name)
+                play_gate("x180", q_name, gate_set)
+                play_gate("-x180", q_name, gate_set)
 
             # Align after playing the qubit pulses.
             align()
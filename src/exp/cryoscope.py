@@ -9,9 +9,11 @@ from qualang_tools.units import unit
 u = unit(coerce_to_integer=True)
 
 from exp.QMMeasurement import QMMeasurement
+from exp.native_gate_macros import play_gate, element_gate_set
 from exp.RO_macros import multiRO_declare, multiRO_measurement, multiRO_pre_save
 
 import xarray as xr
+import numpy as np
 
 class Cryoscope( QMMeasurement ):
     """
@@ -72,6 +74,7 @@ class Cryoscope( QMMeasurement ):
     def _get_qua_program( self ):
         
         self.duration_cc_qua = self._lin_cc_array( )
+        gate_set = element_gate_set( self.config, self.xy_elements[0] )
 
         with program() as cryoscope:
             n = declare(int)  # QUA variable for the averaging loop
@@ -103,7 +106,7 @@ class Cryoscope( QMMeasurement ):
 
                         # Operation
                         # Play first X/2
-                        play("x90", self.xy_elements[0])
+                        play_gate("x90", self.xy_elements[0], gate_set)
                         # Play truncated flux pulse
                         align()
                         # Wait some time to ensure that the flux pulse will arrive after the x90 pulse
@@ -116,9 +119,9 @@ class Cryoscope( QMMeasurement ):
                         wait( max(self.duration_cc_qua) +self.xyz_timing_buffer, self.xy_elements[0] )
                         # Play second X/2 or Y/2
                         with if_(flag):
-                            play("x90", self.xy_elements[0])
+                            play_gate("x90", self.xy_elements[0], gate_set)
                         with else_():
-                            play("y90", self.xy_elements[0])
+                            play_gate("y90", self.xy_elements[0], gate_set)
 
                         # Measure resonator state after the sequence
                         align()
@@ -174,55 +177,7 @@ class Cryoscope( QMMeasurement ):
 ####################
 # Helper functions #
 ####################
-def exponential_decay(x, a, t):
-    """Exponential decay defined as 1 + a * np.exp(-x / t).
-
-    :param x: numpy array for the time vector in ns
-    :param a: float for the exponential amplitude
-    :param t: float for the exponential decay time in ns
-    :return: numpy array for the exponential decay
-    """
-    return 1 + a * np.exp(-x / t)
-
-
-def exponential_correction(A, tau, Ts=1e-9):
-    """Derive FIR and IIR filter taps based on the exponential coefficients A and tau from 1 + a * np.exp(-x / t).
-
-    :param A: amplitude of the exponential decay.
-    :param tau: decay time of the exponential decay.
-    :param Ts: sampling period. Default is 1e-9.
-    :return: FIR and IIR taps.
-    """
-    tau = tau * Ts
-    k1 = Ts + 2 * tau * (A + 1)
-    k2 = Ts - 2 * tau * (A + 1)
-    c1 = Ts + 2 * tau
-    c2 = Ts - 2 * tau
-    feedback_tap = k2 / k1
-    feedforward_taps = np.array([c1, c2]) / k1
-    return feedforward_taps, feedback_tap
-
-
-def filter_calc(exponential):
-    """Derive FIR and IIR filter taps based on a list of exponential coefficients.
-
-    :param exponential: exponential coefficients defined as [(A1, tau1), (A2, tau2)]
-    :return: FIR and IIR taps as [fir], [iir]
-    """
-    # Initialization based on the number of exponential coefficients
-    b = np.zeros((2, len(exponential)))
-    feedback_taps = np.zeros(len(exponential))
-    # Derive feedback tap for each set of exponential coefficients
-    for i, (A, tau) in enumerate(exponential):
-        b[:, i], feedback_taps[i] = exponential_correction(A, tau)
-    # Derive feedback tap for each set of exponential coefficients
-    feedforward_taps = b[:, 0]
-    for i in range(len(exponential) - 1):
-        feedforward_taps = np.convolve(feedforward_taps, b[:, i + 1])
-    # feedforward taps are bounded to +/- 2
-    if np.abs(max(feedforward_taps)) >= 2:
-        feedforward_taps = 2 * feedforward_taps / max(feedforward_taps)
-
-    return feedforward_taps, feedback_taps
+# Moved to analysis.flux_predistortion, kept here for the old scripts
+from analysis.flux_predistortion import exponential_decay, exponential_correction, filter_calc
 
 
@@ -0,0 +1,147 @@
+"""
+Pipelined execution of configured `QMMeasurement` objects.\n
+While job N runs, job N+1 is built, compiled and pushed into the job queue of the QM with its input streams,
+so it starts as soon as job N ends. Finished datasets go to a callback on a worker thread (saving, fitting),
+which doesn't hold the next job either.\n
+ex.\n
+    queue = ExperimentQueue( callback=lambda name, dataset: save_nc(save_dir, name, dataset) )\n
+    for q in ["q0","q1","q2","q3","q4"]:\n
+        queue.add( f"{q}_T1", t1_of(q), shot_num=400 )\n
+        queue.add( f"{q}_ramsey", ramsey_of(q), shot_num=400 )\n
+    datasets = queue.run()
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from xarray import Dataset
+
+from config_component.config_hash import ConfigHasher
+from exp.QMMeasurement import QMMeasurement
+
+
+class ExperimentQueue:
+    def __init__( self, callback:Callable=None, workers:int=1, poll_interval:float=1. ):
+        """
+        callback: callback( name, dataset ) called on a worker thread for each finished measurement.\n
+        workers: number of callback threads.\n
+        poll_interval: seconds between two fetches of the running job.\n
+        Consecutive measurements with the same config hash share one QM and are pipelined,
+        a measurement with another config waits for the jobs before it to finish and opens its QM.
+        """
+        self.callback = callback
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.exp_list = []
+        self.exp_name = []
+        self._save_paths = []
+        # (name, job start, job end) in perf_counter time, as seen by the host
+        self.timeline = []
+        self._hasher = ConfigHasher()
+
+    def add( self, name:str, measurement:QMMeasurement, shot_num:int=None, save_path:str=None ):
+        """ Append the configured measurement, shot_num for its progress bar, save_path for its netCDF file """
+        if name in self.exp_name:
+            raise ValueError(f"Measurement name '{name}' is already in the queue!")
+        if shot_num is not None:
+            measurement.shot_num = shot_num
+        self.exp_list.append(measurement)
+        self.exp_name.append(name)
+        self._save_paths.append(save_path)
+
+    def _config_hash( self, measurement:QMMeasurement )->str:
+        config = measurement.config
+        if isinstance(config, dict):
+            return self._hasher.config_hash( config )
+        return config.config_hash()
+
+    def _groups( self )->List[List[Tuple[str, QMMeasurement, str]]]:
+        """ Consecutive measurements with the same config """
+        groups = []
+        last_hash = None
+        for name, measurement, save_path in zip(self.exp_name, self.exp_list, self._save_paths):
+            config_hash = self._config_hash( measurement )
+            if config_hash != last_hash:
+                groups.append([])
+                last_hash = config_hash
+            groups[-1].append( (name, measurement, save_path) )
+        return groups
+
+    @staticmethod
+    def _prepare( measurement:QMMeasurement ):
+        """ Compile and queue the program, return the pending job """
+        return measurement._enqueue( measurement._compile() )
+
+    def run( self )->Dict[str, Dataset]:
+        """
+        Run all the measurements in order, return {name: dataset}.\n
+        The callbacks are all finished when it returns, an exception in a callback is raised here.
+        """
+        datasets = {}
+        callbacks = []
+        self.timeline = []
+        with ThreadPoolExecutor(1) as preparer, ThreadPoolExecutor(self.workers) as worker:
+            for group in self._groups():
+                first = group[0][1]
+                first._qm = first._open_qm()
+                for _, measurement, _ in group[1:]:
+                    # The same opened QM and compiled programs for the whole group
+                    measurement._qm = first._qm
+                    measurement._opened_config = first._opened_config
+                    measurement._compiled_programs = first._compiled_programs
+
+                prepared = [ preparer.submit( self._prepare, first ) ]
+                for idx, (name, measurement, save_path) in enumerate(group):
+                    pending_job = prepared[idx].result()
+                    if idx +1 < len(group):
+                        prepared.append( preparer.submit( self._prepare, group[idx +1][1] ) )
+                    try:
+                        self._collect( name, measurement, pending_job, save_path, datasets )
+                    except BaseException:
+                        self._cancel( measurement, prepared[idx +1:] )
+                        raise
+                    if self.callback is not None:
+                        callbacks.append( worker.submit( self.callback, name, datasets[name] ) )
+            for future in callbacks:
+                future.result()
+        self.report()
+        return datasets
+
+    def _collect( self, name:str, measurement:QMMeasurement, pending_job, save_path:str, datasets:dict ):
+        """ Wait for the job to start, follow it and form its dataset """
+        print(f"Run {name}")
+        job = pending_job.wait_for_execution()
+        start = time.perf_counter()
+        measurement._measurement_start_time = datetime.now()
+        measurement._attach( job )
+        while measurement._results.is_processing():
+            measurement._poll()
+            time.sleep(self.poll_interval)
+        end = time.perf_counter()
+        datasets[name] = measurement._finish( save_path )
+        self.timeline.append( (name, start, end) )
+
+    @staticmethod
+    def _cancel( measurement:QMMeasurement, prepared:list ):
+        """ Halt the running job and cancel the queued ones after an error or interrupt """
+        measurement._halt()
+        for future in prepared:
+            if future.cancel() or future.exception() is not None:
+                continue
+            pending_job = future.result()
+            if hasattr(pending_job, "cancel"):
+                pending_job.cancel()
+
+    def idle_time( self )->float:
+        """ Seconds between the end of a job and the start of the next one, as seen by the host """
+        idle = 0.
+        for (_, _, end), (_, start, _) in zip(self.timeline[:-1], self.timeline[1:]):
+            idle += max( 0., start -end )
+        return idle
+
+    def report( self ):
+        if len(self.timeline) == 0:
+            return
+        total = self.timeline[-1][2] -self.timeline[0][1]
+        print(f"{len(self.timeline)} measurements in {total:.1f} s, {self.idle_time():.2f} s idle between jobs")
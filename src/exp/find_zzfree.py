@@ -10,6 +10,7 @@ u = unit(coerce_to_integer=True)
 import xarray as xr
 import numpy as np
 from exp.QMMeasurement import QMMeasurement
+from exp.native_gate_macros import play_gate, element_gate_set
 
 class ZZCouplerFreqRamsey( QMMeasurement ):
 
@@ -174,6 +175,8 @@ class ZZCouplerFreqEcho( QMMeasurement ):
     def _get_qua_program( self ):
         self.flux_qua = self._lin_flux_array( )
         self.evo_time_tick_qua = self._evo_time_tick_array( )
+        detector_gate_set = element_gate_set( self.config, self.zz_detector_xy[0] )
+        source_gate_set = element_gate_set( self.config, self.zz_source_xy[0] )
         with program() as ZZfree:
             iqdata_stream = multiRO_declare( self.ro_elements[0] )
             n = declare(int)
@@ -196,13 +199,13 @@ class ZZCouplerFreqEcho( QMMeasurement ):
                                 print("initializer didn't work!")
                                 wait(1 * u.us, self.ro_elements[0]) 
 
-                        play("x90", self.zz_detector_xy[0])  # 1st x90 gate
+                        play_gate("x90", self.zz_detector_xy[0], detector_gate_set)  # 1st x90 gate
                         wait(5)
                         align()
                         play("const"*amp(dc*2.), self.coupler_z[0], t)    # const 預設0.5
                         align()
-                        play("x180", self.zz_detector_xy[0])     #flip
-                        play("x180", self.zz_source_xy[0])      #make ZZ crosstalk
+                        play_gate("x180", self.zz_detector_xy[0], detector_gate_set)     #flip
+                        play_gate("x180", self.zz_source_xy[0], source_gate_set)      #make ZZ crosstalk
                         wait(5)
                         align()
 
@@ -210,7 +213,7 @@ class ZZCouplerFreqEcho( QMMeasurement ):
                         align()
                         # wait(5)
                         # frame_rotation_2pi(0.5, self.zz_detector_xy[0])  # Virtual Z-rotation
-                        play("-x90", self.zz_detector_xy[0])  # 2nd x90 gate
+                        play_gate("-x90", self.zz_detector_xy[0], detector_gate_set)  # 2nd x90 gate
                         align()
                         
                         # Readout
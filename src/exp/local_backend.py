@@ -0,0 +1,198 @@
+"""
+Local stand-in for the QuantumMachinesManager, for running `QMMeasurement` offline.\n
+No QUA is executed, a job lasts `duration` seconds and its results come from a python function of the program
+and the input streams. Like the job queue of a QM, the jobs of a machine run one after another.
+Use it to test the measurement flow and the concurrency of `run_async` without a cluster.\n
+ex.\n
+    def t1_results( program, input_streams ):\n
+        n_avg = input_streams["n_avg"][0]\n
+        return {"q0_ro_I": np.zeros(20), "q0_ro_Q": np.zeros(20), "iteration": n_avg -1}\n
+    qmm = LocalQuantumMachinesManager( t1_results, duration=2 )\n
+    t1 = exp_relaxation_time( config, qmm )\n
+    await asyncio.gather( t1.run_async(), ramsey.run_async() )
+"""
+import threading
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+
+class LocalResultHandle:
+    def __init__( self, job:"LocalJob", name:str ):
+        self._job = job
+        self.name = name
+
+    def wait_for_values( self, count:int=1, timeout:float=None ):
+        pass
+
+    def fetch_all( self ):
+        """ The final value, a scalar (ex. iteration) grows with the progress of the job """
+        value = self._job._final_results()[self.name]
+        if np.ndim(value) == 0 and self._job.is_processing():
+            return type(value)( value*self._job.progress() )
+        return value
+
+class LocalResultHandles:
+    def __init__( self, job:"LocalJob" ):
+        self._job = job
+
+    def __getattr__( self, name:str ):
+        if name != "_job" and name in self._job._final_results():
+            return LocalResultHandle( self._job, name )
+        raise AttributeError(name)
+
+    def get( self, name:str )->LocalResultHandle:
+        return getattr( self, name )
+
+    def is_processing( self )->bool:
+        return self._job.is_processing()
+
+    def wait_for_all_values( self, timeout:float=None ):
+        while self._job.is_processing():
+            time.sleep(0.01)
+
+class LocalJob:
+    def __init__( self, program, results:Callable, duration:float, previous:"LocalJob"=None ):
+        """
+        A job of `LocalQuantumMachine`, running for duration seconds or until `halt()`.\n
+        It starts when it is created or when the previous job of the machine ends.
+        """
+        self.program = program
+        self.input_streams = {}
+        self._results = results
+        self._duration = duration
+        self._created = time.perf_counter()
+        self._previous = previous
+        self._start = None if previous is not None else self._created
+        self._halted_at = None
+        self._lock = threading.Lock()
+        self._final = None
+        self.result_handles = LocalResultHandles( self )
+
+    def insert_input_stream( self, name:str, data:list ):
+        self.input_streams.setdefault(name, []).extend(data)
+
+    def _final_results( self )->Dict[str,object]:
+        # Called from the fetching threads, the results are computed once
+        with self._lock:
+            if self._final is None:
+                self._final = self._results( self.program, self.input_streams )
+            return self._final
+
+    def start_time( self )->float:
+        """ perf_counter time the job starts, the end of the previous job if it is still queued """
+        if self._start is not None:
+            return self._start
+        start = max( self._created, self._previous.end_time() )
+        if start <= time.perf_counter():
+            # The previous job is over, forget the chain
+            self._start = start
+            self._previous = None
+        return start
+
+    def end_time( self )->float:
+        if self._halted_at is not None:
+            return self._halted_at
+        return self.start_time() +self._duration
+
+    def progress( self )->float:
+        if self._duration <= 0:
+            return 1.
+        return min( 1., max( 0., (time.perf_counter() -self.start_time())/self._duration ) )
+
+    def is_processing( self )->bool:
+        return time.perf_counter() < self.end_time()
+
+    def halt( self )->bool:
+        self._halted_at = min( time.perf_counter(), self.end_time() )
+        return True
+
+    @property
+    def halted( self )->bool:
+        return self._halted_at is not None
+
+class _LocalPendingJob:
+    def __init__( self, job:LocalJob ):
+        self._job = job
+
+    def insert_input_stream( self, name:str, data:list ):
+        self._job.insert_input_stream( name, data )
+
+    def wait_for_execution( self, timeout:float=None )->LocalJob:
+        wait = self._job.start_time() -time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        return self._job
+
+class _LocalQueue:
+    def __init__( self, qm:"LocalQuantumMachine" ):
+        self._qm = qm
+
+    def add_compiled( self, program_id:str, overrides:dict=None )->_LocalPendingJob:
+        return _LocalPendingJob( self._qm._new_job( self._qm._programs[program_id] ) )
+
+class LocalQuantumMachine:
+    def __init__( self, config:dict, manager:"LocalQuantumMachinesManager" ):
+        self.config = config
+        self._manager = manager
+        # program id -> program
+        self._programs = {}
+        self.queue = _LocalQueue( self )
+        self._last_job = None
+        # runtime settings received, (setter name, args)
+        self.runtime_calls = []
+        self.closed = False
+
+    def _new_job( self, program )->LocalJob:
+        job = LocalJob( program, self._manager.results, self._manager.duration, self._last_job )
+        self._last_job = job
+        self._manager.jobs.append(job)
+        return job
+
+    def compile( self, program )->str:
+        program_id = f"local_program_{len(self._programs)}"
+        self._programs[program_id] = program
+        self._manager.compile_count += 1
+        return program_id
+
+    def execute( self, program )->LocalJob:
+        return self._new_job( program )
+
+    def set_intermediate_frequency( self, *args ):
+        self.runtime_calls.append(("set_intermediate_frequency", args))
+
+    def set_output_dc_offset_by_element( self, *args ):
+        self.runtime_calls.append(("set_output_dc_offset_by_element", args))
+
+    def set_input_dc_offset_by_element( self, *args ):
+        self.runtime_calls.append(("set_input_dc_offset_by_element", args))
+
+    def set_mixer_correction( self, *args ):
+        self.runtime_calls.append(("set_mixer_correction", args))
+
+    def close( self ):
+        self.closed = True
+
+class LocalQuantumMachinesManager:
+    def __init__( self, results:Callable, duration:float=1. ):
+        """
+        Stand-in for `QuantumMachinesManager` opening `LocalQuantumMachine`.\n
+        results: results( program, input_streams ) -> {result name: final value} for each job,
+        input_streams is {stream name: [inserted values]}.\n
+        duration: seconds each job runs before its results are final.
+        """
+        self.results = results
+        self.duration = duration
+        self.machines = []
+        self.jobs = []
+        self.compile_count = 0
+
+    def open_qm( self, config:dict, **kwargs )->LocalQuantumMachine:
+        qm = LocalQuantumMachine( config, self )
+        self.machines.append(qm)
+        return qm
+
+    def close_all_quantum_machines( self ):
+        for qm in self.machines:
+            qm.close()
@@ -0,0 +1,156 @@
+"""
+QUA macros playing the native single qubit gates whatever the gate set of the XY element.
+With the "two_base" gate set only x180 and x90 are stored in the config, the other gates are
+the base pulses played through an amp() matrix. With "virtual_z" they are the base pulses
+played in a rotated frame (virtual Z). See `config_component.gate_set`.
+"""
+
+from qm.qua import *
+
+from config_component.gate_set import gate_realization, gate_frame, gate_set_of
+
+def element_gate_set( config, element:str )->str:
+    """
+    The gate set of the XY element, ex. "full" or "virtual_z".\n
+    config: `Configuration` or config dict. The `Configuration` has the gate set recorded on the element,
+    a config dict only has the operations, "two_base" is given for the elements of "virtual_z" too.
+    Give the gate set explicitly to play the gates of a config dict in "virtual_z".
+    """
+    if isinstance(config, dict):
+        return gate_set_of( config["elements"][element]["operations"] )
+    element_info = config.elements[element]
+    if element_info.gate_set is not None:
+        return element_info.gate_set
+    return gate_set_of( element_info._operations )
+
+def play_gate( gate:str, element:str, gate_set:str="full", scale=None, matrix=None, **kwargs ):
+    """
+    Play the native gate ex. "y90" on element.\n
+    gate_set: the gate set of the element, from `element_gate_set`.\n
+    scale: amplitude pre-factor, float or QUA fixed, applied on top of the gate matrix. ex. for amplitude sweeps\n
+    matrix: amp() matrix (v00, v01, v10, v11) of floats or QUA fixed applied on top of the gate,
+    as `play(gate*amp(*matrix))` plays it on a stored gate, ex. (1, 0, 0, a) to scale the DRAG quadrature of x180.\n
+    kwargs: passed to `play`, ex. duration, condition.\n
+    With "virtual_z" the frame is rotated before the pulse and back after it, use `FrameTracker` to merge the rotations of a sequence.
+    """
+    frame = _wrap_turns( gate_frame( gate_set, gate ) )
+    if frame != 0:
+        frame_rotation_2pi( frame, element )
+        play_gate( "x180" if gate.endswith("180") else "x90", element, "two_base", scale, _frame_matrix( gate, matrix ), **kwargs )
+        frame_rotation_2pi( -frame, element )
+        return
+    operation, gate_matrix = gate_realization( gate_set, gate )
+    if matrix is not None:
+        gate_matrix = _compose( matrix, gate_matrix if gate_matrix is not None else _identity )
+    if gate_matrix is None:
+        if scale is None:
+            play( operation, element, **kwargs )
+        else:
+            play( operation*amp(scale), element, **kwargs )
+    else:
+        if scale is not None:
+            gate_matrix = [ _mul(v, scale) for v in gate_matrix ]
+        play( operation*amp(*gate_matrix), element, **kwargs )
+
+_identity = (1., 0., 0., 1.)
+
+def _is_const( value, const:float )->bool:
+    """ If value is the python number const, QUA expressions are never """
+    return isinstance(value, (int, float)) and value == const
+
+def _mul( a, b ):
+    """ a*b of floats or QUA expressions, without the QUA operations by 0 and 1 """
+    if _is_const(a, 0) or _is_const(b, 0):
+        return 0
+    if _is_const(a, 1):
+        return b
+    if _is_const(b, 1):
+        return a
+    return a*b
+
+def _add( a, b ):
+    if _is_const(a, 0):
+        return b
+    if _is_const(b, 0):
+        return a
+    return a+b
+
+def _compose( first, second )->tuple:
+    """ amp() matrix of `first` applied after `second`, the product first @ second """
+    return (
+        _add( _mul(first[0], second[0]), _mul(first[1], second[2]) ),
+        _add( _mul(first[0], second[1]), _mul(first[1], second[3]) ),
+        _add( _mul(first[2], second[0]), _mul(first[3], second[2]) ),
+        _add( _mul(first[2], second[1]), _mul(first[3], second[3]) ),
+    )
+
+def _frame_matrix( gate:str, matrix ):
+    """
+    The matrix for the x pulse played in the rotated frame of the gate, so it acts like `matrix` on the gate.
+    The frame rotation R of the gate is the "two_base" matrix of the gate, the x pulse gets R^T @ matrix @ R.
+    """
+    if matrix is None:
+        return None
+    rotation = gate_realization( "two_base", gate )[1]
+    if rotation is None:
+        return matrix
+    rotation_t = (rotation[0], rotation[2], rotation[1], rotation[3])
+    return _compose( rotation_t, _compose( matrix, rotation ) )
+
+def play_gates( gates:list, element:str, gate_set:str="full" ):
+    """
+    Play the native gates one after another, ex. ["x90","-y90"], the frame is back to where it was at the end.
+    """
+    tracker = FrameTracker( gate_set )
+    for gate in gates:
+        tracker.play( gate, element )
+    tracker.restore( element )
+
+def _wrap_turns( turns:float )->float:
+    """ Turns in [-0.5, 0.5) """
+    return round( (turns +0.5) %1 -0.5, 12 )
+
+class FrameTracker:
+    def __init__( self, gate_set:str="virtual_z" ):
+        """
+        Play native gates and keep the frame of each XY element while the QUA program is written.\n
+        With "virtual_z" a gate is its x pulse played in the frame of its axis, x=0, y=0.25, -x=0.5, -y=0.75 turns,
+        only the difference with the current frame is rotated, ex. y90 -y90 x90 needs 3 frame rotations instead of 4 with `play_gate`.\n
+        Other gate sets play the gates by `play_gate`, only the virtual Z of `rotate_frame` is tracked.\n
+        The frame is only known along one branch of the program, call `restore()` at the end of a switch_ case or if_ block.
+        """
+        self.gate_set = gate_set
+        # element -> frame of the hardware in turns
+        self._frames = {}
+        # element -> virtual Z rotations asked by `rotate_frame` in turns, the frame of the x axis
+        self._offsets = {}
+
+    def frame( self, element:str )->float:
+        """ The frame (turns) of element on the hardware """
+        return self._frames.get(element, 0.)
+
+    def rotate_frame( self, element:str, turns:float ):
+        """ Virtual Z like `frame_rotation_2pi(turns, element)`, merged with the frame rotation of the next gate """
+        self._offsets[element] = self._offsets.get(element, 0.) +turns
+
+    def _move_frame( self, element:str, target:float ):
+        diff = _wrap_turns( target -self.frame(element) )
+        if abs(diff) > 1e-12:
+            frame_rotation_2pi( diff, element )
+            self._frames[element] = self.frame(element) +diff
+
+    def play( self, gate:str, element:str, scale=None, matrix=None, **kwargs ):
+        """ Play the native gate ex. "-y90" on element, see `play_gate` """
+        frame = gate_frame( self.gate_set, gate )
+        self._move_frame( element, self._offsets.get(element, 0.) +frame )
+        if self.gate_set == "virtual_z":
+            play_gate( "x180" if gate.endswith("180") else "x90", element, "two_base", scale, _frame_matrix( gate, matrix ), **kwargs )
+        else:
+            play_gate( gate, element, self.gate_set, scale, matrix, **kwargs )
+
+    def restore( self, *elements:str ):
+        """ Rotate the frames back to the x axis of the tracked virtual Z, all the elements if none is given """
+        if len(elements) == 0:
+            elements = list(dict.fromkeys( list(self._frames.keys()) +list(self._offsets.keys()) ))
+        for element in elements:
+            self._move_frame( element, self._offsets.get(element, 0.) )
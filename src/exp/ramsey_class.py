@@ -12,6 +12,7 @@ import warnings
 warnings.filterwarnings("ignore")
 from qualang_tools.units import unit
 u = unit(coerce_to_integer=True)
+import numpy as np
 import xarray as xr
 import time
 from exp.QMMeasurement import QMMeasurement
@@ -49,7 +50,10 @@ class exp_ramsey( QMMeasurement ):
             n_st = declare_stream()
             cc = declare(int)  # QUA variable for the idle time, unit in clock cycle
             phi = declare(fixed)  # Phase to apply the virtual Z-rotation
-            with for_(n, 0, n < self.n_avg, n + 1):
+            # fed by _get_qua_parameters, new n_avg or virtual_detune reuse the compiled program
+            n_avg = self._declare_parameter("n_avg", int)
+            detune = self._declare_parameter("virtual_detune", fixed)
+            with for_(n, 0, n < n_avg, n + 1):
                 with for_( *from_array(cc, cc_qua) ):
                     
                         # Init
@@ -63,7 +67,7 @@ class exp_ramsey( QMMeasurement ):
                                 wait(100*u.us)
 
                         # Operation
-                        phi = Cast.mul_fixed_by_int( self.virtual_detune/1e3, 4 *cc)
+                        phi = Cast.mul_fixed_by_int( detune, 4 *cc)
                         # True_value =  v_detune_qua*4*cc
                         # False_value = v_detune_qua*4*cc
 
@@ -86,6 +90,10 @@ class exp_ramsey( QMMeasurement ):
                 n_st.save("iteration")
                 multiRO_pre_save(iqdata_stream, self.ro_element, (time_len,) )
         return ramsey
+
+    def _get_qua_parameters( self ):
+        # virtual detune in turns per ns
+        return {"n_avg": self.n_avg, "virtual_detune": self.virtual_detune/1e3}
     
     def _get_fetch_data_list( self ):
         ro_ch_name = []
@@ -33,6 +33,7 @@ import warnings
 from qualang_tools.units import unit
 
 from exp.RO_macros import multiRO_declare, multiRO_measurement, multiRO_pre_save
+from exp.native_gate_macros import FrameTracker, element_gate_set
 
 from matplotlib.figure import Figure
 
@@ -73,81 +74,55 @@ def generate_sequence( max_circuit_depth, seed=None ):
     return sequence, inv_gate
 
 
-def play_sequence(sequence_list, depth, q_name, pi_len=40):
+# Native gates of the 24 single qubit Cliffords, index 0 is the identity
+clifford_gates = [
+    [], # 0
+    ["x180"], # 1
+    ["y180"], # 2
+    ["y180", "x180"], # 3
+    ["x90", "y90"], # 4
+    ["x90", "-y90"], # 5
+    ["-x90", "y90"], # 6
+    ["-x90", "-y90"], # 7
+    ["y90", "x90"], # 8
+    ["y90", "-x90"], # 9
+    ["-y90", "x90"], # 10
+    ["-y90", "-x90"], # 11
+    ["x90"], # 12
+    ["-x90"], # 13
+    ["y90"], # 14
+    ["-y90"], # 15
+    ["-x90", "y90", "x90"], # 16
+    ["-x90", "-y90", "x90"], # 17
+    ["x180", "y90"], # 18
+    ["x180", "-y90"], # 19
+    ["y180", "x90"], # 20
+    ["y180", "-x90"], # 21
+    ["x90", "y90", "x90"], # 22
+    ["-x90", "y90", "-x90"], # 23
+]
+
+def play_sequence(sequence_list, depth, q_name, pi_len=40, gate_set="full"):
+    """
+    gate_set of the element q_name, the gates are played by `FrameTracker`,
+    with "virtual_z" the y gates are x pulses in a rotated frame and the frame is back to x at the end of each Clifford.
+    """
     i = declare(int)
+    tracker = FrameTracker(gate_set)
     with for_(i, 0, i <= depth, i + 1):
         with switch_(sequence_list[i], unsafe=True):
             with case_(0):
                 wait(pi_len // 4, q_name)
-            with case_(1):
-                play("x180", q_name)
-            with case_(2):
-                play("y180", q_name)
-            with case_(3):
-                play("y180", q_name)
-                play("x180", q_name)
-            with case_(4):
-                play("x90", q_name)
-                play("y90", q_name)
-            with case_(5):
-                play("x90", q_name)
-                play("-y90", q_name)
-            with case_(6):
-                play("-x90", q_name)
-                play("y90", q_name)
-            with case_(7):
-                play("-x90", q_name)
-                play("-y90", q_name)
-            with case_(8):
-                play("y90", q_name)
-                play("x90", q_name)
-            with case_(9):
-                play("y90", q_name)
-                play("-x90", q_name)
-            with case_(10):
-                play("-y90", q_name)
-                play("x90", q_name)
-            with case_(11):
-                play("-y90", q_name)
-                play("-x90", q_name)
-            with case_(12):
-                play("x90", q_name)
-            with case_(13):
-                play("-x90", q_name)
-            with case_(14):
-                play("y90", q_name)
-            with case_(15):
-                play("-y90", q_name)
-            with case_(16):
-                play("-x90", q_name)
-                play("y90", q_name)
-                play("x90", q_name)
-            with case_(17):
-                play("-x90", q_name)
-                play("-y90", q_name)
-                play("x90", q_name)
-            with case_(18):
-                play("x180", q_name)
-                play("y90", q_name)
-            with case_(19):
-                play("x180", q_name)
-                play("-y90", q_name)
-            with case_(20):
-                play("y180", q_name)
-                play("x90", q_name)
-            with case_(21):
-                play("y180", q_name)
-                play("-x90", q_name)
-            with case_(22):
-                play("x90", q_name)
-                play("y90", q_name)
-                play("x90", q_name)
-            with case_(23):
-                play("-x90", q_name)
-                play("y90", q_name)
-                play("-x90", q_name)
-
-def single_qubit_RB( num_of_sequences, max_circuit_depth, delta_clifford, q_name:str, ro_element:list, config, qmm:QuantumMachinesManager, sequence_repeat:int=1, n_avg=100, state_discrimination:list=None, initialization_macro=None, simulate:bool=False, seed=None, gate_length=40 ):
+            for clifford_idx in range(1, len(clifford_gates)):
+                with case_(clifford_idx):
+                    for gate in clifford_gates[clifford_idx]:
+                        tracker.play(gate, q_name)
+                    tracker.restore(q_name)
+
+def single_qubit_RB( num_of_sequences, max_circuit_depth, delta_clifford, q_name:str, ro_element:list, config, qmm:QuantumMachinesManager, sequence_repeat:int=1, n_avg=100, state_discrimination:list=None, initialization_macro=None, simulate:bool=False, seed=None, gate_length=40, gate_set:str=None ):
+    """
+    gate_set: how the Clifford gates are played, ex. "virtual_z", see `exp.native_gate_macros`. None for the gate set of q_name in config.
+    """
     
     
     is_discriminated = False
@@ -159,6 +134,8 @@ def single_qubit_RB( num_of_sequences, max_circuit_depth, delta_clifford, q_name
         is_const_init = True  
 
     gate_step = max_circuit_depth / delta_clifford + 1
+    if gate_set is None:
+        gate_set = element_gate_set( config, q_name )
     ###################
     # The QUA program #
     ###################
@@ -206,7 +183,7 @@ def single_qubit_RB( num_of_sequences, max_circuit_depth, delta_clifford, q_name
                         # The strict_timing ensures that the sequence will be played without gaps
                         with strict_timing_():
                             # Play the random sequence of desired depth
-                            play_sequence(sequence_list, depth, q_name, gate_length)
+                            play_sequence(sequence_list, depth, q_name, gate_length, gate_set)
                         # Align the two elements to measure after playing the circuit.
                         align()
 
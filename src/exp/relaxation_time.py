@@ -55,7 +55,9 @@ class exp_relaxation_time( QMMeasurement):
             t = declare(int)  
             n = declare(int)
             n_st = declare_stream()
-            with for_(n, 0, n < self.n_avg, n + 1):
+            # fed by _get_qua_parameters, a new n_avg reuses the compiled program
+            n_avg = self._declare_parameter("n_avg", int)
+            with for_(n, 0, n < n_avg, n + 1):
                 with for_(*from_array(t, cc_delay_qua)):
                     # initializaion
                     if self.initializer is None:
@@ -83,6 +85,9 @@ class exp_relaxation_time( QMMeasurement):
 
         return t1
 
+    def _get_qua_parameters( self ):
+        return {"n_avg": self.n_avg}
+
     def _get_fetch_data_list( self ):
         ro_ch_name = []
         for r_name in self.ro_elements:
@@ -18,7 +18,7 @@ def freq_sweep_flux_dep( ro_element:list, z_element:list, config:dict, qm_machin
     Parameters: \n
 
     flux_settle_time: \n
-        unit in us \n 
+        unit in us, ex. the corrected_settle_time of `analysis.flux_predistortion.check_filter` /1000 \n 
     freq_range: \n
         a tuple ( upper, lower ), unit in MHz. \n
     freq_resolution:
@@ -46,7 +46,8 @@ def freq_sweep_flux_dep( ro_element:list, z_element:list, config:dict, qm_machin
     freqs_len = freqs_qua.shape[0]
     flux_len = fluxes.shape[0]
 
-    flux_settle_time_qua = (flux_settle_time/4) *u.us
+    # in clock cycles, at least 4
+    flux_settle_time_qua = max( 4, int((flux_settle_time/4) *u.us) )
     with program() as multi_res_spec_vs_flux:
         # QUA macro to declare the measurement variables and their corresponding streams for a given number of resonators
         iqdata_stream = multiRO_declare( ro_element )
@@ -128,7 +129,7 @@ def freq_sweep_flux_dep( ro_element:list, z_element:list, config:dict, qm_machin
 def freq_sweep_flux_dep_stable( ro_element:list, z_element:list, config:dict, qm_machine:QuantumMachinesManager, n_avg:int=100, flux_settle_time:int=1000, freq_range:tuple=(-3,3), flux_range:tuple=(-0.3,0.3), flux_resolution:float=0.015, freq_resolution:float=0.05, initializer:tuple=None )->xr.Dataset:
     """
     flux_settle_time: \n
-        unit in us \n 
+        unit in us, ex. the corrected_settle_time of `analysis.flux_predistortion.check_filter` /1000 \n 
     freq_range: \n
         a tuple ( upper, lower ), unit in MHz. \n
     freq_resolution:
@@ -149,7 +150,8 @@ def freq_sweep_flux_dep_stable( ro_element:list, z_element:list, config:dict, qm
     freqs_qua = np.arange( freq_r1_qua, freq_r2_qua, freq_resolution_qua)
     fluxes = np.arange( flux_range[0], flux_range[1], flux_resolution)
 
-    flux_settle_time_qua = flux_settle_time/4*u.us
+    # in clock cycles, at least 4
+    flux_settle_time_qua = max( 4, int(flux_settle_time/4*u.us) )
     freqs_mhz = freqs_qua/1e6 #  Unit in MHz
 
     freqs_len = freqs_qua.shape[0]
@@ -0,0 +1,144 @@
+"""
+Pool of opened quantum machines keyed by the hash of their config.\n
+Experiments close their QM when they finish, so back-to-back experiments with the same config open the same machine again.
+Give the pool to an experiment instead of the QuantumMachinesManager, the `close()` of the QM it hands out keeps the machine opened
+for the next experiment.\n
+ex.\n
+    pool = QMSessionPool( qmm )\n
+    exp = exp_relaxation_time( config, pool )\n
+    single_qubit_RB( ..., config, pool )\n
+    pool.report()\n
+    pool.shutdown()
+"""
+import time
+from copy import deepcopy
+from typing import Dict
+
+from qm.QuantumMachinesManager import QuantumMachinesManager
+
+from config_component.config_diff import diff_config, apply_runtime_changes
+from config_component.config_hash import ConfigHasher
+from config_component.reference_index import validate_config
+
+
+class PooledQM:
+    def __init__( self, qm, pool:"QMSessionPool" ):
+        """
+        The QuantumMachine handed out by `QMSessionPool`, used like the QuantumMachine itself.\n
+        `close()` leaves the machine opened in the pool, it is closed by `QMSessionPool.shutdown()`.
+        """
+        self._qm = qm
+        self._pool = pool
+
+    def __getattr__( self, name:str ):
+        if name in ("_qm", "_pool"):
+            raise AttributeError(name)
+        return getattr( self._qm, name )
+
+    @property
+    def machine( self ):
+        """ The QuantumMachine of the pool """
+        return self._qm
+
+    def close( self ):
+        pass
+
+class QMSessionPool:
+    def __init__( self, qmm:QuantumMachinesManager, max_sessions:int=1 ):
+        """
+        Keep the opened QMs alive per config hash and hand them to the experiments by `open_qm`.\n
+        A config whose only changes to a pooled QM are runtime settable (IF, DC offset, mixer correction) gets that QM
+        with the changes pushed to it, other changes open a new QM.\n
+        max_sessions: number of QMs kept opened, the least recently used one is closed beyond it.
+        With more than one, the QMs are opened without closing the others and their configs shouldn't share ports.\n
+        Other attributes are the ones of qmm, ex. `pool.simulate(...)`.
+        """
+        if max_sessions < 1:
+            raise ValueError("The pool should keep at least one session!")
+        self.qmm = qmm
+        self.max_sessions = max_sessions
+        # config hash -> (QuantumMachine, opened config dict), least recently used first
+        self._sessions = {}
+        self._hasher = ConfigHasher()
+        self.stats = {"hit":0, "runtime":0, "miss":0, "closed":0, "open_time":0.}
+
+    def __getattr__( self, name:str ):
+        if name == "qmm":
+            raise AttributeError(name)
+        return getattr( self.qmm, name )
+
+    def open_qm( self, config, **kwargs )->PooledQM:
+        """
+        The QM for config (dict or `Configuration`), from the pool if one has the same config hash.\n
+        kwargs: passed to `QuantumMachinesManager.open_qm` when a new QM is opened.
+        """
+        config_dict = config if isinstance(config, dict) else config.get_config()
+        config_hash = self._hasher.config_hash( config_dict )
+
+        if config_hash in self._sessions:
+            self.stats["hit"] += 1
+            print(f"QM pool hit {config_hash[:8]}")
+            return PooledQM( self._touch(config_hash, config_hash), self )
+
+        for old_hash in reversed(list(self._sessions.keys())):
+            qm, opened_config = self._sessions[old_hash]
+            diff = diff_config( opened_config, config_dict )
+            if diff.needs_reopen:
+                continue
+            apply_runtime_changes( qm, diff, config_dict )
+            self._sessions[old_hash] = (qm, deepcopy(config_dict))
+            self.stats["runtime"] += 1
+            print(f"QM pool runtime update {old_hash[:8]} -> {config_hash[:8]}, {len(diff.runtime)} changes")
+            return PooledQM( self._touch(old_hash, config_hash), self )
+
+        self.stats["miss"] += 1
+        problems = validate_config( config_dict )
+        if len(problems) != 0:
+            raise ValueError("Config is invalid:\n"+"\n".join(problems))
+        if self.max_sessions == 1:
+            # Opening the QM closes the others on the server
+            self._close_sessions( list(self._sessions.keys()) )
+        else:
+            self._close_sessions( list(self._sessions.keys())[:len(self._sessions) -self.max_sessions +1] )
+            kwargs.setdefault("close_other_machines", False)
+        start = time.perf_counter()
+        qm = self.qmm.open_qm( config_dict, **kwargs )
+        open_time = time.perf_counter() -start
+        self.stats["open_time"] += open_time
+        print(f"QM pool miss {config_hash[:8]}, opened in {open_time:.2f} s")
+        self._sessions[config_hash] = (qm, deepcopy(config_dict))
+        return PooledQM( qm, self )
+
+    def _touch( self, old_hash:str, new_hash:str ):
+        """ Move the session to the most recently used end under new_hash, return its QM """
+        session = self._sessions.pop(old_hash)
+        self._sessions[new_hash] = session
+        return session[0]
+
+    def _close_sessions( self, hashes:list ):
+        for config_hash in hashes:
+            qm, _ = self._sessions.pop(config_hash)
+            qm.close()
+            self.stats["closed"] += 1
+
+    @property
+    def sessions( self )->list:
+        """ Config hashes of the opened QMs, least recently used first """
+        return list(self._sessions.keys())
+
+    def report( self )->Dict[str,float]:
+        """
+        Print and return the hit/miss statistics.\n
+        saved_time is the mean open time of the misses times the number of QMs given without opening one.
+        """
+        reused = self.stats["hit"] +self.stats["runtime"]
+        mean_open = self.stats["open_time"]/self.stats["miss"] if self.stats["miss"] else 0.
+        report = {**self.stats, "saved_time": reused*mean_open}
+        print(f"QM pool: {self.stats['hit']} hits, {self.stats['runtime']} runtime updates, {self.stats['miss']} misses, "
+              f"{self.stats['open_time']:.1f} s opening, about {report['saved_time']:.1f} s saved")
+        return report
+
+    def shutdown( self ):
+        """ Close all the QMs of the pool """
+        self._close_sessions( list(self._sessions.keys()) )
+        print("QM pool is shut down.")
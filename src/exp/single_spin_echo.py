@@ -11,6 +11,7 @@ from qualang_tools.units import unit
 u = unit(coerce_to_integer=True)
 import time
 from exp.QMMeasurement import QMMeasurement
+from exp.native_gate_macros import play_gate, element_gate_set
 
 class SpinEcho( QMMeasurement ):
     def __init__( self, config, qmm: QuantumMachinesManager):
@@ -35,6 +36,7 @@ class SpinEcho( QMMeasurement ):
         time_resolution_qua = (self.time_resolution/4) *u.ns
         self.qua_half_evo_time = np.arange(half_time_r1_qua, half_time_r2_qua, time_resolution_qua)
         print(self.qua_half_evo_time)
+        gate_sets = { q: element_gate_set(self.config, q) for q in self.xy_elements }
         # QUA program
         with program() as spin_echo:
 
@@ -55,11 +57,11 @@ class SpinEcho( QMMeasurement ):
 
                     # Operation: x90 -> x180 -> x-90, should theoretically project to |0>    
                     for q in self.xy_elements:
-                        play("x90", q)
+                        play_gate("x90", q, gate_sets[q])
                         wait(half_evo_time)
-                        play("x180", q)  
+                        play_gate("x180", q, gate_sets[q])  
                         wait(half_evo_time)  
-                        play("-x90",q)
+                        play_gate("-x90", q, gate_sets[q])
                     align()
                     # Readout
                     multiRO_measurement( iqdata_stream,  resonators=self.ro_elements, weights="rotated_")
@@ -0,0 +1,262 @@
+"""
+Crash-safe on-disk store of the live fetched results of a measurement.\n
+The store is a directory like a zarr group:\n
+    meta.json               dims, mode and files of each variable, coords, attrs, number of snapshots, complete flag\n
+    coords/{name}.npy       coordinates\n
+    {variable}/{k}.npy      snapshots of the variable, or chunks along the append dimension\n
+Every file is written to a temporary name and renamed, meta.json last, so the store read after a crash,
+connection drop or Ctrl-C holds the last complete snapshot.\n
+ex.\n
+    dataset = my_exp.run( 400, stream_path="data/q4_flux_scan" )\n
+    partial = load_partial( "data/q4_flux_scan" )
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import xarray as xr
+
+_meta_name = "meta.json"
+
+def _json_value( value ):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (str, int, float, bool, list, dict)) or value is None:
+        return value
+    return str(value)
+
+def _atomic_save( path:Path, values:np.ndarray ):
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with open(tmp_path, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+def _atomic_json( path:Path, content:dict ):
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        json.dump(content, f, indent=1, default=_json_value)
+    os.replace(tmp_path, path)
+
+def _rows( values:np.ndarray, axis:int, start:int, stop:int )->np.ndarray:
+    """ View of the rows from start to stop along axis, not a copy like np.take """
+    return values[(slice(None),)*axis +(slice(start, stop),)]
+
+def _digest( values:np.ndarray )->str:
+    # a contiguous view is hashed without a copy
+    return hashlib.sha1(np.ascontiguousarray(values)).hexdigest()
+
+class StreamingWriter:
+    def __init__( self, path, append_dim:str=None, retention:int=1, min_interval:float=0., resume:bool=False ):
+        """
+        Write the snapshots of a dataset to the store at path (a directory).\n
+        append_dim: dimension the data grows along, ex. the flux of a 2D scan saved row by row.
+        The variables with this dimension are stored as chunks of rows, a snapshot writes the new rows
+        and rewrites the rows which changed since the last one, ex. the averaged rows of a fixed shape result.\n
+        retention: number of snapshots kept for the other variables, the latest ones.\n
+        min_interval: seconds between two snapshots, a `write()` in between is skipped unless forced.\n
+        resume: continue writing an existing store, ex. after a reconnection, otherwise an existing store raises ValueError.
+        The rows of the new job along append_dim, and its coordinates along it, go after the stored rows.\n
+        Only the layout of the store is kept in memory, not the data.
+        """
+        if retention < 1:
+            raise ValueError("At least one snapshot should be kept!")
+        self.path = Path(path)
+        self.append_dim = append_dim
+        self.retention = retention
+        self.min_interval = min_interval
+        self._last_write = None
+        # coordinate name -> values last written
+        self._coords = {}
+        # variable or coordinate name -> stored rows along append_dim before resuming
+        self._resumed_rows = {}
+        # variable name -> (number of chunks before resuming, digests of the chunks written by this writer)
+        self._chunk_digests = {}
+        self._coord_prefix = {}
+
+        meta_path = self.path/_meta_name
+        if meta_path.exists():
+            if not resume:
+                raise ValueError(f"Streaming store {self.path} already exists, use resume=True to continue it")
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            if self.meta["append_dim"] != append_dim:
+                raise ValueError(f"Streaming store {self.path} appends along {self.meta['append_dim']}, not {append_dim}")
+            self.meta["complete"] = False
+            self._resume()
+        else:
+            (self.path/"coords").mkdir(parents=True, exist_ok=True)
+            self.meta = {
+                "append_dim": append_dim, "complete": False, "snapshots": 0, "updated": None,
+                "attrs": {}, "coords": {}, "variables": {},
+            }
+
+    def _resume( self ):
+        append_dim = self.append_dim
+        for name, info in self.meta["variables"].items():
+            if info["mode"] == "append":
+                self._resumed_rows[name] = sum(info["rows"])
+        if append_dim is None or len(self._resumed_rows) == 0:
+            return
+        rows = min(self._resumed_rows.values())
+        for name, info in self.meta["coords"].items():
+            if append_dim in info["dims"]:
+                values = np.load(self.path/"coords"/f"{name}.npy")
+                axis = info["dims"].index(append_dim)
+                self._coord_prefix[name] = (axis, np.take(values, range(min(rows, values.shape[axis])), axis=axis))
+
+    def due( self )->bool:
+        """ If min_interval passed since the last snapshot, the data needs to be formed only then """
+        return self._last_write is None or time.monotonic() -self._last_write >= self.min_interval
+
+    def write( self, dataset:xr.Dataset, force:bool=False )->bool:
+        """ Write a snapshot of dataset, return False if it is skipped by min_interval """
+        if not force and not self.due():
+            return False
+        self._last_write = time.monotonic()
+
+        for name, coord in dataset.coords.items():
+            self._write_coord( str(name), coord )
+        removed = []
+        for name, variable in dataset.data_vars.items():
+            values = np.asarray(variable.values)
+            if self.append_dim is not None and self.append_dim in variable.dims:
+                removed.extend( self._append( str(name), list(variable.dims), values ) )
+            else:
+                removed.extend( self._snapshot( str(name), list(variable.dims), values ) )
+
+        self.meta["attrs"] = { key: _json_value(value) for key, value in dataset.attrs.items() }
+        self.meta["snapshots"] += 1
+        self.meta["updated"] = datetime.now().strftime("%Y%m%d_%H%M%S")
+        _atomic_json( self.path/_meta_name, self.meta )
+        # The old snapshots are removed once meta.json doesn't point to them
+        for file_path in removed:
+            file_path.unlink(missing_ok=True)
+        return True
+
+    def _write_coord( self, name:str, coord:xr.DataArray ):
+        values = np.asarray(coord.values)
+        if name in self._coord_prefix:
+            axis, prefix = self._coord_prefix[name]
+            values = np.concatenate([prefix, values], axis=axis)
+        last = self._coords.get(name)
+        if last is not None and last.shape == values.shape and np.array_equal(last, values):
+            return
+        _atomic_save( self.path/"coords"/f"{name}.npy", values )
+        self.meta["coords"][name] = {"dims": list(coord.dims)}
+        self._coords[name] = values.copy()
+
+    def _variable( self, name:str, dims:list, mode:str )->dict:
+        info = self.meta["variables"].get(name)
+        if info is None:
+            (self.path/name).mkdir(exist_ok=True)
+            info = {"dims": dims, "mode": mode, "files": []}
+            if mode == "append":
+                info["rows"] = []
+            self.meta["variables"][name] = info
+        elif info["dims"] != dims or info["mode"] != mode:
+            raise ValueError(f"Variable {name} changed from {info['mode']} {info['dims']} to {mode} {dims}")
+        return info
+
+    def _append( self, name:str, dims:list, values:np.ndarray )->list:
+        """ Write the new and the changed rows as a chunk, return the files of the replaced chunks """
+        info = self._variable( name, dims, "append" )
+        axis = dims.index(self.append_dim)
+        first_chunk, digests = self._chunk_digests.setdefault(name, (len(info["files"]), []))
+        stored = sum(info["rows"][first_chunk:])
+        length = values.shape[axis]
+        if length < stored:
+            raise ValueError(f"Variable {name} has {length} rows along {self.append_dim}, {stored} rows are already stored")
+
+        # First chunk of this writer whose rows changed, the rows of a resumed job are final
+        changed = len(digests)
+        row = 0
+        for idx, (rows, digest) in enumerate(zip(info["rows"][first_chunk:], digests)):
+            if _digest( _rows(values, axis, row, row +rows) ) != digest:
+                changed = idx
+                break
+            row += rows
+        if changed == len(digests) and length == stored:
+            return []
+
+        row = sum(info["rows"][first_chunk:first_chunk +changed])
+        chunk = _rows(values, axis, row, length)
+        file_name = f"{self.meta['snapshots']:06d}.npy"
+        _atomic_save( self.path/name/file_name, chunk )
+        removed = [ self.path/name/old for old in info["files"][first_chunk +changed:] ]
+        info["files"] = info["files"][:first_chunk +changed] +[file_name]
+        info["rows"] = info["rows"][:first_chunk +changed] +[length -row]
+        digests[changed:] = [_digest(chunk)]
+        return removed
+
+    def _snapshot( self, name:str, dims:list, values:np.ndarray )->list:
+        """ Write the snapshot, return the files out of retention """
+        info = self._variable( name, dims, "snapshot" )
+        file_name = f"{self.meta['snapshots']:06d}.npy"
+        _atomic_save( self.path/name/file_name, values )
+        info["files"].append(file_name)
+        removed = [ self.path/name/old for old in info["files"][:-self.retention] ]
+        info["files"] = info["files"][-self.retention:]
+        return removed
+
+    def close( self, dataset:xr.Dataset=None ):
+        """ Write the final dataset if given and mark the store complete """
+        if dataset is not None:
+            self.write( dataset, force=True )
+        self.meta["complete"] = True
+        _atomic_json( self.path/_meta_name, self.meta )
+
+def load_partial( path, snapshot:int=-1 )->xr.Dataset:
+    """
+    The dataset in the store at path, while the measurement is running or after it stopped.\n
+    snapshot: index among the kept snapshots of the variables without the append dimension, -1 is the latest.
+    Their arrays are memory mapped.\n
+    The coordinates along the append dimension are cut to the rows written.
+    attrs "stream_complete" and "stream_snapshots" tell if the measurement finished and how many snapshots were written.
+    """
+    path = Path(path)
+    with open(path/_meta_name) as f:
+        meta = json.load(f)
+
+    data_vars = {}
+    rows = None
+    for name, info in meta["variables"].items():
+        if info["mode"] == "append":
+            axis = info["dims"].index(meta["append_dim"])
+            chunks = [ np.load(path/name/file_name) for file_name in info["files"] ]
+            if len(chunks) == 0:
+                continue
+            values = np.concatenate(chunks, axis=axis)
+            rows = values.shape[axis] if rows is None else min(rows, values.shape[axis])
+        else:
+            values = np.load(path/name/info["files"][snapshot], mmap_mode="r")
+        data_vars[name] = (info["dims"], values)
+    if rows is not None:
+        for name, (dims, values) in data_vars.items():
+            if meta["append_dim"] in dims:
+                data_vars[name] = (dims, np.take(values, range(rows), axis=dims.index(meta["append_dim"])))
+
+    coords = {}
+    for name, info in meta["coords"].items():
+        dims = info["dims"]
+        values = np.load(path/"coords"/f"{name}.npy")
+        if rows is not None and meta["append_dim"] in dims:
+            axis = dims.index(meta["append_dim"])
+            values = np.take(values, range(min(rows, values.shape[axis])), axis=axis)
+        coords[name] = (dims, values)
+
+    dataset = xr.Dataset( data_vars, coords=coords, attrs=dict(meta["attrs"]) )
+    dataset.attrs["stream_complete"] = int(meta["complete"])
+    dataset.attrs["stream_snapshots"] = meta["snapshots"]
+    return dataset
+
+def stream_info( path )->Dict[str,object]:
+    """ meta.json of the store at path """
+    with open(Path(path)/_meta_name) as f:
+        return json.load(f)
@@ -28,6 +28,7 @@ from qualang_tools.results import fetching_tool
 from qualang_tools.plot import interrupt_on_close
 from qualang_tools.results import progress_counter
 from exp.RO_macros import state_tomo_singleRO_declare, tomo_pre_save_singleShot, state_tomo_measurement, tomo_NQ_proj
+from exp.native_gate_macros import element_gate_set
 import warnings
 
 warnings.filterwarnings("ignore")
@@ -37,7 +38,12 @@ warnings.filterwarnings("ignore")
 ###################
 
 
-def state_tomography( q_name, ro_element, prepare_state, n_avg, config, qmm:QuantumMachinesManager, simulate:bool=True):
+def state_tomography( q_name, ro_element, prepare_state, n_avg, config, qmm:QuantumMachinesManager, simulate:bool=True, gate_set:str=None):
+    """
+    gate_set: how the basis rotations are played, ex. "virtual_z", see `exp.native_gate_macros`. None for the gate set of q_name in config.
+    """
+    if gate_set is None:
+        gate_set = element_gate_set( config, q_name[0] if type(q_name) is list else q_name )
         
     with program() as tomo:
         iqdata_stream = state_tomo_singleRO_declare( ro_element )
@@ -46,7 +52,7 @@ def state_tomography( q_name, ro_element, prepare_state, n_avg, config, qmm:Quan
 
         with for_(n, 0, n < n_avg, n + 1):
 
-            state_tomo_measurement( iqdata_stream, prepare_state, q_name, ro_element, weights="rotated_", thermalization_time= 200)
+            state_tomo_measurement( iqdata_stream, prepare_state, q_name, ro_element, weights="rotated_", thermalization_time= 200, gate_set=gate_set)
 
             # Wait for the qubit to decay to the ground state
             # Save the averaging iteration to get the progress bar
@@ -95,7 +101,12 @@ def state_tomography( q_name, ro_element, prepare_state, n_avg, config, qmm:Quan
         return output_data
 
 
-def state_tomography_NQ( q_name, ro_element, prepare_state, n_avg, config, qmm:QuantumMachinesManager, simulate:bool=True):
+def state_tomography_NQ( q_name, ro_element, prepare_state, n_avg, config, qmm:QuantumMachinesManager, simulate:bool=True, gate_set:str=None):
+    """
+    gate_set: how the basis rotations are played for all the qubits, ex. "virtual_z". None for the gate set of the first qubit in config.
+    """
+    if gate_set is None:
+        gate_set = element_gate_set( config, q_name[0] )
     with program() as tomo:
         iqdata_stream = state_tomo_singleRO_declare( ro_element )
         n = declare(int)  # QUA variable for the qubit pulse duration
@@ -103,7 +114,7 @@ def state_tomography_NQ( q_name, ro_element, prepare_state, n_avg, config, qmm:Q
 
         with for_(n, 0, n < n_avg, n + 1):
 
-            tomo_NQ_proj( iqdata_stream, prepare_state, q_name, ro_element, weights="rotated_", thermalization_time=200)
+            tomo_NQ_proj( iqdata_stream, prepare_state, q_name, ro_element, weights="rotated_", thermalization_time=200, gate_set=gate_set)
 
             # Wait for the qubit to decay to the ground state
             # Save the averaging iteration to get the progress bar
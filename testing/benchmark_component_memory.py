@@ -0,0 +1,96 @@
+"""
+Construction time, get_config time and memory of the config components for a 50 qubits config.\n
+build: `create_qubits` from the spec\n
+get_config (cold): first call, every component builds its dict\n
+get_config (dirty): after marking all the components dirty, the dicts are built again\n
+memory: traced allocation of the built Configuration, with the components counted alone\n
+Run: python testing/benchmark_component_memory.py
+"""
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+
+from config_component.cached_component import CachedComponent
+from config_component.channel_info import ChannelInfo
+from config_component.configuration import Configuration
+from config_component.controller import controller_read_dict
+from config_component.construct import create_qubits
+
+
+def empty_config()->Configuration:
+    config = Configuration()
+    config._controllers["con1"] = controller_read_dict("con1", {"analog_outputs":{i:{"offset":0.0} for i in range(1,11)}})
+    return config
+
+def all_components( config:Configuration )->list:
+    found = []
+    def walk( component ):
+        found.append(component)
+        for sub_component in component._sub_components():
+            walk(sub_component)
+    for part in [config._controllers, config._elements, config._pulses, config._waveforms, config._digital_waveforms, config._integration_weights, config._mixers]:
+        for component in part.values():
+            walk(component)
+    return found
+
+def component_bytes( components:list )->int:
+    """ Size of the component objects and their attribute dicts, the values are not counted """
+    total = 0
+    for component in components:
+        total += sys.getsizeof(component)
+        if hasattr(component, "__dict__"):
+            total += sys.getsizeof(component.__dict__)
+    return total
+
+def measure( spec:ChannelInfo, repeat:int=5 )->dict:
+    result = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        builds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            config = create_qubits( empty_config(), spec )
+            builds.append(time.perf_counter() -start)
+        result["build"] = min(builds)
+
+        start = time.perf_counter()
+        config.get_config()
+        result["get_config_cold"] = time.perf_counter() -start
+
+        components = all_components(config)
+        rebuilds = []
+        for _ in range(repeat):
+            for component in components:
+                component.mark_dirty()
+            start = time.perf_counter()
+            config.get_config()
+            rebuilds.append(time.perf_counter() -start)
+        result["get_config_dirty"] = min(rebuilds)
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        config = create_qubits( empty_config(), spec )
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    result["config_bytes"] = after -before
+    components = all_components(config)
+    result["components"] = len(components)
+    result["component_bytes"] = component_bytes(components)
+    result["slotted"] = all( not hasattr(c, "__dict__") for c in components if isinstance(c, CachedComponent) )
+    return result
+
+
+if __name__ == '__main__':
+    qubit_num = 50
+    with contextlib.redirect_stdout(io.StringIO()):
+        # warm up the imports and envelope cache
+        create_qubits( empty_config(), ChannelInfo(1) )
+        spec = ChannelInfo(qubit_num)
+    r = measure(spec)
+    print(f"{qubit_num} qubits, {r['components']} components, slotted: {r['slotted']}")
+    print(f"build             {r['build']*1e3:>9.2f} ms")
+    print(f"get_config cold   {r['get_config_cold']*1e3:>9.2f} ms")
+    print(f"get_config dirty  {r['get_config_dirty']*1e3:>9.2f} ms")
+    print(f"config memory     {r['config_bytes']/1024:>9.1f} KiB")
+    print(f"component objects {r['component_bytes']/1024:>9.1f} KiB")
@@ -0,0 +1,60 @@
+"""
+Build, get_config and export time of configs with 5, 20, 50 and 100 qubits.\n
+per-qubit: `create_qubit` with the spec copied for every qubit like `application/config_api/buildup.py`\n
+bulk: `create_qubits` reading the spec once\n
+Run: python testing/benchmark_config_build.py
+"""
+import os
+import tempfile
+import time
+
+from config_component.channel_info import ChannelInfo
+from config_component.configuration import Configuration
+from config_component.controller import controller_read_dict
+from config_component.construct import create_qubit, create_qubits
+
+
+def empty_config()->Configuration:
+    config = Configuration()
+    config._controllers["con1"] = controller_read_dict("con1", {"analog_outputs":{i:{"offset":0.0} for i in range(1,11)}})
+    return config
+
+def build_per_qubit( spec:ChannelInfo )->Configuration:
+    config = empty_config()
+    for q_name in spec.get_spec_forConfig("ro")["registered"]:
+        create_qubit( config, q_name, spec.get_spec_forConfig('ro'), spec.get_spec_forConfig('xy'), spec.get_spec_forConfig('wire'), spec.get_spec_forConfig('z') )
+    return config
+
+def build_bulk( spec:ChannelInfo )->Configuration:
+    return create_qubits( empty_config(), spec )
+
+def measure( builder, spec:ChannelInfo, folder:str )->dict:
+    result = {}
+    start = time.perf_counter()
+    config = builder(spec)
+    result["build"] = time.perf_counter() -start
+
+    start = time.perf_counter()
+    config.get_config()
+    result["get_config"] = time.perf_counter() -start
+
+    start = time.perf_counter()
+    config.export_config(os.path.join(folder, "config.qmz"))
+    result["export"] = time.perf_counter() -start
+    return result
+
+
+if __name__ == '__main__':
+    import contextlib, io
+    # warm up the imports and envelope cache
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_bulk(ChannelInfo(1))
+
+    print(f"{'qubits':>6} {'builder':>9} {'build (s)':>10} {'get_config (s)':>14} {'export (s)':>10}")
+    with tempfile.TemporaryDirectory() as folder:
+        for qubit_num in [5, 20, 50, 100]:
+            with contextlib.redirect_stdout(io.StringIO()):
+                spec = ChannelInfo(qubit_num)
+                results = { label: measure(builder, spec, folder) for label, builder in [("per-qubit", build_per_qubit), ("bulk", build_bulk)] }
+            for label, r in results.items():
+                print(f"{qubit_num:>6} {label:>9} {r['build']:>10.4f} {r['get_config']:>14.4f} {r['export']:>10.4f}")
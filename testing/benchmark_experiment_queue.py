@@ -0,0 +1,91 @@
+"""
+Compare running measurements one by one with `ExperimentQueue` and with `run_async` on the local backend.\n
+Each job of `LocalQuantumMachinesManager` lasts job_duration seconds, the time beyond the sum of the jobs
+is the host overhead: building, compiling, fetching and the gaps between jobs.
+The gathered measurements open a local machine each and their jobs overlap, unlike one QM on the hardware,
+so run_async shows how well the host work runs concurrently.\n
+Run: python testing/benchmark_experiment_queue.py
+"""
+import asyncio
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from exp.experiment_queue import ExperimentQueue
+from exp.local_backend import LocalQuantumMachinesManager
+from exp.relaxation_time import exp_relaxation_time
+
+from benchmark_persistence import build_config
+
+
+job_duration = 1.
+
+def results( program, input_streams:dict )->dict:
+    n_avg = input_streams["n_avg"][0]
+    # 5 evolution times, max_time 5 us by time_resolution 1 us
+    result = { f"q{q_idx}_ro_{iq}": np.zeros(5) for q_idx in range(5) for iq in "IQ" }
+    result["iteration"] = n_avg -1
+    return result
+
+def measurements( config:dict, qmm, q_names:list )->list:
+    """ Relaxation time of each qubit in q_names """
+    exp_list = []
+    for q_name in q_names:
+        measurement = exp_relaxation_time( config, qmm )
+        measurement.q_name = [f"{q_name}_xy"]
+        measurement.ro_element = [f"{q_name}_ro"]
+        measurement.ro_elements = [f"{q_name}_ro"]
+        measurement.n_avg = 100
+        measurement.shot_num = 100
+        measurement.time_resolution = 1
+        exp_list.append(measurement)
+    return exp_list
+
+def run_sequential( config:dict, q_names:list )->tuple:
+    qmm = LocalQuantumMachinesManager( results, duration=job_duration )
+    exp_list = measurements( config, qmm, q_names )
+    start = time.perf_counter()
+    for measurement in exp_list:
+        measurement.run()
+    return time.perf_counter() -start, len(qmm.machines)
+
+def run_queue( config:dict, q_names:list )->tuple:
+    qmm = LocalQuantumMachinesManager( results, duration=job_duration )
+    queue = ExperimentQueue( poll_interval=0.05 )
+    for q_name, measurement in zip(q_names, measurements( config, qmm, q_names )):
+        queue.add( f"{q_name}_T1", measurement )
+    start = time.perf_counter()
+    queue.run()
+    return time.perf_counter() -start, len(qmm.machines), queue.idle_time()
+
+def run_gather( config:dict, q_names:list )->tuple:
+    qmm = LocalQuantumMachinesManager( results, duration=job_duration )
+    exp_list = measurements( config, qmm, q_names )
+    async def gather():
+        await asyncio.gather( *[ measurement.run_async(poll_interval=0.05) for measurement in exp_list ] )
+    start = time.perf_counter()
+    asyncio.run( gather() )
+    return time.perf_counter() -start, len(qmm.machines)
+
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()):
+        config, _ = build_config(5)
+        config = config.get_config()
+    print(f"{'jobs':>4} {'mode':>10} {'machines':>8} {'total (s)':>10} {'overhead (s)':>13} {'idle (s)':>9}")
+    for job_num in [3, 5]:
+        q_names = [ f"q{q_idx}" for q_idx in range(job_num) ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            results_of = {
+                "run": run_sequential( config, q_names ),
+                "queue": run_queue( config, q_names ),
+                "run_async": run_gather( config, q_names ),
+            }
+        for mode, (total, machine_num, *idle) in results_of.items():
+            # Only the gathered jobs overlap, the jobs of a machine run one after another
+            overlap = machine_num if mode == "run_async" else 1
+            jobs_time = np.ceil(job_num/overlap)*job_duration
+            idle = f"{idle[0]:>9.2f}" if idle else f"{'-':>9}"
+            print(f"{job_num:>4} {mode:>10} {machine_num:>8} {total:>10.2f} {total -jobs_time:>13.2f} {idle}")
@@ -0,0 +1,68 @@
+"""
+Per-qubit queries on `ChannelInfo` through the dict views and through the parameter table columns.\n
+query: the XY frequency (LO+IF) of every qubit\n
+bulk update: set the readout amplitude of every qubit\n
+collisions: XY/RO frequencies and mixer images closer than 20 MHz\n
+Run: python testing/benchmark_parameter_table.py
+"""
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from config_component.channel_info import ChannelInfo
+
+
+def best_time( func, repeat:int=20 )->float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() -start)
+    return min(times)
+
+def loop_frequencies( spec:ChannelInfo ):
+    return [ spec._XyInfo[q]["qubit_LO"] +spec._XyInfo[q]["qubit_IF"] for q in spec._XyInfo["register"] ]
+
+def loop_bulk_update( spec:ChannelInfo, amps ):
+    for q, amp in zip(spec._RoInfo["registered"], amps):
+        spec._RoInfo[q]["readout_amp"] = amp
+
+def loop_collisions( spec:ChannelInfo, min_spacing:float ):
+    signals = []
+    for q in spec._XyInfo["register"]:
+        lo, intermediate = spec._XyInfo[q]["qubit_LO"], spec._XyInfo[q]["qubit_IF"]
+        signals += [ (f"{q}_xy", f"{q}_xy", lo +intermediate, False), (f"{q}_xy_image", f"{q}_xy", lo -intermediate, True) ]
+    for q in spec._RoInfo["registered"]:
+        lo, intermediate = spec._RoInfo[q]["resonator_LO"], spec._RoInfo[q]["resonator_IF"]
+        signals += [ (f"{q}_ro", f"{q}_ro", lo +intermediate, False), (f"{q}_ro_image", f"{q}_ro", lo -intermediate, True) ]
+    collisions = []
+    for i, (label_a, owner_a, f_a, image_a) in enumerate(signals):
+        for label_b, owner_b, f_b, image_b in signals[i+1:]:
+            if owner_a != owner_b and not (image_a and image_b) and abs(f_a -f_b) < min_spacing:
+                collisions.append( (label_a, label_b, abs(f_a -f_b)) )
+    return collisions
+
+
+if __name__ == '__main__':
+    print(f"{'qubits':>6} {'task':>12} {'dict loop (ms)':>14} {'column (ms)':>11}")
+    for qubit_num in [20, 100, 400]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec = ChannelInfo(qubit_num)
+        table = spec.parameters
+        # a frequency plan with a few collisions instead of the default where all the qubits share one frequency
+        table.set_column("XyInfo", "qubit_IF", np.linspace(-300e6, 300e6, qubit_num).astype(int))
+        table.set_column("RoInfo", "resonator_IF", np.linspace(-350e6, 350e6, qubit_num).astype(int))
+        amps = np.linspace(0.01, 0.1, qubit_num)
+        _, xy_freqs, _ = table.frequencies("xy")
+        assert np.allclose(loop_frequencies(spec), xy_freqs)
+        assert len(loop_collisions(spec, 20e6)) == len(table.frequency_collisions(20e6))
+        rows = [
+            ("query", lambda: loop_frequencies(spec), lambda: table.frequencies("xy")),
+            ("bulk update", lambda: loop_bulk_update(spec, amps), lambda: table.set_column("RoInfo", "readout_amp", amps)),
+            ("collisions", lambda: loop_collisions(spec, 20e6), lambda: table.frequency_collisions(20e6)),
+        ]
+        for task, loop_func, column_func in rows:
+            print(f"{qubit_num:>6} {task:>12} {best_time(loop_func)*1e3:>14.3f} {best_time(column_func)*1e3:>11.3f}")
+        print(f"{qubit_num:>6} collisions found: {len(table.frequency_collisions(20e6))}")
@@ -0,0 +1,70 @@
+"""
+Compare the pickle files saved before with the versioned container in `config_component.persistence`,
+which `export_config` and `export_spec` save, for save, full load and loading one qubit.\n
+Run: python testing/benchmark_persistence.py
+"""
+import os
+import pickle
+import tempfile
+import time
+
+from config_component.channel_info import ChannelInfo, import_spec
+from config_component.configuration import Configuration, import_config
+from config_component.controller import controller_read_dict
+from config_component.construct import create_qubit
+
+
+def build_config( qubit_num:int ):
+    spec = ChannelInfo(qubit_num)
+    config = Configuration()
+    config._controllers["con1"] = controller_read_dict("con1", {"analog_outputs":{i:{"offset":0.0} for i in range(1,11)}})
+    ro, xy, wire, z = [spec.get_spec_forConfig(k) for k in ["ro","xy","wire","z"]]
+    for q_idx in range(qubit_num):
+        create_qubit(config, f"q{q_idx}", ro, xy, wire, z)
+    return config, spec
+
+def timing( func, repeat:int=10 )->float:
+    """ The best time of repeat runs, the others are slowed down by the rest of the machine """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() -start)
+    return min(times)
+
+def save_pickle( config:Configuration, spec:ChannelInfo, config_path:str, spec_path:str ):
+    """ The pickle files `export_config` and `export_spec` saved before the container """
+    with open(config_path, "wb") as f:
+        pickle.dump(config, f)
+    with open(spec_path, "wb") as f:
+        infos = { part: getattr(spec, f"_{part}").to_dict() for part in ["RoInfo","XyInfo","ZInfo","DecoInfo","WireInfo"] }
+        pickle.dump({**infos, "HardwareInfo":spec._HardwareInfo}, f)
+
+def save_container( config:Configuration, spec:ChannelInfo, config_path:str, spec_path:str ):
+    config.export_config(config_path)
+    spec.export_spec(spec_path)
+
+def measure( config:Configuration, spec:ChannelInfo, folder:str, suffix:str )->dict:
+    config_path = os.path.join(folder, f"config{suffix}")
+    spec_path = os.path.join(folder, f"spec{suffix}")
+    save = save_pickle if suffix == ".pkl" else save_container
+    result = {}
+    result["save"] = timing(lambda: save(config, spec, config_path, spec_path))
+    result["load"] = timing(lambda: (import_config(config_path), import_spec(spec_path)))
+    if suffix != ".pkl":
+        result["load q0"] = timing(lambda: (import_config(config_path, ["q0"]), import_spec(spec_path, ["q0"])))
+    result["size"] = os.path.getsize(config_path) +os.path.getsize(spec_path)
+    return result
+
+
+if __name__ == '__main__':
+    import contextlib, io
+    print(f"{'qubits':>6} {'format':>9} {'save (s)':>9} {'load (s)':>9} {'load q0 (s)':>11} {'size kB':>8}")
+    with tempfile.TemporaryDirectory() as folder:
+        for qubit_num in [20, 50]:
+            with contextlib.redirect_stdout(io.StringIO()):
+                config, spec = build_config(qubit_num)
+                results = { suffix: measure(config, spec, folder, suffix) for suffix in [".pkl", ".qmz"] }
+            for suffix, r in results.items():
+                partial = f"{r['load q0']:>11.4f}" if "load q0" in r else f"{'-':>11}"
+                print(f"{qubit_num:>6} {suffix:>9} {r['save']:>9.4f} {r['load']:>9.4f} {partial} {r['size']/1e3:>8.1f}")
@@ -0,0 +1,61 @@
+"""
+Compare keeping arbitrary waveform samples as ndarray (current) with the old path,
+which stored Python lists from `.tolist()` at build and at every `update_controlWaveform`.\n
+Run: python testing/benchmark_waveform_samples.py
+"""
+import time
+import tracemalloc
+
+from config_component.channel_info import ChannelInfo
+from config_component.configuration import Configuration
+from config_component.controller import controller_read_dict
+from config_component.construct import create_qubit
+from config_component.update import update_controlWaveform
+
+
+def build_config( qubit_num:int ):
+    spec = ChannelInfo(qubit_num)
+    config = Configuration()
+    config._controllers["con1"] = controller_read_dict("con1", {"analog_outputs":{i:{"offset":0.0} for i in range(1,11)}})
+    ro, xy, wire, z = [spec.get_spec_forConfig(k) for k in ["ro","xy","wire","z"]]
+    for q_idx in range(qubit_num):
+        create_qubit(config, f"q{q_idx}", ro, xy, wire, z)
+    return config, spec
+
+def to_list_samples( config:Configuration ):
+    """ Old path, samples kept as list of float """
+    for waveform in config.waveforms.values():
+        if waveform.type == "arbitrary":
+            waveform._sample = waveform._sample.tolist()
+
+def arbitrary_sample_bytes( config:Configuration )->tuple:
+    """ Memory of the arbitrary samples as list of float and as ndarray """
+    arrays = [ wf._sample for wf in config.waveforms.values() if wf.type == "arbitrary" ]
+    tracemalloc.start()
+    samples = [ a.tolist() for a in arrays ]
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    array_bytes = sum( a.nbytes for a in arrays )
+    return list_bytes, array_bytes
+
+def refresh_time( config:Configuration, spec:ChannelInfo, as_list:bool, repeat:int=5 )->float:
+    xy = spec.get_spec_forConfig("xy")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        update_controlWaveform(config, xy, "all")
+        if as_list:
+            to_list_samples(config)
+        config.get_config()
+    return (time.perf_counter() -start)/repeat
+
+
+if __name__ == '__main__':
+    import contextlib, io
+    print(f"{'qubits':>6} {'list MB':>8} {'ndarray MB':>10} {'refresh list (s)':>16} {'refresh ndarray (s)':>19}")
+    for qubit_num in [20, 40, 80]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            config, spec = build_config(qubit_num)
+            list_bytes, array_bytes = arbitrary_sample_bytes(config)
+            t_array = refresh_time(config, spec, False)
+            t_list = refresh_time(config, spec, True)
+        print(f"{qubit_num:>6} {list_bytes/1e6:>8.2f} {array_bytes/1e6:>10.2f} {t_list:>16.4f} {t_array:>19.4f}")